@@ -15,25 +15,24 @@ SELECT
     t.id AS tournament_id,
     t.name AS tournament_name,
     t.status,
-    COUNT(DISTINCT tt.team_id) AS registered_teams,
+    t.current_teams AS registered_teams,
     t.max_teams,
-    COUNT(DISTINCT m.id) AS matches_count,
-    COUNT(DISTINCT CASE WHEN m.status = 'completed' THEN m.id END) AS completed_matches
+    COUNT(m.id) AS matches_count,
+    COUNT(CASE WHEN m.status = 'completed' THEN m.id END) AS completed_matches
 FROM tournaments t
-LEFT JOIN tournament_teams tt ON t.id = tt.tournament_id
 LEFT JOIN matches m ON t.id = m.tournament_id
-GROUP BY t.id, t.name, t.status, t.max_teams;
+GROUP BY t.id, t.name, t.status, t.current_teams, t.max_teams;
 
 -- Представление для просмотра результатов команд
 CREATE OR REPLACE VIEW team_results AS
 SELECT 
     t.id AS team_id,
     t.name AS team_name,
-    COUNT(DISTINCT m.id) AS total_matches,
-    COUNT(DISTINCT CASE WHEN m.winner_id = t.id THEN m.id END) AS wins,
-    COUNT(DISTINCT CASE WHEN m.status = 'completed' AND m.winner_id != t.id THEN m.id END) AS losses
+    COALESCE(SUM(s.played), 0) AS total_matches,
+    COALESCE(SUM(s.wins), 0) AS wins,
+    COALESCE(SUM(s.losses), 0) AS losses
 FROM teams t
-LEFT JOIN matches m ON (t.id = m.team1_id OR t.id = m.team2_id) AND m.status = 'completed'
+LEFT JOIN standings s ON s.team_id = t.id
 GROUP BY t.id, t.name;
 
 -- Функция для проверки возможности регистрации команды на турнир
@@ -41,26 +40,14 @@ CREATE OR REPLACE FUNCTION check_tournament_registration(
     p_tournament_id INTEGER,
     p_team_id INTEGER
 ) RETURNS BOOLEAN AS $$
-DECLARE
-    current_teams INTEGER;
-    max_teams INTEGER;
-    tournament_status tournament_status;
 BEGIN
-    -- Получаем текущее количество команд и максимально допустимое
-    SELECT 
-        COUNT(*), 
-        t.max_teams,
-        t.status
-    INTO current_teams, max_teams, tournament_status
-    FROM tournaments t
-    LEFT JOIN tournament_teams tt ON t.id = tt.tournament_id
-    WHERE t.id = p_tournament_id
-    GROUP BY t.max_teams, t.status;
-
-    -- Проверяем условия
-    RETURN 
-        tournament_status = 'registration' AND
-        current_teams < max_teams;
+    -- Число команд хранится в tournaments.current_teams
+    RETURN EXISTS (
+        SELECT 1 FROM tournaments t
+        WHERE t.id = p_tournament_id
+        AND t.status = 'REGISTRATION'
+        AND (t.max_teams IS NULL OR t.current_teams < t.max_teams)
+    );
 END;
 $$ LANGUAGE plpgsql;
 
@@ -91,10 +78,8 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
-CREATE TRIGGER check_team_registration_trigger
-    BEFORE INSERT ON tournament_teams
-    FOR EACH ROW
-    EXECUTE FUNCTION check_team_registration();
+-- Триггер check_team_registration_trigger не создается: вместимость
+-- проверяется атомарно при занятии места (tournaments.current_teams)
 
 -- Функции для работы с турнирами
 CREATE OR REPLACE FUNCTION get_tournament_standings(p_tournament_id INTEGER)
@@ -107,21 +92,19 @@ RETURNS TABLE (
     points INTEGER
 ) AS $$
 BEGIN
+    -- Таблица standings обновляется вместе с результатами матчей
     RETURN QUERY
     SELECT 
         t.id AS team_id,
         t.name AS team_name,
-        COUNT(DISTINCT m.id) AS matches_played,
-        COUNT(DISTINCT CASE WHEN m.winner_id = t.id THEN m.id END) AS wins,
-        COUNT(DISTINCT CASE WHEN m.status = 'completed' AND m.winner_id != t.id THEN m.id END) AS losses,
-        COUNT(DISTINCT CASE WHEN m.winner_id = t.id THEN m.id END) * 3 AS points
-    FROM teams t
-    JOIN tournament_teams tt ON t.id = tt.team_id
-    LEFT JOIN matches m ON (t.id = m.team1_id OR t.id = m.team2_id) 
-        AND m.tournament_id = p_tournament_id
-    WHERE tt.tournament_id = p_tournament_id
-    GROUP BY t.id, t.name
-    ORDER BY points DESC;
+        s.played AS matches_played,
+        s.wins,
+        s.losses,
+        s.points
+    FROM standings s
+    JOIN teams t ON t.id = s.team_id
+    WHERE s.tournament_id = p_tournament_id
+    ORDER BY s.points DESC, s.score_for - s.score_against DESC;
 END;
 $$ LANGUAGE plpgsql;
 
@@ -140,7 +123,7 @@ BEGIN
     -- Получаем тип турнира и список команд
     SELECT 
         t.type,
-        ARRAY_AGG(tt.team_id ORDER BY RANDOM())
+        ARRAY_AGG(tt.team_id ORDER BY tt.seed NULLS LAST, RANDOM())
     INTO v_tournament_type, v_team_ids
     FROM tournaments t
     JOIN tournament_teams tt ON t.id = tt.tournament_id
@@ -186,7 +169,7 @@ BEGIN
 
     -- Обновляем статус турнира
     UPDATE tournaments 
-    SET status = 'in_progress'
+    SET status = 'IN_PROGRESS'
     WHERE id = p_tournament_id;
 END;
 $$ LANGUAGE plpgsql;
@@ -213,13 +196,9 @@ $$ LANGUAGE plpgsql;
 
 -- Представления
 CREATE OR REPLACE VIEW active_tournaments AS
-SELECT 
-    t.*,
-    COUNT(DISTINCT tt.team_id) AS current_teams
+SELECT t.*
 FROM tournaments t
-LEFT JOIN tournament_teams tt ON t.id = tt.tournament_id
-WHERE t.status IN ('registration', 'in_progress')
-GROUP BY t.id;
+WHERE t.status IN ('REGISTRATION', 'IN_PROGRESS');
 
 -- Функция для получения следующего матча команды
 CREATE OR REPLACE FUNCTION get_next_team_match(p_team_id INTEGER)
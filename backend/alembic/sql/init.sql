@@ -2,10 +2,10 @@
 CREATE TYPE user_role AS ENUM ('admin', 'organizer', 'player');
 
 -- Создание перечисления для типов турниров
-CREATE TYPE tournament_type AS ENUM ('single_elimination', 'double_elimination', 'round_robin');
+CREATE TYPE tournament_type AS ENUM ('single_elimination', 'double_elimination', 'round_robin', 'swiss');
 
 -- Создание перечисления для статуса турнира
-CREATE TYPE tournament_status AS ENUM ('draft', 'registration', 'in_progress', 'completed', 'cancelled');
+CREATE TYPE tournament_status AS ENUM ('DRAFT', 'REGISTRATION', 'IN_PROGRESS', 'COMPLETED', 'CANCELLED');
 
 -- Создание таблиц
 CREATE TABLE IF NOT EXISTS users (
@@ -24,15 +24,19 @@ CREATE TABLE tournaments (
     name VARCHAR(100) NOT NULL,
     description TEXT,
     type tournament_type NOT NULL,
-    status tournament_status NOT NULL DEFAULT 'draft',
+    status tournament_status NOT NULL DEFAULT 'DRAFT',
     rules TEXT,
     max_teams INTEGER NOT NULL CHECK (max_teams >= 2),
+    current_teams INTEGER NOT NULL DEFAULT 0 CHECK (current_teams >= 0),
+    group_count INTEGER NOT NULL DEFAULT 1 CHECK (group_count >= 1),
     registration_deadline TIMESTAMP WITH TIME ZONE,
     start_date TIMESTAMP WITH TIME ZONE,
     end_date TIMESTAMP WITH TIME ZONE,
     created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    version BIGINT NOT NULL DEFAULT 1,
+    version_xid BIGINT,
     CONSTRAINT valid_dates CHECK (
         registration_deadline <= start_date 
         AND start_date <= end_date
@@ -43,6 +47,7 @@ CREATE TABLE teams (
     id SERIAL PRIMARY KEY,
     name VARCHAR(100) UNIQUE NOT NULL,
     captain_id INTEGER REFERENCES users(id),
+    rating DOUBLE PRECISION NOT NULL DEFAULT 1500,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -52,6 +57,8 @@ CREATE TABLE tournament_teams (
     team_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
     registration_date TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(20) DEFAULT 'pending',
+    group_number INTEGER,
+    seed INTEGER CHECK (seed >= 1),
     PRIMARY KEY (tournament_id, team_id)
 );
 
@@ -90,7 +97,26 @@ CREATE TABLE bracket (
     round INTEGER NOT NULL,
     position INTEGER NOT NULL,
     next_match_id INTEGER REFERENCES matches(id),
-    UNIQUE(tournament_id, round, position)
+    -- Слот (1 или 2) следующего матча для победителя
+    next_slot SMALLINT CHECK (next_slot IN (1, 2)),
+    -- Матч и слот, куда уходит проигравший (двойное выбывание)
+    loser_next_match_id INTEGER REFERENCES matches(id),
+    loser_next_slot SMALLINT CHECK (loser_next_slot IN (1, 2)),
+    bracket_type VARCHAR(20) NOT NULL DEFAULT 'winners',
+    UNIQUE(tournament_id, bracket_type, round, position)
+);
+
+-- Турнирная таблица, обновляется вместе с результатом каждого матча
+CREATE TABLE standings (
+    tournament_id INTEGER REFERENCES tournaments(id) ON DELETE CASCADE,
+    team_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
+    played INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    points INTEGER NOT NULL DEFAULT 0,
+    score_for INTEGER NOT NULL DEFAULT 0,
+    score_against INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tournament_id, team_id)
 );
 
 CREATE TABLE backup (
@@ -108,9 +134,18 @@ CREATE TABLE backup (
 CREATE INDEX idx_tournaments_status ON tournaments(status);
 CREATE INDEX idx_tournaments_start_date ON tournaments(start_date);
 CREATE INDEX idx_matches_tournament ON matches(tournament_id);
-CREATE INDEX idx_matches_start_time ON matches(start_time);
+-- Постраничные списки по ключу (время, id)
+CREATE INDEX idx_matches_start_id ON matches(start_time, id);
+CREATE INDEX idx_matches_tournament_start_id ON matches(tournament_id, start_time, id);
+CREATE INDEX idx_tournaments_created_id ON tournaments(created_at, id);
+CREATE INDEX idx_users_created_id ON users(created_at, id);
+CREATE INDEX idx_backup_created_id ON backup(created_at, id);
+-- Поиск пересекающихся матчей команды по времени начала
+CREATE INDEX idx_matches_team1_start ON matches(team1_id, start_time);
+CREATE INDEX idx_matches_team2_start ON matches(team2_id, start_time);
 CREATE INDEX idx_players_team ON players(team_id);
 CREATE INDEX idx_tournament_teams_tournament ON tournament_teams(tournament_id);
+CREATE INDEX idx_standings_team ON standings(team_id);
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_users_username ON users(username);
 
@@ -142,4 +177,190 @@ CREATE TRIGGER update_users_updated_at
 CREATE TRIGGER update_teams_modtime
     BEFORE UPDATE ON teams
     FOR EACH ROW
-    EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Версия турнира: растет не более чем на 1 за транзакцию при изменении
+-- турнира, его матчей, сетки, участников и их команд
+CREATE OR REPLACE FUNCTION bump_tournament_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.version_xid IS DISTINCT FROM txid_current() THEN
+        NEW.version = OLD.version + 1;
+        NEW.version_xid = txid_current();
+    END IF;
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION touch_tournaments()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (SELECT tournament_id FROM old_rows)
+        AND version_xid IS DISTINCT FROM txid_current();
+    ELSE
+        UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (SELECT tournament_id FROM new_rows)
+        AND version_xid IS DISTINCT FROM txid_current();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION touch_team_tournaments()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'teams' THEN
+        -- Название и рейтинг команды видны в ответах по турнирам
+        UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (
+            SELECT tt.tournament_id
+            FROM new_rows n
+            JOIN old_rows o ON o.id = n.id
+            JOIN tournament_teams tt ON tt.team_id = n.id
+            WHERE n.name IS DISTINCT FROM o.name
+            OR n.rating IS DISTINCT FROM o.rating
+        )
+        AND version_xid IS DISTINCT FROM txid_current();
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (
+            SELECT tt.tournament_id FROM tournament_teams tt
+            WHERE tt.team_id IN (SELECT team_id FROM old_rows)
+        )
+        AND version_xid IS DISTINCT FROM txid_current();
+    ELSE
+        UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+        WHERE id IN (
+            SELECT tt.tournament_id FROM tournament_teams tt
+            WHERE tt.team_id IN (SELECT team_id FROM new_rows)
+        )
+        AND version_xid IS DISTINCT FROM txid_current();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER bump_tournament_version
+    BEFORE UPDATE ON tournaments
+    FOR EACH ROW
+    EXECUTE FUNCTION bump_tournament_version();
+
+CREATE TRIGGER matches_touch_tournaments_insert
+    AFTER INSERT ON matches
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER matches_touch_tournaments_update
+    AFTER UPDATE ON matches
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER matches_touch_tournaments_delete
+    AFTER DELETE ON matches
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER bracket_touch_tournaments_insert
+    AFTER INSERT ON bracket
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER bracket_touch_tournaments_update
+    AFTER UPDATE ON bracket
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER bracket_touch_tournaments_delete
+    AFTER DELETE ON bracket
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER tournament_teams_touch_tournaments_insert
+    AFTER INSERT ON tournament_teams
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER tournament_teams_touch_tournaments_update
+    AFTER UPDATE ON tournament_teams
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER tournament_teams_touch_tournaments_delete
+    AFTER DELETE ON tournament_teams
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_tournaments();
+
+CREATE TRIGGER teams_touch_tournaments_update
+    AFTER UPDATE ON teams
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION touch_team_tournaments();
+
+-- Число команд турнира: меняется при любой вставке и удалении, в том числе каскадном
+CREATE OR REPLACE FUNCTION count_tournament_teams()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE tournaments t SET current_teams = t.current_teams + d.team_count
+        FROM (
+            SELECT tournament_id, COUNT(*) AS team_count
+            FROM new_rows
+            GROUP BY tournament_id
+        ) d
+        WHERE t.id = d.tournament_id;
+    ELSE
+        UPDATE tournaments t SET current_teams = t.current_teams - d.team_count
+        FROM (
+            SELECT tournament_id, COUNT(*) AS team_count
+            FROM old_rows
+            GROUP BY tournament_id
+        ) d
+        WHERE t.id = d.tournament_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER tournament_teams_count_insert
+    AFTER INSERT ON tournament_teams
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_tournament_teams();
+
+CREATE TRIGGER tournament_teams_count_delete
+    AFTER DELETE ON tournament_teams
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_tournament_teams();
+
+-- Сверка счетчика с tournament_teams; возвращает число исправленных турниров
+CREATE OR REPLACE FUNCTION sync_tournament_teams_count()
+RETURNS INTEGER AS $$
+DECLARE
+    fixed INTEGER;
+BEGIN
+    UPDATE tournaments t SET current_teams = d.team_count
+    FROM (
+        SELECT t2.id, COUNT(tt.team_id) AS team_count
+        FROM tournaments t2
+        LEFT JOIN tournament_teams tt ON tt.tournament_id = t2.id
+        GROUP BY t2.id
+    ) d
+    WHERE t.id = d.id
+    AND t.current_teams <> d.team_count;
+    GET DIAGNOSTICS fixed = ROW_COUNT;
+    RETURN fixed;
+END;
+$$ LANGUAGE plpgsql;
@@ -10,11 +10,11 @@ INSERT INTO users (username, email, hashed_password, role) VALUES
 
 -- Создание тестовых турниров
 INSERT INTO tournaments (name, description, type, status, rules, max_teams, registration_deadline, start_date, end_date, created_by) VALUES
-    ('CS:GO Summer Cup 2024', 'Летний турнир по CS:GO', 'single_elimination', 'registration', 'Стандартные правила CS:GO', 8, 
+    ('CS:GO Summer Cup 2024', 'Летний турнир по CS:GO', 'single_elimination', 'REGISTRATION', 'Стандартные правила CS:GO', 8, 
      CURRENT_TIMESTAMP + INTERVAL '7 days', CURRENT_TIMESTAMP + INTERVAL '14 days', CURRENT_TIMESTAMP + INTERVAL '16 days', 2),
-    ('Dota 2 Championship', 'Чемпионат по Dota 2', 'double_elimination', 'registration', 'Стандартные правила Dota 2', 16,
+    ('Dota 2 Championship', 'Чемпионат по Dota 2', 'double_elimination', 'REGISTRATION', 'Стандартные правила Dota 2', 16,
      CURRENT_TIMESTAMP + INTERVAL '14 days', CURRENT_TIMESTAMP + INTERVAL '21 days', CURRENT_TIMESTAMP + INTERVAL '25 days', 2),
-    ('League Round Robin', 'Круговой турнир по League of Legends', 'round_robin', 'draft', 'Правила LoL', 4,
+    ('League Round Robin', 'Круговой турнир по League of Legends', 'round_robin', 'DRAFT', 'Правила LoL', 4,
      CURRENT_TIMESTAMP + INTERVAL '30 days', CURRENT_TIMESTAMP + INTERVAL '45 days', CURRENT_TIMESTAMP + INTERVAL '50 days', 3);
 
 -- Создание тестовых команд
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1 import auth, users, tournaments, teams
+from app.api.v1 import auth, users, tournaments, teams, matches, internal
 
 api_router = APIRouter()
 
@@ -7,5 +7,7 @@ api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(tournaments.router, prefix="/tournaments", tags=["tournaments"])
 api_router.include_router(teams.router, prefix="/teams", tags=["teams"])
+api_router.include_router(matches.router, prefix="/matches", tags=["matches"])
+api_router.include_router(internal.router, prefix="/internal", tags=["internal"])
 
-__all__ = ["users", "tournaments", "auth", "teams"] 
\ No newline at end of file
+__all__ = ["users", "tournaments", "auth", "teams", "matches", "internal"] 
\ No newline at end of file
@@ -4,7 +4,9 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from app.db.session import get_db
-from app.core.security import create_access_token, verify_password, get_current_user, get_password_hash
+from app.db.queries import queries
+from app.core.security import create_access_token, get_current_user
+from app.core.hashing import check_password, hash_password
 from app.core.config import settings
 from app.models.user import User, UserRole
 from sqlalchemy import select, insert
@@ -19,14 +21,7 @@ async def login(
     db: AsyncSession = Depends(get_db)
 ):
     # Поиск пользователя
-    query = text("""
-        SELECT id, username, hashed_password, role 
-        FROM users 
-        WHERE username = :username
-    """)
-    
-    result = await db.execute(query, {"username": form_data.username})
-    user = result.fetchone()
+    user = await queries.fetchrow(db, "user_login", {"username": form_data.username})
 
     if not user:
         raise HTTPException(
@@ -35,7 +30,7 @@ async def login(
         )
 
     # Проверка пароля
-    if not verify_password(form_data.password, user.hashed_password):
+    if not await check_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверное имя пользователя или пароль"
@@ -77,7 +72,7 @@ async def register(
             )
 
         # Создаем нового пользователя
-        hashed_password = get_password_hash(form_data.password)
+        hashed_password = await hash_password(form_data.password)
         
         # Генерируем временный email
         temp_email = f"{form_data.username}@example.com"
@@ -107,6 +102,9 @@ async def register(
                 "role": user.role.value
             }
         }
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
         logger.error(f"Ошибка при регистрации: {str(e)}")
         await db.rollback()
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.security import get_current_user
+from app.core.hashing import hashing_status
+from app.db.queries import queries
+from app.db.session import get_db, pool_status
+from app.models.user import User, UserRole
+from app.services.tournament import TournamentService
+
+router = APIRouter()
+
+@router.get("/db-pool")
+async def get_db_pool(current_user: User = Depends(get_current_user)):
+    """Состояние пула соединений с базой (только для админов)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return pool_status()
+
+@router.get("/queries")
+async def get_query_stats(current_user: User = Depends(get_current_user)):
+    """Статистика вызовов зарегистрированных запросов (только для админов)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return queries.stats()
+
+@router.get("/hashing")
+async def get_hashing_status(current_user: User = Depends(get_current_user)):
+    """Очередь и время хеширования паролей (только для админов)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    return hashing_status()
+
+@router.post("/team-counts/resync")
+async def resync_team_counts(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Сверка числа команд турниров с tournament_teams (только для админов)"""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+    fixed = await TournamentService(db).resync_team_counts()
+    return {"fixed_tournaments": fixed}
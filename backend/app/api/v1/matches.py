@@ -1,55 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import List
-from app.db.session import get_db
-from app.schemas.match import MatchCreate, Match, MatchUpdate, MatchResult
+from typing import List, Optional
+from app.db.session import get_db, get_read_db
+from app.schemas.match import MatchCreate, Match, MatchPage, MatchUpdate, MatchResult, MatchResultBatch, MatchResultStatus
 from app.schemas.user import User
 from app.core.security import get_current_user
+from app.core.conditional import is_not_modified, make_etag, not_modified, validator_headers
+from app.core.pagination import decode_cursor, keyset_page
+from app.db.queries import queries
 from app.models.user import UserRole
+from app.services.conflicts import ConflictService
+from app.services.export import EXPORT_MEDIA_TYPES, MATCHES_EXPORT_QUERY, stream_export
+from app.services.match import MatchService
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Match])
+@router.get("/", response_model=MatchPage)
 async def get_matches(
-    skip: int = 0,
-    limit: int = 10,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
     tournament_id: int = None,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Получение списка матчей"""
-    base_query = """
-        SELECT 
-            m.*,
-            t.name as tournament_name,
-            t1.name as team1_name,
-            t2.name as team2_name,
-            w.name as winner_name
-        FROM matches m
-        JOIN tournaments t ON m.tournament_id = t.id
-        JOIN teams t1 ON m.team1_id = t1.id
-        JOIN teams t2 ON m.team2_id = t2.id
-        LEFT JOIN teams w ON m.winner_id = w.id
-    """
-    
+    """Получение списка матчей; курсор следующей страницы — в next_cursor и X-Next-Cursor"""
+    params = {"limit": limit + 1, "tournament_id": tournament_id}
+    key = decode_cursor(cursor)
+    if key:
+        params["cursor_time"], params["cursor_id"] = key
+
+    name = "tournament_matches_page" if tournament_id else "matches_page"
+    rows = await queries.fetch(db, f"{name}_after" if key else name, params)
+    matches, next_cursor = keyset_page(rows, limit, "start_time", response)
+    return {"items": matches, "next_cursor": next_cursor}
+
+@router.get("/export")
+async def export_matches(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    tournament_id: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Потоковая выгрузка всех матчей в NDJSON или CSV"""
+    params = {}
+    where_clause = ""
     if tournament_id:
         where_clause = "WHERE m.tournament_id = :tournament_id"
-    else:
-        where_clause = ""
-    
-    query = text(f"""
-        {base_query}
-        {where_clause}
-        ORDER BY m.start_time DESC
-        LIMIT :limit OFFSET :skip
-    """)
-    
-    params = {"limit": limit, "skip": skip}
-    if tournament_id:
         params["tournament_id"] = tournament_id
-        
-    result = await db.execute(query, params)
-    return result.fetchall()
+
+    return StreamingResponse(
+        stream_export(MATCHES_EXPORT_QUERY.format(where_clause=where_clause), params, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="matches.{export_format}"'}
+    )
 
 @router.post("/", response_model=Match)
 async def create_match(
@@ -83,6 +87,9 @@ async def create_match(
             status_code=400, 
             detail="Обе команды должны быть зарегистрированы в турнире"
         )
+
+    # Команда не может играть два матча одновременно, в том числе в разных турнирах
+    await ConflictService(db).check_match([match.team1_id, match.team2_id], match.start_time)
     
     query = text("""
         INSERT INTO matches (
@@ -113,6 +120,18 @@ async def create_match(
         await db.rollback()
         raise HTTPException(status_code=400, detail="Ошибка создания матча")
 
+@router.post("/results:batch", response_model=List[MatchResultStatus])
+async def update_match_results(
+    batch: MatchResultBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Пакетное внесение результатов с итогом по каждому матчу"""
+    if current_user.role not in [UserRole.ADMIN, UserRole.ORGANIZER]:
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
+
+    return await MatchService(db).update_match_results(batch.results, current_user.id)
+
 @router.post("/{match_id}/result", response_model=Match)
 async def update_match_result(
     match_id: int,
@@ -124,54 +143,27 @@ async def update_match_result(
     if current_user.role not in [UserRole.ADMIN, UserRole.ORGANIZER]:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     
-    query = text("""
-        UPDATE matches
-        SET 
-            score_team1 = :score_team1,
-            score_team2 = :score_team2,
-            status = 'completed',
-            end_time = CURRENT_TIMESTAMP
-        WHERE id = :match_id
-        RETURNING *
-    """)
-    
-    try:
-        result = await db.execute(
-            query,
-            {
-                "match_id": match_id,
-                "score_team1": result.score_team1,
-                "score_team2": result.score_team2
-            }
-        )
-        await db.commit()
-        
-        # Триггер update_match_statistics автоматически определит победителя
-        return result.fetchone()
-    except Exception as e:
-        await db.rollback()
-        raise HTTPException(status_code=400, detail="Ошибка обновления результата")
+    # Победитель и проигравший сразу переходят в следующие матчи сетки
+    return await MatchService(db).update_match_result(match_id, result, current_user.id)
 
 @router.get("/{match_id}", response_model=Match)
-async def get_match(match_id: int, db: AsyncSession = Depends(get_db)):
+async def get_match(
+    match_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
     """Получение информации о матче"""
-    query = text("""
-        SELECT 
-            m.*,
-            t.name as tournament_name,
-            t1.name as team1_name,
-            t2.name as team2_name,
-            w.name as winner_name
-        FROM matches m
-        JOIN tournaments t ON m.tournament_id = t.id
-        JOIN teams t1 ON m.team1_id = t1.id
-        JOIN teams t2 ON m.team2_id = t2.id
-        LEFT JOIN teams w ON m.winner_id = w.id
-        WHERE m.id = :match_id
-    """)
-    
-    result = await db.execute(query, {"match_id": match_id})
-    match = result.fetchone()
+    # Матч меняется только вместе с версией своего турнира
+    current = await queries.fetchrow(db, "match_version", {"match_id": match_id})
+    if not current:
+        raise HTTPException(status_code=404, detail="Матч не найден")
+    etag = make_etag("match", match_id, current.version)
+    if is_not_modified(request, etag, current.updated_at):
+        return not_modified(etag, current.updated_at)
+    response.headers.update(validator_headers(etag, current.updated_at))
+
+    match = await queries.fetchrow(db, "match_detail", {"match_id": match_id})
     
     if not match:
         raise HTTPException(status_code=404, detail="Матч не найден")
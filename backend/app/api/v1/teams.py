@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.schemas.team import TeamCreate, TeamResponse
 from app.models.team import Team
 from app.core.security import get_current_user
@@ -24,7 +24,7 @@ class TeamMemberAdd(BaseModel):
 
 @router.get("/", response_model=List[TeamResponse])
 async def get_teams(
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -1,40 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.db.session import get_db
-from typing import List
-from app.schemas.tournament import TournamentResponse, TournamentCreate, TournamentStatusUpdate
+from app.db.session import get_db, get_read_db
+from typing import List, Optional
+from app.schemas.tournament import ScheduleParams, TeamSeed, TournamentResponse, TournamentCreate, TournamentStatusUpdate
 from app.models.tournament import Tournament, TournamentStatus
 from app.models.user import User, UserRole
 from app.core.security import get_current_user
+from app.core.conditional import is_not_modified, make_etag, not_modified, validator_headers
+from app.core.pagination import decode_cursor, keyset_page
+from app.db.queries import queries
+from app.services.tournament import TournamentService
+from app.services.bracket import BracketService
+from app.services.bracket_wire import BRACKET_BINARY_MEDIA_TYPE
+from app.services.export import EXPORT_MEDIA_TYPES, TOURNAMENTS_EXPORT_QUERY, stream_export
+from app.services.projections import ProjectionService
+from app.services.standings import StandingsService
+from app.schemas.standing import StandingResponse
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/", response_model=List[TournamentResponse])
-async def get_tournaments(db: AsyncSession = Depends(get_db)):
+async def get_tournaments(
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_read_db)
+):
+    params = {"limit": limit + 1}
+    key = decode_cursor(cursor)
+    if key:
+        params["cursor_time"], params["cursor_id"] = key
     try:
-        query = text("""
-            SELECT 
-                t.id,
-                t.name,
-                t.type,
-                t.description,
-                t.rules,
-                t.max_teams,
-                t.start_date,
-                t.end_date,
-                t.created_by,
-                t.created_at,
-                t.updated_at,
-                COALESCE(t.status, 'DRAFT') as status
-            FROM tournaments t
-            ORDER BY t.created_at DESC
-        """)
-        
-        result = await db.execute(query)
-        tournaments = result.fetchall()
+        rows = await queries.fetch(db, "tournaments_page_after" if key else "tournaments_page", params)
+        tournaments, _ = keyset_page(rows, limit, "created_at", response)
         
         return [
             {
@@ -44,6 +46,8 @@ async def get_tournaments(db: AsyncSession = Depends(get_db)):
                 "description": t.description,
                 "rules": t.rules,
                 "max_teams": t.max_teams,
+                "registered_teams": t.registered_teams,
+                "group_count": t.group_count,
                 "start_date": t.start_date,
                 "end_date": t.end_date,
                 "created_by": t.created_by,
@@ -59,6 +63,25 @@ async def get_tournaments(db: AsyncSession = Depends(get_db)):
         logger.error(f"Error getting tournaments: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/export")
+async def export_tournaments(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    tournament_status: Optional[TournamentStatus] = Query(None, alias="status"),
+    current_user: User = Depends(get_current_user)
+):
+    """Потоковая выгрузка всех турниров в NDJSON или CSV"""
+    params = {}
+    where_clause = ""
+    if tournament_status:
+        where_clause = "WHERE t.status = :status"
+        params["status"] = tournament_status.value
+
+    return StreamingResponse(
+        stream_export(TOURNAMENTS_EXPORT_QUERY.format(where_clause=where_clause), params, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="tournaments.{export_format}"'}
+    )
+
 @router.post("/", response_model=TournamentResponse)
 async def create_tournament(
     tournament: TournamentCreate,
@@ -73,6 +96,7 @@ async def create_tournament(
                 description,
                 rules,
                 max_teams,
+                group_count,
                 start_date,
                 end_date,
                 created_by,
@@ -85,6 +109,7 @@ async def create_tournament(
                 :description,
                 :rules,
                 :max_teams,
+                :group_count,
                 :start_date,
                 :end_date,
                 :created_by,
@@ -100,6 +125,7 @@ async def create_tournament(
             "description": tournament.description,
             "rules": tournament.rules,
             "max_teams": tournament.max_teams,
+            "group_count": tournament.group_count,
             "start_date": tournament.start_date,
             "end_date": tournament.end_date,
             "created_by": current_user.id,
@@ -118,6 +144,8 @@ async def create_tournament(
             "description": created_tournament.description,
             "rules": created_tournament.rules,
             "max_teams": created_tournament.max_teams,
+            "registered_teams": created_tournament.current_teams,
+            "group_count": created_tournament.group_count,
             "start_date": created_tournament.start_date,
             "end_date": created_tournament.end_date,
             "created_by": created_tournament.created_by,
@@ -133,46 +161,23 @@ async def create_tournament(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{tournament_id}", response_model=TournamentResponse)
-async def get_tournament(tournament_id: int, db: AsyncSession = Depends(get_db)):
+async def get_tournament(
+    tournament_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Дешевая проверка версии до тяжелого запроса с вложенными json_agg
+    current = await queries.fetchrow(db, "tournament_version", {"tournament_id": tournament_id})
+    if not current:
+        raise HTTPException(status_code=404, detail="Турнир не найден")
+    etag = make_etag("tournament", tournament_id, current.version)
+    if is_not_modified(request, etag, current.updated_at):
+        return not_modified(etag, current.updated_at)
+    response.headers.update(validator_headers(etag, current.updated_at))
+
     try:
-        query = text("""
-            SELECT 
-                t.id,
-                t.name,
-                t.type,
-                t.description,
-                t.rules,
-                t.max_teams,
-                t.start_date,
-                t.end_date,
-                t.created_by,
-                t.created_at,
-                t.updated_at,
-                COALESCE(t.status, 'DRAFT') as status,
-                (
-                    SELECT json_agg(json_build_object(
-                        'id', teams.id,
-                        'name', teams.name,
-                        'members', (
-                            SELECT json_agg(json_build_object(
-                                'id', users.id,
-                                'username', users.username
-                            ))
-                            FROM users
-                            JOIN team_members ON users.id = team_members.user_id
-                            WHERE team_members.team_id = teams.id
-                        )
-                    ))
-                    FROM teams
-                    JOIN tournament_teams ON teams.id = tournament_teams.team_id
-                    WHERE tournament_teams.tournament_id = t.id
-                ) as teams
-            FROM tournaments t
-            WHERE t.id = :tournament_id
-        """)
-        
-        result = await db.execute(query, {"tournament_id": tournament_id})
-        tournament = result.fetchone()
+        tournament = await queries.fetchrow(db, "tournament_detail", {"tournament_id": tournament_id})
         
         if not tournament:
             raise HTTPException(status_code=404, detail="Турнир не найден")
@@ -184,6 +189,8 @@ async def get_tournament(tournament_id: int, db: AsyncSession = Depends(get_db))
             "description": tournament.description,
             "rules": tournament.rules,
             "max_teams": tournament.max_teams,
+            "registered_teams": tournament.registered_teams,
+            "group_count": tournament.group_count,
             "start_date": tournament.start_date,
             "end_date": tournament.end_date,
             "created_by": tournament.created_by,
@@ -197,6 +204,49 @@ async def get_tournament(tournament_id: int, db: AsyncSession = Depends(get_db))
         logger.error(f"Error getting tournament: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{tournament_id}/bracket")
+async def get_tournament_bracket(
+    tournament_id: int,
+    request: Request,
+    accept: str = Header("application/json"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Турнирная сетка из кэшированного снимка в JSON или столбцовом формате"""
+    bracket_service = BracketService(db)
+    current = await bracket_service.get_version(tournament_id)
+    snapshot = await bracket_service.get_bracket_snapshot(tournament_id, current.version)
+    # Снимок из кэша может быть новее отстающей реплики: валидаторы берем
+    # по версии отдаваемых данных, время изменения — только если версии совпали
+    last_modified = current.updated_at if snapshot.version == current.version else None
+    binary = BRACKET_BINARY_MEDIA_TYPE in accept
+    etag = make_etag("bracket", tournament_id, snapshot.version, "columnar" if binary else "json")
+    headers = {"X-Bracket-Version": str(snapshot.version), "Vary": "Accept"}
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified, headers)
+
+    headers.update(validator_headers(etag, last_modified))
+    if binary:
+        return Response(
+            content=snapshot.packed,
+            media_type=BRACKET_BINARY_MEDIA_TYPE,
+            headers=headers
+        )
+    return Response(
+        content=snapshot.payload,
+        media_type="application/json",
+        headers=headers
+    )
+
+@router.get("/{tournament_id}/standings", response_model=List[StandingResponse])
+async def get_tournament_standings(tournament_id: int, db: AsyncSession = Depends(get_read_db)):
+    """Турнирная таблица"""
+    return await StandingsService(db).get_standings(tournament_id)
+
+@router.get("/{tournament_id}/projections")
+async def get_tournament_projections(tournament_id: int, db: AsyncSession = Depends(get_db)):
+    """Вероятности выхода команд в каждый раунд и победы в турнире"""
+    return await ProjectionService(db).get_projections(tournament_id)
+
 @router.patch("/{tournament_id}", response_model=TournamentResponse)
 async def update_tournament(
     tournament_id: int, 
@@ -218,6 +268,7 @@ async def update_tournament(
                 description = :description,
                 rules = :rules,
                 max_teams = :max_teams,
+                group_count = :group_count,
                 start_date = :start_date,
                 end_date = :end_date,
                 updated_at = CURRENT_TIMESTAMP
@@ -229,6 +280,8 @@ async def update_tournament(
                 description,
                 rules,
                 max_teams,
+                current_teams,
+                group_count,
                 start_date,
                 end_date,
                 created_by,
@@ -243,6 +296,7 @@ async def update_tournament(
             "description": tournament.description,
             "rules": tournament.rules,
             "max_teams": tournament.max_teams,
+            "group_count": tournament.group_count,
             "start_date": tournament.start_date,
             "end_date": tournament.end_date,
         }
@@ -259,6 +313,8 @@ async def update_tournament(
             "description": updated_tournament.description,
             "rules": updated_tournament.rules,
             "max_teams": updated_tournament.max_teams,
+            "registered_teams": updated_tournament.current_teams,
+            "group_count": updated_tournament.group_count,
             "start_date": updated_tournament.start_date,
             "end_date": updated_tournament.end_date,
             "created_by": updated_tournament.created_by,
@@ -328,6 +384,12 @@ async def update_tournament_status(
             detail=f"Cannot change status from {tournament.status} to {new_status}"
         )
 
+    if new_status == TournamentStatus.IN_PROGRESS:
+        # Запуск турнира генерирует сетку и сам переводит статус
+        await TournamentService(db).start_tournament(tournament_id)
+        await db.refresh(tournament)
+        return tournament
+
     tournament.status = new_status
     await db.commit()
     await db.refresh(tournament)
@@ -341,104 +403,15 @@ async def join_tournament(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    try:
-        team_id = team_data.get("team_id")
-        if not team_id:
-            raise HTTPException(status_code=400, detail="Team ID is required")
-
-        # Проверяем существование турнира и его статус
-        tournament = await db.execute(
-            text("""
-                SELECT t.*, 
-                       (SELECT COUNT(*) FROM tournament_teams WHERE tournament_id = t.id) as current_teams
-                FROM tournaments t
-                WHERE t.id = :id
-            """),
-            {"id": tournament_id}
-        )
-        tournament = tournament.fetchone()
-        
-        logger.info(f"Tournament data: {tournament}")
-        
-        if not tournament:
-            raise HTTPException(status_code=404, detail="Tournament not found")
-
-        if tournament.status != "REGISTRATION":
-            raise HTTPException(
-                status_code=400,
-                detail="Tournament is not in registration phase"
-            )
-
-        if tournament.max_teams and tournament.current_teams >= tournament.max_teams:
-            raise HTTPException(
-                status_code=400,
-                detail="Tournament has reached maximum number of teams"
-            )
-
-        # Проверяем существование команды и права пользователя
-        team = await db.execute(
-            text("""
-                SELECT t.*, 
-                       CASE 
-                           WHEN t.captain_id = :user_id THEN true
-                           WHEN EXISTS (
-                               SELECT 1 FROM team_members 
-                               WHERE team_id = t.id AND user_id = :user_id
-                           ) THEN true
-                           ELSE false
-                       END as is_member
-                FROM teams t
-                WHERE t.id = :team_id
-            """),
-            {
-                "team_id": team_id,
-                "user_id": current_user.id
-            }
-        )
-        team = team.fetchone()
-        
-        logger.info(f"Team data: {team}")
-        logger.info(f"Current user ID: {current_user.id}")
-        logger.info(f"Team captain ID: {team.captain_id}")
-        
-        if not team:
-            raise HTTPException(status_code=404, detail="Team not found")
-
-        # Проверяем, является ли пользователь капитаном команды
-        if team.captain_id != current_user.id:
-            raise HTTPException(
-                status_code=403,
-                detail="Only team captain can register team for tournament"
-            )
-
-        # Проверяем, не участвует ли команда уже в турнире
-        existing = await db.execute(
-            text("""
-                SELECT 1 FROM tournament_teams 
-                WHERE tournament_id = :tournament_id AND team_id = :team_id
-            """),
-            {"tournament_id": tournament_id, "team_id": team_id}
-        )
-        if existing.fetchone():
-            raise HTTPException(
-                status_code=400, 
-                detail="Team is already registered for this tournament"
-            )
-
-        # Добавляем команду в турнир
-        await db.execute(
-            text("""
-                INSERT INTO tournament_teams (tournament_id, team_id)
-                VALUES (:tournament_id, :team_id)
-            """),
-            {"tournament_id": tournament_id, "team_id": team_id}
-        )
-        await db.commit()
-
-        return {"status": "success", "message": "Team successfully registered for tournament"}
+    """Регистрация команды; причина отказа передается в заголовке X-Registration-Error"""
+    team_id = team_data.get("team_id")
+    if not team_id:
+        raise HTTPException(status_code=400, detail="Team ID is required")
 
+    try:
+        service = TournamentService(db)
+        return await service.register_team(tournament_id, team_id, current_user.id)
     except HTTPException:
-        await db.rollback()
         raise
     except Exception as e:
         await db.rollback()
@@ -452,87 +425,66 @@ async def leave_tournament(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    try:
-        team_id = team_data.get("team_id")
-        if not team_id:
-            raise HTTPException(status_code=400, detail="Team ID is required")
-
-        # Проверяем существование турнира
-        tournament = await db.execute(
-            text("""
-                SELECT t.*, tt.team_id 
-                FROM tournaments t
-                LEFT JOIN tournament_teams tt ON tt.tournament_id = t.id
-                WHERE t.id = :id
-            """),
-            {"id": tournament_id}
-        )
-        tournament = tournament.fetchone()
-        if not tournament:
-            raise HTTPException(status_code=404, detail="Tournament not found")
-
-        # Проверяем существование команды и права пользователя
-        team = await db.execute(
-            text("""
-                SELECT t.*, 
-                       CASE 
-                           WHEN t.captain_id = :user_id THEN true
-                           WHEN EXISTS (
-                               SELECT 1 FROM team_members 
-                               WHERE team_id = t.id AND user_id = :user_id
-                           ) THEN true
-                           ELSE false
-                       END as is_member
-                FROM teams t
-                WHERE t.id = :team_id
-            """),
-            {
-                "team_id": team_id,
-                "user_id": current_user.id
-            }
-        )
-        team = team.fetchone()
-        
-        if not team:
-            raise HTTPException(status_code=404, detail="Team not found")
-
-        # Разрешаем выход из турнира как капитану, так и участникам команды
-        if not team.is_member:
-            raise HTTPException(
-                status_code=403,
-                detail="Only team members can remove team from tournament"
-            )
-
-        # Проверяем, участвует ли команда в турнире
-        existing = await db.execute(
-            text("""
-                SELECT 1 FROM tournament_teams 
-                WHERE tournament_id = :tournament_id AND team_id = :team_id
-            """),
-            {"tournament_id": tournament_id, "team_id": team_id}
-        )
-        if not existing.fetchone():
-            raise HTTPException(
-                status_code=404,
-                detail="Team is not registered for this tournament"
-            )
-
-        # Удаляем команду из турнира
-        await db.execute(
-            text("""
-                DELETE FROM tournament_teams 
-                WHERE tournament_id = :tournament_id AND team_id = :team_id
-            """),
-            {"tournament_id": tournament_id, "team_id": team_id}
-        )
-        await db.commit()
-
-        return {"status": "success", "message": "Team successfully left the tournament"}
+    team_id = team_data.get("team_id")
+    if not team_id:
+        raise HTTPException(status_code=400, detail="Team ID is required")
 
+    try:
+        service = TournamentService(db)
+        return await service.unregister_team(tournament_id, team_id, current_user.id)
     except HTTPException:
-        await db.rollback()
         raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Error leaving tournament: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/{tournament_id}/rounds")
+async def generate_next_round(
+    tournament_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Создать матчи следующего тура"""
+    if current_user.role not in [UserRole.ADMIN, UserRole.ORGANIZER]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and organizers can generate rounds"
+        )
+
+    round_number = await TournamentService(db).generate_next_round(tournament_id)
+    return {"status": "success", "round": round_number}
+
+@router.put("/{tournament_id}/seeds")
+async def set_tournament_seeds(
+    tournament_id: int,
+    seeds: List[TeamSeed],
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Ручной посев команд; команды без номера сеются по рейтингу"""
+    if current_user.role not in [UserRole.ADMIN, UserRole.ORGANIZER]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and organizers can seed teams"
+        )
+
+    await TournamentService(db).set_seeds(tournament_id, seeds)
+    return {"status": "success"}
+
+@router.post("/{tournament_id}/schedule")
+async def schedule_tournament(
+    tournament_id: int,
+    params: ScheduleParams,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Перестроить расписание несыгранных матчей"""
+    if current_user.role not in [UserRole.ADMIN, UserRole.ORGANIZER]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins and organizers can schedule matches"
+        )
+
+    schedule = await TournamentService(db).reschedule(tournament_id, params)
+    return {"status": "success", **schedule}
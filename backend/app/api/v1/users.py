@@ -1,11 +1,13 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import List
+from typing import List, Optional
 from app.db.session import get_db
 from app.schemas.user import UserCreate, UserResponse, UserUpdate, UserRoleUpdate
-from app.core.security import get_current_user, get_password_hash
+from app.core.security import get_current_user, invalidate_principal
+from app.core.hashing import hash_password
+from app.core.pagination import keyset_filter, keyset_page
 from app.models.user import User, UserRole
 
 logging.basicConfig(level=logging.INFO)
@@ -15,8 +17,9 @@ router = APIRouter()
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
-    skip: int = 0,
-    limit: int = 10,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -24,15 +27,19 @@ async def get_users(
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     
-    query = text("""
+    after_cursor, params = keyset_filter(cursor, "created_at", "id")
+    where_clause = f"WHERE {after_cursor}" if after_cursor else ""
+    query = text(f"""
         SELECT id, username, email, role, created_at, updated_at
         FROM users
-        ORDER BY created_at DESC
-        LIMIT :limit OFFSET :skip
+        {where_clause}
+        ORDER BY created_at DESC, id DESC
+        LIMIT :limit
     """)
-    
-    result = await db.execute(query, {"limit": limit, "skip": skip})
-    return result.fetchall()
+
+    result = await db.execute(query, {**params, "limit": limit + 1})
+    users, _ = keyset_page(result.fetchall(), limit, "created_at", response)
+    return users
 
 @router.post("/", response_model=UserResponse)
 async def create_user(
@@ -43,7 +50,7 @@ async def create_user(
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Недостаточно прав")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     
     query = text("""
         INSERT INTO users (username, email, hashed_password, role, is_active)
@@ -108,7 +115,7 @@ async def update_user(
     
     update_data = user_update.dict(exclude_unset=True)
     if "password" in update_data:
-        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
+        update_data["hashed_password"] = await hash_password(update_data.pop("password"))
     
     set_values = ", ".join(f"{k} = :{k}" for k in update_data.keys())
     
@@ -122,6 +129,7 @@ async def update_user(
     try:
         result = await db.execute(query, {**update_data, "user_id": user_id})
         await db.commit()
+        invalidate_principal(user_id)
         updated_user = result.fetchone()
         if not updated_user:
             raise HTTPException(status_code=404, detail="Пользователь не найден")
@@ -153,6 +161,7 @@ async def delete_user(
     try:
         result = await db.execute(query, {"user_id": user_id})
         await db.commit()
+        invalidate_principal(user_id)
         if result.rowcount == 0:
             raise HTTPException(status_code=404, detail="Пользователь не найден")
     except Exception as e:
@@ -187,6 +196,7 @@ async def update_user_role(
             }
         )
         await db.commit()
+        invalidate_principal(user_id)
         updated_user = result.fetchone()
         if not updated_user:
             raise HTTPException(status_code=404, detail="Пользователь не найден")
@@ -17,6 +17,50 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "tournament_db"
 
+    # Подключение к базе: пул на процесс (pool_size + max_overflow соединений
+    # на воркер), проверка соединения перед выдачей, кэш подготовленных
+    # запросов asyncpg на соединение; SQL логируется только при DB_ECHO
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500
+
+    # Реплика для чтения (полный DSN postgresql+asyncpg://...); после записи
+    # клиент столько секунд читает с основного сервера
+    DATABASE_REPLICA_URL: Optional[str] = None
+    REPLICA_STICKY_SECONDS: int = 10
+
+    # Кэш пользователей для проверки токена: размер и время жизни записи
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL: float = 60.0
+
+    # Хеширование паролей: процессы пула и предел очереди, после которого 503
+    HASH_WORKERS: int = 2
+    HASH_QUEUE_LIMIT: int = 64
+
+    # Количество турнирных сеток в кэше процесса
+    BRACKET_CACHE_SIZE: int = 256
+
+    # Прогнозы турниров: число симуляций и процессов для расчета
+    PROJECTION_SIMULATIONS: int = 100_000
+    PROJECTION_WORKERS: int = 2
+
+    # Рейтинг Эло: начальное значение, коэффициент K и размер порции при пересчете
+    RATING_INITIAL: float = 1500.0
+    RATING_K_FACTOR: float = 32.0
+    RATING_RECOMPUTE_BATCH: int = 50_000
+
+    # Расписание по умолчанию: площадки, длительность матча и отдых команд
+    SCHEDULE_SLOTS: int = 16
+    MATCH_DURATION_MINUTES: int = 45
+    MATCH_REST_MINUTES: int = 15
+
+    # Размер порции строк при потоковой выгрузке
+    EXPORT_BATCH_SIZE: int = 5000
+
     @property
     def DATABASE_URL(self) -> str:
         """Формируем URL для подключения к базе данных"""
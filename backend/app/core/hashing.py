@@ -0,0 +1,105 @@
+"""Хеширование паролей вне цикла событий.
+
+bcrypt занимает процессор на 100–300 мс, поэтому хеширование и проверка
+выполняются в отдельном пуле процессов. Число ожидающих задач ограничено
+HASH_QUEUE_LIMIT: при переполнении запрос сразу получает 503 и не держит
+соединение, пока очередь разбирается.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Задачи, отправленные в пул и еще не завершенные
+_pending = 0
+_rejected = 0
+hash_latency = Histogram()
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.HASH_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Остановка пула процессов при завершении приложения"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _run(func, *args):
+    global _pending, _rejected
+    if _pending >= settings.HASH_QUEUE_LIMIT:
+        _rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Сервер перегружен, повторите попытку позже",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_executor(), func, *args)
+    finally:
+        _pending -= 1
+        hash_latency.observe(time.perf_counter() - started)
+
+
+async def hash_password(password: str) -> str:
+    """Хеш пароля"""
+    try:
+        return await _run(_hash, password)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при хешировании пароля: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Ошибка при обработке пароля"
+        )
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    """Проверка пароля по хешу"""
+    try:
+        return await _run(_verify, plain_password, hashed_password)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ошибка при проверке пароля: {e}")
+        return False
+
+
+def hashing_status() -> dict:
+    """Глубина очереди, отказы и время хеширования с ожиданием в очереди"""
+    return {
+        "workers": settings.HASH_WORKERS,
+        "queue_depth": _pending,
+        "queue_limit": settings.HASH_QUEUE_LIMIT,
+        "rejected": _rejected,
+        "latency": hash_latency.snapshot(),
+    }
@@ -0,0 +1,47 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+# Границы интервалов по умолчанию, в секундах
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Гистограмма длительностей с фиксированными интервалами
+
+    Наблюдение — двоичный поиск интервала и инкремент счетчика, поэтому ее
+    можно вызывать на каждом захвате соединения.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> Dict:
+        """Накопленные значения (le — верхняя граница интервала включительно)"""
+        with self._lock:
+            counts = list(self._counts)
+            total, maximum = self._sum, self._max
+        count = sum(counts)
+        cumulative = 0
+        buckets = []
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            buckets.append({"le": bound if bound != float("inf") else "+Inf", "count": cumulative})
+        return {
+            "count": count,
+            "sum": total,
+            "mean": total / count if count else 0.0,
+            "max": maximum,
+            "buckets": buckets,
+        }
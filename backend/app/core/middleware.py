@@ -4,6 +4,9 @@ import logging
 from typing import Callable
 import json
 
+from app.core.config import settings
+from app.db.session import RECENT_WRITE_COOKIE
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -26,4 +29,19 @@ async def logging_middleware(request: Request, call_next: Callable):
     else:
         logger.info(json.dumps(log_dict))
     
-    return response
\ No newline at end of file
+    return response
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+async def recent_write_middleware(request: Request, call_next: Callable):
+    """Отметка клиента, выполнившего запись, для чтения с основного сервера"""
+    response = await call_next(request)
+    if request.method not in SAFE_METHODS and response.status_code < 400:
+        response.set_cookie(
+            RECENT_WRITE_COOKIE,
+            "1",
+            max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
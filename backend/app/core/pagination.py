@@ -0,0 +1,59 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+# Заголовок, в котором клиент получает курсор следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(moment: datetime, row_id: int) -> str:
+    """Непрозрачный курсор по ключу сортировки (время, id)"""
+    raw = json.dumps([moment.isoformat() if moment else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Ключ последней строки предыдущей страницы"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        moment, row_id = json.loads(raw)
+        return datetime.fromisoformat(moment), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+
+def keyset_filter(
+    cursor: Optional[str], time_column: str, id_column: str
+) -> Tuple[Optional[str], dict]:
+    """Условие «строки после курсора» для сортировки (время, id) по убыванию
+
+    Условие добавляется в запрос только при наличии курсора, чтобы первая
+    и последующие страницы читались одним диапазоном составного индекса.
+    """
+    key = decode_cursor(cursor)
+    if key is None:
+        return None, {}
+    return (
+        f"({time_column}, {id_column}) < (:cursor_time, :cursor_id)",
+        {"cursor_time": key[0], "cursor_id": key[1]},
+    )
+
+
+def keyset_page(
+    rows: Sequence[Any], limit: int, time_field: str, response: Optional[Response] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """Строки страницы и курсор следующей; курсор также пишется в заголовок"""
+    rows = list(rows)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, time_field), last.id)
+        if response is not None:
+            response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows, next_cursor
@@ -2,13 +2,14 @@ import logging
 from datetime import datetime, timedelta
 from typing import Any, Union
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
 from app.db.session import get_db
+from app.db.queries import queries
 from app.core.config import settings
+from app.core.cache import LRUCache
+from app.core.hashing import pwd_context
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,11 +18,19 @@ logger = logging.getLogger(__name__)
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Пользователи, прошедшие проверку токена: id, имя и роль по id. Изменения
+# пользователя сбрасывают запись в этом процессе, в остальных воркерах она
+# устаревает не позже чем через PRINCIPAL_CACHE_TTL секунд
+principal_cache = LRUCache(settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+def invalidate_principal(user_id: int) -> None:
+    """Сброс закэшированного пользователя после изменения его данных"""
+    principal_cache.pop(user_id)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Проверка пароля"""
+    """Проверка пароля; в обработчиках запросов — hashing.check_password"""
     try:
         return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
@@ -29,7 +38,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 def get_password_hash(password: str) -> str:
-    """Получе��ие хеша пароля"""
+    """Получение хеша пароля; в обработчиках запросов — hashing.hash_password"""
     try:
         return pwd_context.hash(password)
     except Exception as e:
@@ -63,7 +72,7 @@ async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
 ):
-    """Получение текущего пользователя из токена"""
+    """Получение текущего пользователя из токена (из кэша, если он там есть)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Не удалось проверить учетные данные",
@@ -71,40 +80,27 @@ async def get_current_user(
     )
     
     try:
-        logger.info("Декодируем токен...")
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        logger.info(f"ID пользователя из токена: {user_id}")
-        
-        if user_id is None:
-            logger.error("ID пользователя отсутствует в токене")
-            raise credentials_exception
-            
-        # Преобразуем строку в число
-        user_id = int(user_id)
-    except JWTError:
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
         raise credentials_exception
-    
-    query = text("""
-        SELECT id, username, role
-        FROM users
-        WHERE id = :user_id
-    """)
-    
-    try:
-        logger.info(f"Выполняем запрос для получения пользователя с ID {user_id}")
-        result = await db.execute(query, {"user_id": user_id})
-        user = result.fetchone()
-        
-        if user is None:
-            logger.error(f"Пользователь с ID {user_id} не найден")
-            raise credentials_exception
-            
-        logger.info(f"Пользователь найден: {user}")
+
+    user = principal_cache.get(user_id)
+    if user is not None:
         return user
+
+    try:
+        user = await queries.fetchrow(db, "user_by_id", {"user_id": user_id})
     except Exception as e:
         logger.error(f"Ошибка при получении пользователя: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка базы данных: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+    if user is None:
+        logger.warning(f"Пользователь с ID {user_id} не найден")
+        raise credentials_exception
+
+    principal_cache.set(user_id, user)
+    return user
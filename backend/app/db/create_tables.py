@@ -5,6 +5,13 @@ from app.models.user import User, UserRole
 from app.models.team import Team
 from app.models.team_member import TeamMember
 
+# Изменение состава команды меняет ответы по ее турнирам
+TEAM_MEMBER_EVENTS = {
+    'insert': ('INSERT', 'NEW TABLE AS new_rows'),
+    'update': ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+    'delete': ('DELETE', 'OLD TABLE AS old_rows'),
+}
+
 async def create_tables(engine: AsyncEngine):
     async with engine.begin() as conn:
         # Создаем тип enum для ролей пользователей
@@ -19,4 +26,26 @@ async def create_tables(engine: AsyncEngine):
         """))
         
         # Создаем таблицы
-        await conn.run_sync(Base.metadata.create_all) 
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+
+        # team_members создается здесь, а не в init.sql: триггеры версии турнира
+        # ставим после таблицы, если схема из init.sql их функцию уже создала
+        for suffix, (event, referencing) in TEAM_MEMBER_EVENTS.items():
+            await conn.execute(text(f"""
+                DO $$
+                BEGIN
+                    IF EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'touch_team_tournaments')
+                    AND NOT EXISTS (
+                        SELECT 1 FROM pg_trigger
+                        WHERE tgrelid = to_regclass('team_members')
+                        AND tgname = 'team_members_touch_tournaments_{suffix}'
+                    ) THEN
+                        CREATE TRIGGER team_members_touch_tournaments_{suffix}
+                            AFTER {event} ON team_members
+                            REFERENCING {referencing}
+                            FOR EACH STATEMENT
+                            EXECUTE FUNCTION touch_team_tournaments();
+                    END IF;
+                END
+                $$;
+            """))
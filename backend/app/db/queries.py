@@ -0,0 +1,272 @@
+"""Реестр часто выполняемых запросов.
+
+Запросы регистрируются один раз при импорте: параметры вида :name
+переводятся в позиционные $n, и дальше текст запроса не меняется. На каждом
+соединении пула запрос готовится (prepare) при первом вызове и затем
+выполняется как подготовленный оператор asyncpg, минуя компиляцию SQLAlchemy.
+Строки возвращаются кортежами с доступом к полям по имени. Для каждого
+запроса считаются вызовы и суммарное время выполнения.
+"""
+import re
+import time
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from asyncpg.exceptions import InvalidCachedStatementError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Ключ словаря подготовленных запросов в info соединения пула
+PREPARED_KEY = "prepared_queries"
+
+_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+def to_positional(sql: str) -> Tuple[str, List[str]]:
+    """Текст с $n вместо :name и порядок имен параметров"""
+    names: List[str] = []
+
+    def replace(match) -> str:
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    return _PARAM.sub(replace, sql), names
+
+
+class PreparedQuery:
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql, self.params = to_positional(sql)
+        # Типы строк по набору столбцов: после миграции он может измениться
+        self.row_types: Dict[Tuple[str, ...], type] = {}
+        self.calls = 0
+        self.total_time = 0.0
+
+    def args(self, params: Dict[str, Any]) -> List[Any]:
+        return [params[name] for name in self.params]
+
+    def row_type(self, statement) -> type:
+        """Тип строки по столбцам подготовленного оператора"""
+        fields = tuple(attribute.name for attribute in statement.get_attributes())
+        row_type = self.row_types.get(fields)
+        if row_type is None:
+            row_type = namedtuple(self.name, fields, rename=True)
+            self.row_types[fields] = row_type
+        return row_type
+
+
+class QueryRegistry:
+    def __init__(self):
+        self._queries: Dict[str, PreparedQuery] = {}
+
+    def register(self, name: str, sql: str) -> PreparedQuery:
+        if name in self._queries:
+            raise ValueError(f"Запрос {name} уже зарегистрирован")
+        query = PreparedQuery(name, sql)
+        self._queries[name] = query
+        return query
+
+    def __getitem__(self, name: str) -> PreparedQuery:
+        return self._queries[name]
+
+    async def _connection(self, db: AsyncSession):
+        return await (await db.connection()).get_raw_connection()
+
+    async def _statement(self, connection, query: PreparedQuery, refresh: bool = False):
+        """Подготовленный оператор запроса и тип его строк на соединении"""
+        prepared = connection.info.setdefault(PREPARED_KEY, {})
+        entry = None if refresh else prepared.get(query.name)
+        if entry is None:
+            statement = await connection.driver_connection.prepare(query.sql)
+            entry = prepared[query.name] = (statement, query.row_type(statement))
+        return entry
+
+    async def fetch(self, db: AsyncSession, name: str, params: Optional[Dict[str, Any]] = None) -> List[tuple]:
+        """Все строки результата"""
+        query = self._queries[name]
+        args = query.args(params or {})
+        started = time.perf_counter()
+        connection = await self._connection(db)
+        statement, row_type = await self._statement(connection, query)
+        try:
+            records = await statement.fetch(*args)
+        except InvalidCachedStatementError:
+            # После изменения схемы оператор нужно подготовить заново. Ошибка
+            # прерывает открытую транзакцию, и повтор в ней невозможен: тогда
+            # только сбрасываем оператор, следующий вызов подготовит новый
+            if connection.driver_connection.is_in_transaction():
+                connection.info[PREPARED_KEY].pop(query.name, None)
+                raise
+            statement, row_type = await self._statement(connection, query, refresh=True)
+            records = await statement.fetch(*args)
+        query.calls += 1
+        query.total_time += time.perf_counter() - started
+        return [row_type(*record) for record in records]
+
+    async def fetchrow(self, db: AsyncSession, name: str, params: Optional[Dict[str, Any]] = None) -> Optional[tuple]:
+        """Первая строка результата или None"""
+        rows = await self.fetch(db, name, params)
+        return rows[0] if rows else None
+
+    def stats(self) -> List[Dict]:
+        """Число вызовов и время по каждому запросу, самые затратные первыми"""
+        return sorted(
+            (
+                {
+                    "name": query.name,
+                    "calls": query.calls,
+                    "total_time": query.total_time,
+                    "mean_time": query.total_time / query.calls if query.calls else 0.0,
+                }
+                for query in self._queries.values()
+            ),
+            key=lambda item: item["total_time"],
+            reverse=True,
+        )
+
+
+queries = QueryRegistry()
+
+# Пользователи и вход
+queries.register("user_by_id", """
+    SELECT id, username, role
+    FROM users
+    WHERE id = :user_id
+""")
+queries.register("user_login", """
+    SELECT id, username, hashed_password, role
+    FROM users
+    WHERE username = :username
+""")
+
+# Турниры
+TOURNAMENTS_PAGE = """
+    SELECT
+        t.id,
+        t.name,
+        t.type,
+        t.description,
+        t.rules,
+        t.max_teams,
+        t.current_teams AS registered_teams,
+        t.group_count,
+        t.start_date,
+        t.end_date,
+        t.created_by,
+        t.created_at,
+        t.updated_at,
+        COALESCE(t.status, 'DRAFT') as status
+    FROM tournaments t
+    {where_clause}
+    ORDER BY t.created_at DESC, t.id DESC
+    LIMIT :limit
+"""
+queries.register("tournaments_page", TOURNAMENTS_PAGE.format(where_clause=""))
+queries.register("tournaments_page_after", TOURNAMENTS_PAGE.format(
+    where_clause="WHERE (t.created_at, t.id) < (:cursor_time, :cursor_id)"
+))
+queries.register("tournament_detail", """
+    SELECT
+        t.id,
+        t.name,
+        t.type,
+        t.description,
+        t.rules,
+        t.max_teams,
+        t.current_teams AS registered_teams,
+        t.group_count,
+        t.start_date,
+        t.end_date,
+        t.created_by,
+        t.created_at,
+        t.updated_at,
+        COALESCE(t.status, 'DRAFT') as status,
+        (
+            SELECT json_agg(json_build_object(
+                'id', teams.id,
+                'name', teams.name,
+                'members', (
+                    SELECT json_agg(json_build_object(
+                        'id', users.id,
+                        'username', users.username
+                    ))
+                    FROM users
+                    JOIN team_members ON users.id = team_members.user_id
+                    WHERE team_members.team_id = teams.id
+                )
+            ))
+            FROM teams
+            JOIN tournament_teams ON teams.id = tournament_teams.team_id
+            WHERE tournament_teams.tournament_id = t.id
+        ) as teams
+    FROM tournaments t
+    WHERE t.id = :tournament_id
+""")
+queries.register("tournament_version", """
+    SELECT version, updated_at FROM tournaments WHERE id = :tournament_id
+""")
+queries.register("tournament_type", """
+    SELECT type FROM tournaments WHERE id = :tournament_id
+""")
+queries.register("tournament_standings", """
+    SELECT
+        s.team_id,
+        t.name as team_name,
+        tt.group_number,
+        tt.seed,
+        s.played,
+        s.wins,
+        s.losses,
+        s.points,
+        s.score_for,
+        s.score_against,
+        s.score_for - s.score_against as score_difference
+    FROM standings s
+    JOIN teams t ON t.id = s.team_id
+    LEFT JOIN tournament_teams tt
+        ON tt.tournament_id = s.tournament_id AND tt.team_id = s.team_id
+    WHERE s.tournament_id = :tournament_id
+    ORDER BY tt.group_number NULLS FIRST, s.points DESC,
+             score_difference DESC, s.wins DESC, t.name
+""")
+
+# Матчи; в матчах сетки команды еще не определены (NULL), отсюда LEFT JOIN
+MATCHES_SELECT = """
+    SELECT
+        m.*,
+        t.name as tournament_name,
+        t1.name as team1_name,
+        t2.name as team2_name,
+        w.name as winner_name
+    FROM matches m
+    JOIN tournaments t ON m.tournament_id = t.id
+    LEFT JOIN teams t1 ON m.team1_id = t1.id
+    LEFT JOIN teams t2 ON m.team2_id = t2.id
+    LEFT JOIN teams w ON m.winner_id = w.id
+"""
+MATCHES_PAGE = MATCHES_SELECT + """
+    {where_clause}
+    ORDER BY m.start_time DESC, m.id DESC
+    LIMIT :limit
+"""
+MATCHES_AFTER_CURSOR = "(m.start_time, m.id) < (:cursor_time, :cursor_id)"
+queries.register("matches_page", MATCHES_PAGE.format(where_clause=""))
+queries.register("matches_page_after", MATCHES_PAGE.format(
+    where_clause=f"WHERE {MATCHES_AFTER_CURSOR}"
+))
+queries.register("tournament_matches_page", MATCHES_PAGE.format(
+    where_clause="WHERE m.tournament_id = :tournament_id"
+))
+queries.register("tournament_matches_page_after", MATCHES_PAGE.format(
+    where_clause=f"WHERE m.tournament_id = :tournament_id AND {MATCHES_AFTER_CURSOR}"
+))
+queries.register("match_version", """
+    SELECT m.tournament_id, t.version, t.updated_at
+    FROM matches m
+    JOIN tournaments t ON t.id = m.tournament_id
+    WHERE m.id = :match_id
+""")
+queries.register("match_detail", MATCHES_SELECT + """
+    WHERE m.id = :match_id
+""")
@@ -1,12 +1,108 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import time
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import Histogram
+
+# Cookie, с которым клиент после своей записи читает с основного сервера
+RECENT_WRITE_COOKIE = "recent_write"
+
+
+class PoolMetrics:
+    """Ожидание свободного соединения, время его удержания запросом и отказы"""
+
+    def __init__(self):
+        self.wait_time = Histogram()
+        self.hold_time = Histogram()
+        self.timeouts = 0
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, измеряющий время ожидания соединения"""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.wait_time.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    new_engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        future=True,
+        poolclass=MeteredQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    metrics = PoolMetrics()
+    new_engine.sync_engine.pool.metrics = metrics
+
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            metrics.hold_time.observe(time.perf_counter() - started)
+
+    event.listen(new_engine.sync_engine, "checkout", _on_checkout)
+    event.listen(new_engine.sync_engine, "checkin", on_checkin)
+    return new_engine
+
+
+engine = _create_engine(settings.DATABASE_URL)
+# Реплика только для чтения; без нее чтение идет через основной пул
+replica_engine = _create_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+
+
+def _pool_status(target: AsyncEngine) -> dict:
+    pool = target.sync_engine.pool
+    metrics = pool.metrics or PoolMetrics()
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout": settings.DB_POOL_TIMEOUT,
+        "timeouts": metrics.timeouts,
+        "wait_time": metrics.wait_time.snapshot(),
+        "hold_time": metrics.hold_time.snapshot(),
+    }
+
+
+def pool_status() -> dict:
+    """Текущее состояние пулов и накопленные гистограммы"""
+    return {
+        **_pool_status(engine),
+        "replica": _pool_status(replica_engine) if replica_engine else None,
+    }
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=True,
-    future=True
-)
 
 SessionLocal = sessionmaker(
     engine,
@@ -16,9 +112,31 @@ SessionLocal = sessionmaker(
     autoflush=False,
 )
 
+ReadSessionLocal = sessionmaker(
+    replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+) if replica_engine else SessionLocal
+
 async def get_db():
     async with SessionLocal() as session:
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+async def get_read_db(request: Request):
+    """Сессия для эндпоинтов только на чтение
+
+    Идет на реплику, кроме запросов клиента, недавно выполнившего запись
+    (cookie RECENT_WRITE_COOKIE): они читают с основного сервера, чтобы
+    увидеть свои изменения несмотря на отставание реплики.
+    """
+    factory = SessionLocal if request.cookies.get(RECENT_WRITE_COOKIE) else ReadSessionLocal
+    async with factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -4,6 +4,12 @@ from app.api.v1 import api_router
 from app.db.session import engine
 from app.db.create_tables import create_tables
 from app.db.init_db import init_db
+from app.services.projections import shutdown_executor
+from app.core.hashing import shutdown_executor as shutdown_hashing
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.core.middleware import recent_write_middleware
+from app.services.tournament import REGISTRATION_ERROR_HEADER
 import asyncio
 
 app = FastAPI()
@@ -15,8 +21,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "X-Bracket-Version", REGISTRATION_ERROR_HEADER],
 )
 
+# Чтение после собственной записи идет мимо реплики
+if settings.DATABASE_REPLICA_URL:
+    app.middleware("http")(recent_write_middleware)
+
 app.include_router(api_router, prefix="/api/v1")
 
 @app.on_event("startup")
@@ -29,6 +40,11 @@ async def startup_event():
     async with SessionLocal() as session:
         await init_db(session)
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    shutdown_executor()
+    shutdown_hashing()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
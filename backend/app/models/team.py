@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 from datetime import datetime
@@ -13,6 +13,7 @@ class Team(Base):
     description = Column(String, nullable=True)
     logo_url = Column(String, nullable=True)
     captain_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    rating = Column(Float, nullable=False, default=1500.0, server_default="1500")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
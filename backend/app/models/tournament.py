@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Enum
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, ForeignKey, Table, Enum
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 from datetime import datetime
@@ -17,15 +17,21 @@ class Tournament(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(String, nullable=True)
-    type = Column(String)  # single_elimination, double_elimination, round_robin
+    type = Column(String)  # single_elimination, double_elimination, round_robin, swiss
     rules = Column(String, nullable=True)
     max_teams = Column(Integer, nullable=True)
+    # Число зарегистрированных команд, меняется вместе с tournament_teams
+    current_teams = Column(Integer, nullable=False, default=0, server_default="0")
+    group_count = Column(Integer, nullable=False, default=1)
     start_date = Column(DateTime, nullable=True)
     end_date = Column(DateTime, nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     status = Column(Enum(TournamentStatus), default=TournamentStatus.REGISTRATION)
+    # Счетчик изменений турнира и связанных данных, ведется триггерами
+    version = Column(BigInteger, nullable=False, default=1, server_default="1")
+    version_xid = Column(BigInteger, nullable=True)
 
     teams = relationship(
         "Team",
@@ -7,5 +7,7 @@ tournament_teams = Table(
     Base.metadata,
     Column('tournament_id', Integer, ForeignKey('tournaments.id', ondelete='CASCADE'), primary_key=True),
     Column('team_id', Integer, ForeignKey('teams.id', ondelete='CASCADE'), primary_key=True),
-    Column('joined_at', DateTime, server_default=func.now())
+    Column('joined_at', DateTime, server_default=func.now()),
+    Column('group_number', Integer, nullable=True),
+    Column('seed', Integer, nullable=True)
 ) 
\ No newline at end of file
@@ -7,6 +7,11 @@ class BracketBase(BaseModel):
     match_id: int
     round: int
     position: int
+    bracket_type: str = "winners"
+    next_match_id: Optional[int] = None
+    next_slot: Optional[int] = Field(None, ge=1, le=2)
+    loser_next_match_id: Optional[int] = None
+    loser_next_slot: Optional[int] = Field(None, ge=1, le=2)
 
 class BracketCreate(BracketBase):
     pass
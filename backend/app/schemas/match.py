@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 class MatchStatus(str, Enum):
@@ -31,9 +31,26 @@ class MatchResult(BaseModel):
     score_team1: int = Field(..., ge=0)
     score_team2: int = Field(..., ge=0)
 
+class MatchResultItem(MatchResult):
+    """Результат матча в пакетном запросе"""
+    match_id: int
+
+class MatchResultBatch(BaseModel):
+    """Пакет результатов матчей"""
+    results: List[MatchResultItem] = Field(..., min_length=1, max_length=1000)
+
+class MatchResultStatus(BaseModel):
+    """Итог обработки одного результата из пакета"""
+    match_id: int
+    success: bool
+    detail: Optional[str] = None
+
 class Match(MatchBase):
     """Полная схема матча"""
     id: int
+    # Матч сетки ждет победителей предыдущих матчей
+    team1_id: Optional[int] = None
+    team2_id: Optional[int] = None
     status: MatchStatus
     score_team1: Optional[int] = None
     score_team2: Optional[int] = None
@@ -44,8 +61,13 @@ class Match(MatchBase):
     team2_name: Optional[str] = None
     winner_name: Optional[str] = None
     notes: Optional[str] = None
-    created_at: datetime
-    updated_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+
+class MatchPage(BaseModel):
+    """Страница списка матчей; next_cursor — курсор следующей страницы или None"""
+    items: List[Match]
+    next_cursor: Optional[str] = None
+
@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+
+class StandingResponse(BaseModel):
+    team_id: int
+    team_name: str
+    group_number: Optional[int] = None
+    rank: int
+    played: int
+    wins: int
+    losses: int
+    points: int
+    score_for: int
+    score_against: int
+    score_difference: int
+
+    class Config:
+        from_attributes = True
@@ -15,6 +15,7 @@ class TeamResponse(BaseModel):
     name: str
     description: Optional[str] = None
     captain_id: Optional[int] = None
+    rating: float = 1500.0
     members: List[UserResponse]
 
     class Config:
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 from app.models.tournament import TournamentStatus
@@ -9,6 +9,7 @@ class TournamentBase(BaseModel):
     type: str
     rules: Optional[str] = None
     max_teams: Optional[int] = None
+    group_count: int = Field(1, ge=1)
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
 
@@ -21,6 +22,7 @@ class TournamentUpdate(BaseModel):
     type: Optional[str] = None
     rules: Optional[str] = None
     max_teams: Optional[int] = None
+    group_count: Optional[int] = Field(None, ge=1)
     start_date: Optional[datetime] = None
     end_date: Optional[datetime] = None
     status: Optional[TournamentStatus] = None
@@ -31,6 +33,8 @@ class TournamentResponse(TournamentBase):
     created_at: datetime
     updated_at: datetime
     status: TournamentStatus
+    # Строки tournaments и модель дают счетчик под именем current_teams
+    registered_teams: int = Field(0, validation_alias=AliasChoices("registered_teams", "current_teams"))
     teams: List[dict] = []
     matches: List[dict] = []
 
@@ -38,4 +42,16 @@ class TournamentResponse(TournamentBase):
         from_attributes = True 
 
 class TournamentStatusUpdate(BaseModel):
-    status: TournamentStatus
\ No newline at end of file
+    status: TournamentStatus
+
+class ScheduleParams(BaseModel):
+    """Параметры расписания; незаданные берутся из настроек"""
+    slots: Optional[int] = Field(None, ge=1)
+    match_minutes: Optional[int] = Field(None, ge=1)
+    rest_minutes: Optional[int] = Field(None, ge=0)
+    start_time: Optional[datetime] = None
+
+
+class TeamSeed(BaseModel):
+    team_id: int
+    seed: Optional[int] = Field(None, ge=1)
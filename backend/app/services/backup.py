@@ -1,12 +1,14 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from fastapi import HTTPException
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import subprocess
 import os
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.pagination import keyset_filter, keyset_page
+from app.core.security import principal_cache
 
 class BackupService:
     def __init__(self, db: AsyncSession):
@@ -109,6 +111,9 @@ class BackupService:
             if process.returncode != 0:
                 raise Exception(f"Ошибка при восстановлении: {process.stderr}")
 
+            # Пользователи и роли могли измениться вместе с базой
+            principal_cache.clear()
+
             # Обновляем информацию о восстановлении
             query = text("""
                 UPDATE backup
@@ -136,9 +141,13 @@ class BackupService:
                 detail=f"Ошибка восстановления из бэкапа: {str(e)}"
             )
 
-    async def get_backups(self, skip: int = 0, limit: int = 10) -> List[dict]:
-        """Получение списка резервных копий"""
-        query = text("""
+    async def get_backups(
+        self, cursor: Optional[str] = None, limit: int = 10
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Страница списка резервных копий и курсор следующей"""
+        after_cursor, params = keyset_filter(cursor, "b.created_at", "b.id")
+        where_clause = f"WHERE {after_cursor}" if after_cursor else ""
+        query = text(f"""
             SELECT 
                 b.*,
                 c.username as created_by_username,
@@ -146,12 +155,13 @@ class BackupService:
             FROM backup b
             LEFT JOIN users c ON b.created_by = c.id
             LEFT JOIN users r ON b.restored_by = r.id
-            ORDER BY b.created_at DESC
-            LIMIT :limit OFFSET :skip
+            {where_clause}
+            ORDER BY b.created_at DESC, b.id DESC
+            LIMIT :limit
         """)
-        
-        result = await self.db.execute(query, {"limit": limit, "skip": skip})
-        return result.fetchall()
+
+        result = await self.db.execute(query, {**params, "limit": limit + 1})
+        return keyset_page(result.fetchall(), limit, "created_at")
 
     async def delete_backup(self, backup_id: int) -> None:
         """Удаление резервной копии"""
@@ -1,7 +1,139 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from fastapi import HTTPException
-from typing import List, Dict
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+import json
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.queries import queries
+from app.services.bracket_generator import BracketPlan, BRACKET_TYPES
+from app.services.bracket_wire import pack_bracket
+
+BRACKET_COLUMNS = """
+    b.match_id,
+    b.bracket_type,
+    b.round,
+    b.position,
+    b.next_match_id,
+    b.next_slot,
+    b.loser_next_match_id,
+    b.loser_next_slot,
+    m.team1_id,
+    m.team2_id,
+    m.score_team1,
+    m.score_team2,
+    m.winner_id,
+    m.status,
+    m.start_time,
+    t1.name as team1_name,
+    t2.name as team2_name,
+    t1.rating as team1_rating,
+    t2.rating as team2_rating,
+    w.name as winner_name
+"""
+
+BRACKET_JOINS = """
+    FROM bracket b
+    JOIN matches m ON b.match_id = m.id
+    LEFT JOIN teams t1 ON m.team1_id = t1.id
+    LEFT JOIN teams t2 ON m.team2_id = t2.id
+    LEFT JOIN teams w ON m.winner_id = w.id
+"""
+
+class BracketSnapshot:
+    """Строки сетки турнира с версией турнира (tournaments.version) и готовыми ответами"""
+
+    def __init__(self, tournament_id: int, rows: Iterable, version: int) -> None:
+        self.tournament_id = tournament_id
+        # Строки запроса BRACKET_COLUMNS по id матча
+        self.matches: Dict[int, Any] = {}
+        self.rounds: Dict[tuple, List[int]] = {}
+        for row in rows:
+            self.matches[row.match_id] = row
+            self.rounds.setdefault((row.bracket_type, row.round), []).append(row.match_id)
+        self.version = version
+        self._payload: Optional[bytes] = None
+        self._packed: Optional[bytes] = None
+
+    @staticmethod
+    def _match(row) -> dict:
+        return {
+            "id": row.match_id,
+            "position": row.position,
+            "team1": {"id": row.team1_id, "name": row.team1_name, "rating": row.team1_rating} if row.team1_id else None,
+            "team2": {"id": row.team2_id, "name": row.team2_name, "rating": row.team2_rating} if row.team2_id else None,
+            "score_team1": row.score_team1,
+            "score_team2": row.score_team2,
+            "winner_id": row.winner_id,
+            "winner_name": row.winner_name,
+            "status": row.status,
+            "start_time": row.start_time.isoformat() if row.start_time else None,
+            "next_match_id": row.next_match_id,
+            "next_slot": row.next_slot,
+            "loser_next_match_id": row.loser_next_match_id,
+            "loser_next_slot": row.loser_next_slot,
+        }
+
+    def update(self, rows: Iterable, version: int) -> None:
+        """Замена данных измененных матчей"""
+        for row in rows:
+            if row.match_id not in self.matches:
+                self.rounds.setdefault((row.bracket_type, row.round), []).append(row.match_id)
+            self.matches[row.match_id] = row
+        self.version = version
+        self._payload = None
+        self._packed = None
+
+    def round_keys(self) -> List[tuple]:
+        """Раунды в порядке частей сетки из BRACKET_TYPES"""
+        order = {name: i for i, name in enumerate(BRACKET_TYPES)}
+        return sorted(self.rounds, key=lambda k: (order.get(k[0], len(order)), k[1]))
+
+    def round_rows(self, key: tuple) -> List:
+        """Строки матчей раунда по позициям"""
+        return sorted((self.matches[i] for i in self.rounds[key]), key=lambda row: row.position)
+
+    @property
+    def payload(self) -> bytes:
+        """JSON сетки; пересобирается один раз после серии изменений"""
+        if self._payload is None:
+            self._payload = json.dumps(
+                {
+                    "tournament_id": self.tournament_id,
+                    "version": self.version,
+                    "rounds": [
+                        {
+                            "bracket_type": bracket_type,
+                            "round": round_number,
+                            "matches": [
+                                self._match(row)
+                                for row in self.round_rows((bracket_type, round_number))
+                            ],
+                        }
+                        for bracket_type, round_number in self.round_keys()
+                    ],
+                },
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode()
+        return self._payload
+
+    @property
+    def packed(self) -> bytes:
+        """Столбцовое двоичное представление (см. bracket_wire)"""
+        if self._packed is None:
+            self._packed = pack_bracket(
+                self.tournament_id,
+                self.version,
+                (row for key in self.round_keys() for row in self.round_rows(key)),
+            )
+        return self._packed
+
+
+_snapshots = LRUCache(settings.BRACKET_CACHE_SIZE)
+
 
 class BracketService:
     def __init__(self, db: AsyncSession):
@@ -9,63 +141,149 @@ class BracketService:
 
     async def get_tournament_bracket(self, tournament_id: int) -> List[Dict]:
         """Получение турнирной сетки"""
-        query = text("""
-            WITH RECURSIVE bracket_tree AS (
-                -- Первый раунд (корневые матчи)
-                SELECT 
-                    b.tournament_id,
-                    b.match_id,
-                    b.round,
-                    b.position,
-                    b.next_match_id,
-                    m.team1_id,
-                    m.team2_id,
-                    m.score_team1,
-                    m.score_team2,
-                    m.winner_id,
-                    m.status,
-                    1 as level
-                FROM bracket b
-                JOIN matches m ON b.match_id = m.id
-                WHERE b.tournament_id = :tournament_id 
-                AND b.round = 1
-
-                UNION ALL
-
-                -- Рекурсивно получаем следующие матчи
-                SELECT 
-                    b.tournament_id,
-                    b.match_id,
-                    b.round,
-                    b.position,
-                    b.next_match_id,
-                    m.team1_id,
-                    m.team2_id,
-                    m.score_team1,
-                    m.score_team2,
-                    m.winner_id,
-                    m.status,
-                    bt.level + 1
-                FROM bracket b
-                JOIN matches m ON b.match_id = m.id
-                JOIN bracket_tree bt ON b.match_id = bt.next_match_id
-            )
-            SELECT 
-                bt.*,
-                t1.name as team1_name,
-                t2.name as team2_name,
-                w.name as winner_name
-            FROM bracket_tree bt
-            LEFT JOIN teams t1 ON bt.team1_id = t1.id
-            LEFT JOIN teams t2 ON bt.team2_id = t2.id
-            LEFT JOIN teams w ON bt.winner_id = w.id
-            ORDER BY bt.round, bt.position
+        query = text(f"""
+            SELECT {BRACKET_COLUMNS}
+            {BRACKET_JOINS}
+            WHERE b.tournament_id = :tournament_id
+            ORDER BY b.bracket_type, b.round, b.position
         """)
         
         result = await self.db.execute(query, {"tournament_id": tournament_id})
         bracket = result.fetchall()
         
         if not bracket:
-            raise HTTPException(status_code=404, detail="Турнирная сетка не найд��на")
+            raise HTTPException(status_code=404, detail="Турнирная сетка не найдена")
             
-        return bracket 
\ No newline at end of file
+        return bracket
+
+    async def get_version(self, tournament_id: int):
+        """Версия турнира и время его последнего изменения"""
+        row = await queries.fetchrow(self.db, "tournament_version", {"tournament_id": tournament_id})
+        if row is None:
+            raise HTTPException(status_code=404, detail="Турнир не найден")
+        return row
+
+    async def get_bracket_snapshot(
+        self, tournament_id: int, version: Optional[int] = None
+    ) -> BracketSnapshot:
+        """Снимок сетки из кэша, если он не старше версии турнира в базе
+
+        Версия общая для всех процессов, поэтому изменения, сделанные другим
+        воркером, тоже приводят к перечитыванию сетки. Снимок новее версии
+        (чтение с отстающей реплики) не заменяется более старым.
+        """
+        if version is None:
+            version = (await self.get_version(tournament_id)).version
+        snapshot = _snapshots.get(tournament_id)
+        if snapshot is None or snapshot.version < version:
+            # Строки читаются после версии и не могут быть старше нее
+            rows = await self.get_tournament_bracket(tournament_id)
+            snapshot = BracketSnapshot(tournament_id, rows, version)
+            _snapshots.set(tournament_id, snapshot)
+        return snapshot
+
+    async def refresh_matches(
+        self, tournament_id: int, match_ids: List[int]
+    ) -> Optional[BracketSnapshot]:
+        """Обновление снимка после изменения матчей турнира
+
+        Вызывается после фиксации изменений. Если версия турнира выросла
+        ровно на 1, других изменений с момента снимка не было и достаточно
+        перечитать измененные матчи; иначе снимок сбрасывается.
+        """
+        snapshot = _snapshots.get(tournament_id)
+        if snapshot is None or not match_ids:
+            return snapshot
+        query = text(f"""
+            SELECT
+                {BRACKET_COLUMNS},
+                (SELECT version FROM tournaments WHERE id = :tournament_id) AS tournament_version
+            {BRACKET_JOINS}
+            WHERE b.tournament_id = :tournament_id
+            AND b.match_id = ANY(CAST(:match_ids AS INTEGER[]))
+        """)
+        result = await self.db.execute(
+            query, {"tournament_id": tournament_id, "match_ids": list(match_ids)}
+        )
+        rows = result.fetchall()
+        if not rows or rows[0].tournament_version != snapshot.version + 1:
+            _snapshots.pop(tournament_id)
+            return None
+        snapshot.update(rows, rows[0].tournament_version)
+        return snapshot
+
+    @staticmethod
+    def invalidate(tournament_id: int) -> None:
+        """Сброс снимка, например после генерации новых матчей"""
+        _snapshots.pop(tournament_id)
+
+    async def create_bracket(
+        self, tournament_id: int, plan: BracketPlan, start_times: List[datetime]
+    ) -> int:
+        """Сохранение сгенерированной сетки одним запросом"""
+        indices = plan.kept_indices()
+        if not indices:
+            return 0
+
+        # id матчей выделяются из последовательности внутри запроса,
+        # поэтому ссылки на следующие матчи проставляются без повторных обращений
+        query = text("""
+            WITH plan AS (
+                SELECT
+                    p.*,
+                    nextval(pg_get_serial_sequence('matches', 'id')) AS match_id
+                FROM unnest(
+                    CAST(:idx AS INTEGER[]),
+                    CAST(:bracket_type AS VARCHAR[]),
+                    CAST(:round AS INTEGER[]),
+                    CAST(:position AS INTEGER[]),
+                    CAST(:team1_id AS INTEGER[]),
+                    CAST(:team2_id AS INTEGER[]),
+                    CAST(:start_time AS TIMESTAMPTZ[]),
+                    CAST(:next_idx AS INTEGER[]),
+                    CAST(:next_slot AS SMALLINT[]),
+                    CAST(:loser_next_idx AS INTEGER[]),
+                    CAST(:loser_next_slot AS SMALLINT[])
+                ) AS p(
+                    idx, bracket_type, round, position, team1_id, team2_id,
+                    start_time, next_idx, next_slot, loser_next_idx, loser_next_slot
+                )
+            ),
+            new_matches AS (
+                INSERT INTO matches (id, tournament_id, team1_id, team2_id, start_time, status)
+                SELECT match_id, :tournament_id, team1_id, team2_id, start_time, 'scheduled'
+                FROM plan
+                RETURNING id
+            )
+            INSERT INTO bracket (
+                tournament_id, match_id, bracket_type, round, position,
+                next_match_id, next_slot, loser_next_match_id, loser_next_slot
+            )
+            SELECT
+                :tournament_id, p.match_id, p.bracket_type, p.round, p.position,
+                n.match_id, NULLIF(p.next_slot, 0),
+                l.match_id, NULLIF(p.loser_next_slot, 0)
+            FROM plan p
+            LEFT JOIN plan n ON n.idx = p.next_idx
+            LEFT JOIN plan l ON l.idx = p.loser_next_idx
+            RETURNING id
+        """)
+
+        result = await self.db.execute(
+            query,
+            {
+                "tournament_id": tournament_id,
+                "idx": indices,
+                "bracket_type": [BRACKET_TYPES[plan.bracket_type[i]] for i in indices],
+                "round": [plan.round[i] for i in indices],
+                "position": [plan.position[i] for i in indices],
+                "team1_id": [plan.team1[i] or None for i in indices],
+                "team2_id": [plan.team2[i] or None for i in indices],
+                "start_time": [start_times[i] for i in indices],
+                "next_idx": [plan.next_index[i] for i in indices],
+                "next_slot": [plan.next_slot[i] for i in indices],
+                "loser_next_idx": [plan.loser_next_index[i] for i in indices],
+                "loser_next_slot": [plan.loser_next_slot[i] for i in indices],
+            }
+        )
+        return len(result.fetchall())
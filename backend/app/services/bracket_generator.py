@@ -0,0 +1,280 @@
+"""Генерация турнирных сеток в памяти.
+
+Сетка хранится в параллельных массивах (по одному индексу на матч), у каждого
+матча два слота. Слот заполняется из источника: конкретной команды, победителя
+или проигравшего другого матча либо пусто (bye). После построения `resolve()`
+схлопывает матчи, в которых участвует меньше двух команд, и вычисляет ссылки
+на матчи, куда уходят победитель и проигравший. Матчи добавляются в
+топологическом порядке: источник слота всегда создан раньше.
+"""
+from array import array
+from typing import List, Sequence
+
+# Виды источников слота
+SOURCE_EMPTY = 0
+SOURCE_TEAM = 1
+SOURCE_WINNER = 2
+SOURCE_LOSER = 3
+
+# Части сетки (значения колонки bracket.bracket_type)
+WINNERS = 0
+LOSERS = 1
+GRAND_FINAL = 2
+GRAND_FINAL_RESET = 3
+GROUP = 4
+SWISS = 5
+BRACKET_TYPES = ("winners", "losers", "grand_final", "grand_final_reset", "group", "swiss")
+
+NO_TEAM = 0
+NO_MATCH = -1
+
+
+class BracketPlan:
+    """Турнирная сетка в виде компактных массивов"""
+
+    def __init__(self) -> None:
+        self.round = array("i")
+        self.position = array("i")
+        self.bracket_type = array("b")
+        # Два слота на матч: индекс слота = 2 * match + slot
+        self.source_kind = array("b")
+        self.source_ref = array("i")
+        # Слоты, в которые уходят победитель и проигравший матча
+        self.winner_dest = array("i")
+        self.loser_dest = array("i")
+        # Заполняется в resolve()
+        self.team1 = array("i")
+        self.team2 = array("i")
+        self.next_index = array("i")
+        self.next_slot = array("b")
+        self.loser_next_index = array("i")
+        self.loser_next_slot = array("b")
+        self.kept = array("b")
+        self.resolved = False
+
+    def __len__(self) -> int:
+        return len(self.round)
+
+    def add_match(
+        self, round_number: int, position: int, bracket_type: int = WINNERS
+    ) -> int:
+        """Добавление матча, возвращает его индекс"""
+        self.round.append(round_number)
+        self.position.append(position)
+        self.bracket_type.append(bracket_type)
+        self.source_kind.extend((SOURCE_EMPTY, SOURCE_EMPTY))
+        self.source_ref.extend((0, 0))
+        self.winner_dest.append(NO_MATCH)
+        self.loser_dest.append(NO_MATCH)
+        return len(self.round) - 1
+
+    def set_source(self, index: int, slot: int, kind: int, ref: int = 0) -> None:
+        """Указание источника для слота матча"""
+        if kind == SOURCE_TEAM and not ref:
+            kind = SOURCE_EMPTY
+        pos = 2 * index + slot
+        self.source_kind[pos] = kind
+        self.source_ref[pos] = ref
+        if kind == SOURCE_WINNER:
+            self.winner_dest[ref] = pos
+        elif kind == SOURCE_LOSER:
+            self.loser_dest[ref] = pos
+
+    def resolve(self) -> "BracketPlan":
+        """Схлопывание матчей с bye и расчет ссылок на следующие матчи"""
+        kinds = self.source_kind
+        refs = self.source_ref
+        count = len(self.round)
+        self.kept = array("b", bytes(count))
+
+        for i in range(count):
+            live = [s for s in (0, 1) if kinds[2 * i + s] != SOURCE_EMPTY]
+            if len(live) == 2:
+                self.kept[i] = 1
+                continue
+            self._forward(i, live[0] if live else None)
+
+        self.team1 = array("i", [NO_TEAM]) * count
+        self.team2 = array("i", [NO_TEAM]) * count
+        self.next_index = array("i", [NO_MATCH]) * count
+        self.next_slot = array("b", bytes(count))
+        self.loser_next_index = array("i", [NO_MATCH]) * count
+        self.loser_next_slot = array("b", bytes(count))
+        for i in range(count):
+            if not self.kept[i]:
+                continue
+            if kinds[2 * i] == SOURCE_TEAM:
+                self.team1[i] = refs[2 * i]
+            if kinds[2 * i + 1] == SOURCE_TEAM:
+                self.team2[i] = refs[2 * i + 1]
+            dest = self.winner_dest[i]
+            if dest != NO_MATCH:
+                self.next_index[i] = dest // 2
+                self.next_slot[i] = dest % 2 + 1
+            dest = self.loser_dest[i]
+            if dest != NO_MATCH:
+                self.loser_next_index[i] = dest // 2
+                self.loser_next_slot[i] = dest % 2 + 1
+
+        self.resolved = True
+        return self
+
+    def _forward(self, index: int, live_slot) -> None:
+        """Передача единственного участника матча сразу в следующий матч"""
+        # Проигравшего в таком матче нет, его слот остается пустым
+        loser_dest = self.loser_dest[index]
+        self.loser_dest[index] = NO_MATCH
+        if loser_dest != NO_MATCH:
+            self.source_kind[loser_dest] = SOURCE_EMPTY
+            self.source_ref[loser_dest] = 0
+
+        dest = self.winner_dest[index]
+        self.winner_dest[index] = NO_MATCH
+        if dest == NO_MATCH:
+            return
+        if live_slot is None:
+            self.source_kind[dest] = SOURCE_EMPTY
+            self.source_ref[dest] = 0
+            return
+        self.set_source(
+            dest // 2,
+            dest % 2,
+            self.source_kind[2 * index + live_slot],
+            self.source_ref[2 * index + live_slot],
+        )
+
+    def kept_indices(self) -> List[int]:
+        """Индексы матчей, которые нужно сохранить в БД"""
+        return [i for i in range(len(self.round)) if self.kept[i]]
+
+
+def bracket_size(team_count: int) -> int:
+    """Ближайшая степень двойки, вмещающая все команды"""
+    return 1 << max(team_count - 1, 1).bit_length()
+
+
+def bracket_positions(size: int) -> List[int]:
+    """Номера посева по слотам первого раунда (1 против size, 2 против size - 1)
+
+    Порядок строится удвоением: каждый посев из сетки вдвое меньшего размера
+    получает в пару посев, дополняющий сумму до size + 1. Поэтому первые
+    два посева оказываются в разных половинах, первые четыре — в разных
+    четвертях и так далее.
+    """
+    order = [1]
+    while len(order) < size:
+        total = 2 * len(order) + 1
+        order = [seed for s in order for seed in (s, total - s)]
+    return order
+
+
+def seeded_slots(team_ids: Sequence[int], size: int) -> List[int]:
+    """Расстановка команд по слотам первого раунда (0 — bye)
+
+    Порядок списка — порядок посева. Посевов больше числа команд нет, их
+    слоты пустые, так что bye достаются сильнейшим посевам и не встречаются
+    попарно.
+    """
+    return [
+        team_ids[seed - 1] if seed <= len(team_ids) else NO_TEAM
+        for seed in bracket_positions(size)
+    ]
+
+
+def add_elimination_rounds(plan: BracketPlan, slots: Sequence[int]) -> List[int]:
+    """Построение дерева на выбывание, возвращает индексы матчей по раундам"""
+    size = len(slots)
+    current = []
+    for p in range(size // 2):
+        i = plan.add_match(1, p + 1)
+        plan.set_source(i, 0, SOURCE_TEAM, slots[2 * p])
+        plan.set_source(i, 1, SOURCE_TEAM, slots[2 * p + 1])
+        current.append(i)
+
+    rounds = [current]
+    round_number = 1
+    while len(current) > 1:
+        round_number += 1
+        following = []
+        for p in range(len(current) // 2):
+            i = plan.add_match(round_number, p + 1)
+            plan.set_source(i, 0, SOURCE_WINNER, current[2 * p])
+            plan.set_source(i, 1, SOURCE_WINNER, current[2 * p + 1])
+            following.append(i)
+        rounds.append(following)
+        current = following
+    return rounds
+
+
+def single_elimination(team_ids: Sequence[int]) -> BracketPlan:
+    """Сетка на выбывание для N команд (порядок списка — порядок посева)"""
+    if len(team_ids) < 2:
+        raise ValueError("Для сетки нужно минимум две команды")
+    plan = BracketPlan()
+    add_elimination_rounds(plan, seeded_slots(team_ids, bracket_size(len(team_ids))))
+    return plan.resolve()
+
+
+def double_elimination(
+    team_ids: Sequence[int], grand_final_reset: bool = True
+) -> BracketPlan:
+    """Сетка с двойным выбыванием: верхняя и нижняя сетки и гранд-финал
+
+    Нижняя сетка чередует раунды: проигравшие очередного раунда верхней сетки
+    встречаются с победителями предыдущего раунда нижней, затем победители
+    играют между собой. Порядок проигравших меняется через раунд, чтобы
+    повторные встречи случались как можно позже.
+    """
+    if len(team_ids) < 2:
+        raise ValueError("Для сетки нужно минимум две команды")
+    plan = BracketPlan()
+    upper = add_elimination_rounds(
+        plan, seeded_slots(team_ids, bracket_size(len(team_ids)))
+    )
+
+    if len(upper) == 1:
+        lower_champion = (SOURCE_LOSER, upper[0][0])
+    else:
+        current = []
+        first = upper[0]
+        for p in range(len(first) // 2):
+            i = plan.add_match(1, p + 1, LOSERS)
+            plan.set_source(i, 0, SOURCE_LOSER, first[2 * p])
+            plan.set_source(i, 1, SOURCE_LOSER, first[2 * p + 1])
+            current.append(i)
+
+        round_number = 1
+        for j in range(1, len(upper)):
+            # Проигравшие раунда верхней сетки против победителей нижней
+            dropped = upper[j] if j % 2 else upper[j][::-1]
+            round_number += 1
+            following = []
+            for p in range(len(current)):
+                i = plan.add_match(round_number, p + 1, LOSERS)
+                plan.set_source(i, 0, SOURCE_WINNER, current[p])
+                plan.set_source(i, 1, SOURCE_LOSER, dropped[p])
+                following.append(i)
+            current = following
+
+            if len(current) > 1:
+                round_number += 1
+                following = []
+                for p in range(len(current) // 2):
+                    i = plan.add_match(round_number, p + 1, LOSERS)
+                    plan.set_source(i, 0, SOURCE_WINNER, current[2 * p])
+                    plan.set_source(i, 1, SOURCE_WINNER, current[2 * p + 1])
+                    following.append(i)
+                current = following
+        lower_champion = (SOURCE_WINNER, current[0])
+
+    final = plan.add_match(1, 1, GRAND_FINAL)
+    plan.set_source(final, 0, SOURCE_WINNER, upper[-1][0])
+    plan.set_source(final, 1, *lower_champion)
+
+    if grand_final_reset:
+        # Переигровка нужна, только если финал выиграл участник из нижней сетки
+        reset = plan.add_match(1, 1, GRAND_FINAL_RESET)
+        plan.set_source(reset, 0, SOURCE_WINNER, final)
+        plan.set_source(reset, 1, SOURCE_LOSER, final)
+
+    return plan.resolve()
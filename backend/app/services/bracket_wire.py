@@ -0,0 +1,93 @@
+"""Компактное двоичное представление сетки для больших турниров.
+
+Данные лежат столбцами, все числа little-endian, отсутствующее значение — -1
+(для id команд и матчей — 0):
+
+    заголовок  <4sHHIQII: b"BRKT", версия формата, резерв, id турнира,
+               версия снимка, число матчей N, число команд T
+    int32[N]   match_id, round, position, team1_id, team2_id,
+               score_team1, score_team2, winner_id,
+               next_match_id, loser_next_match_id
+    int64[N]   start_time (миллисекунды Unix)
+    uint8[N]   bracket_type (индекс в BRACKET_TYPES), status (индекс в
+               MATCH_STATUSES), next_slot, loser_next_slot
+    int32[T]   team_id
+    uint32[T+1] смещения имен в блоке UTF-8
+    bytes      имена команд подряд
+
+Столбцы заполняются прямо из строк запроса, без промежуточных словарей.
+"""
+import struct
+import sys
+from array import array
+from typing import Dict, Iterable, List
+
+from app.services.bracket_generator import BRACKET_TYPES
+
+BRACKET_BINARY_MEDIA_TYPE = "application/vnd.bracket.columnar"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHIQII")
+
+MATCH_STATUSES = ("scheduled", "in_progress", "completed", "cancelled")
+
+INT32_COLUMNS = (
+    "match_id", "round", "position", "team1_id", "team2_id",
+    "score_team1", "score_team2", "winner_id",
+    "next_match_id", "loser_next_match_id",
+)
+# Для ссылок на матчи и команды отсутствие значения кодируется нулем
+ID_COLUMNS = {"match_id", "team1_id", "team2_id", "winner_id", "next_match_id", "loser_next_match_id"}
+
+
+def _little_endian(column: array) -> bytes:
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def pack_bracket(tournament_id: int, version: int, rows: Iterable) -> bytes:
+    """Сериализация строк сетки (см. BRACKET_COLUMNS) в столбцы"""
+    type_codes = {name: i for i, name in enumerate(BRACKET_TYPES)}
+    status_codes = {name: i for i, name in enumerate(MATCH_STATUSES)}
+
+    ints: Dict[str, array] = {name: array("i") for name in INT32_COLUMNS}
+    start_time = array("q")
+    bracket_type = array("B")
+    status = array("B")
+    next_slot = array("B")
+    loser_next_slot = array("B")
+    teams: Dict[int, str] = {}
+
+    count = 0
+    for row in rows:
+        count += 1
+        for name in INT32_COLUMNS:
+            value = getattr(row, name)
+            ints[name].append(value if value is not None else (0 if name in ID_COLUMNS else -1))
+        start_time.append(int(row.start_time.timestamp() * 1000) if row.start_time else -1)
+        bracket_type.append(type_codes.get(row.bracket_type, 255))
+        status.append(status_codes.get(row.status, 255))
+        next_slot.append(row.next_slot or 0)
+        loser_next_slot.append(row.loser_next_slot or 0)
+        if row.team1_id:
+            teams[row.team1_id] = row.team1_name
+        if row.team2_id:
+            teams[row.team2_id] = row.team2_name
+
+    team_ids = array("i", teams)
+    offsets = array("I", [0])
+    names: List[bytes] = []
+    for name in teams.values():
+        encoded = (name or "").encode()
+        names.append(encoded)
+        offsets.append(offsets[-1] + len(encoded))
+
+    parts = [HEADER.pack(b"BRKT", FORMAT_VERSION, 0, tournament_id, version, count, len(teams))]
+    parts.extend(_little_endian(ints[name]) for name in INT32_COLUMNS)
+    parts.append(_little_endian(start_time))
+    parts.extend(c.tobytes() for c in (bracket_type, status, next_slot, loser_next_slot))
+    parts.append(_little_endian(team_ids))
+    parts.append(_little_endian(offsets))
+    parts.extend(names)
+    return b"".join(parts)
@@ -0,0 +1,131 @@
+"""Проверка пересечения матчей одной команды.
+
+Каждый матч считается занимающим интервал [start_time, start_time +
+длительность), длительность ограничена сверху MATCH_DURATION_MINUTES.
+Поэтому пересекающиеся матчи команды лежат в окне ± длительность от начала,
+и одиночная проверка — это диапазонный поиск по индексам
+(team1_id, start_time) и (team2_id, start_time), O(log n). Расписание целиком
+проверяется одним запросом за его окно времени и проходом по интервалам,
+отсортированным по команде и времени.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+# Пространство ключей рекомендательных блокировок для записи команд на матчи
+BOOKING_LOCK_NAMESPACE = 1015
+
+# (id матча, id команды 1, id команды 2, время начала)
+Booking = Tuple[int, Optional[int], Optional[int], datetime]
+
+
+def find_overlaps(bookings: Iterable[Booking], duration: timedelta) -> List[Dict]:
+    """Пары матчей одной команды, начинающихся ближе чем через duration"""
+    intervals = sorted(
+        (team_id, start, match_id)
+        for match_id, team1_id, team2_id, start in bookings
+        for team_id in (team1_id, team2_id)
+        if team_id
+    )
+    overlaps = []
+    for (team_a, start_a, match_a), (team_b, start_b, match_b) in zip(intervals, intervals[1:]):
+        if team_a == team_b and match_a != match_b and start_b < start_a + duration:
+            overlaps.append({
+                "team_id": team_a,
+                "match_id": match_a,
+                "conflicting_match_id": match_b,
+            })
+    return overlaps
+
+
+class ConflictService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.duration = timedelta(minutes=settings.MATCH_DURATION_MINUTES)
+
+    async def check_match(
+        self,
+        team_ids: Sequence[int],
+        start_time: datetime,
+        exclude_match_id: Optional[int] = None,
+    ) -> None:
+        """Отказ, если у команд уже есть матч, пересекающийся с новым
+
+        Проверка и запись нового матча должны идти в одной транзакции:
+        блокировка по командам не дает двум запросам занять одно время.
+        """
+        team_ids = sorted(set(team_ids))
+        await self.db.execute(
+            text("""
+                SELECT pg_advisory_xact_lock(:namespace, team_id)
+                FROM unnest(CAST(:team_ids AS INTEGER[])) AS team_id
+            """),
+            {"namespace": BOOKING_LOCK_NAMESPACE, "team_ids": team_ids}
+        )
+
+        params = {
+            "team_ids": team_ids,
+            "window_start": start_time - self.duration,
+            "window_end": start_time + self.duration,
+            "exclude_match_id": exclude_match_id or 0,
+        }
+        query = text("""
+            SELECT id, team1_id AS team_id, start_time
+            FROM matches
+            WHERE team1_id = ANY(CAST(:team_ids AS INTEGER[]))
+            AND start_time > :window_start AND start_time < :window_end
+            AND status != 'cancelled' AND id != :exclude_match_id
+            UNION ALL
+            SELECT id, team2_id, start_time
+            FROM matches
+            WHERE team2_id = ANY(CAST(:team_ids AS INTEGER[]))
+            AND start_time > :window_start AND start_time < :window_end
+            AND status != 'cancelled' AND id != :exclude_match_id
+            LIMIT 1
+        """)
+        result = await self.db.execute(query, params)
+        conflict = result.fetchone()
+        if conflict:
+            raise HTTPException(
+                status_code=409,
+                detail=(
+                    f"Команда {conflict.team_id} уже играет матч {conflict.id} "
+                    f"в {conflict.start_time.isoformat()}"
+                )
+            )
+
+    async def check_schedule(self, bookings: List[Booking]) -> List[Dict]:
+        """Пересечения в расписании с учетом уже назначенных матчей команд"""
+        bookings = [b for b in bookings if b[1] or b[2]]
+        if not bookings:
+            return []
+
+        team_ids = sorted({t for b in bookings for t in (b[1], b[2]) if t})
+        starts = [b[3] for b in bookings]
+        query = text("""
+            SELECT id, team1_id, team2_id, start_time
+            FROM matches
+            WHERE (
+                team1_id = ANY(CAST(:team_ids AS INTEGER[]))
+                OR team2_id = ANY(CAST(:team_ids AS INTEGER[]))
+            )
+            AND start_time > :window_start AND start_time < :window_end
+            AND status != 'cancelled'
+            AND id != ALL(CAST(:match_ids AS INTEGER[]))
+        """)
+        result = await self.db.execute(
+            query,
+            {
+                "team_ids": team_ids,
+                "window_start": min(starts) - self.duration,
+                "window_end": max(starts) + self.duration,
+                "match_ids": [b[0] for b in bookings],
+            }
+        )
+        existing = [tuple(row) for row in result.fetchall()]
+        return find_overlaps(bookings + existing, self.duration)
@@ -0,0 +1,118 @@
+"""Потоковая выгрузка списков в NDJSON и CSV.
+
+Строки читаются серверным курсором порциями по EXPORT_BATCH_SIZE и сразу
+кодируются в текст, без моделей pydantic и без накопления результата,
+поэтому память процесса не зависит от размера выгрузки.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Dict, Optional, Sequence
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import ReadSessionLocal
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+MATCHES_EXPORT_QUERY = """
+    SELECT
+        m.id,
+        m.tournament_id,
+        t.name AS tournament_name,
+        b.bracket_type,
+        b.round,
+        m.team1_id,
+        t1.name AS team1_name,
+        m.team2_id,
+        t2.name AS team2_name,
+        m.score_team1,
+        m.score_team2,
+        m.winner_id,
+        m.status,
+        m.start_time,
+        m.end_time
+    FROM matches m
+    JOIN tournaments t ON t.id = m.tournament_id
+    LEFT JOIN bracket b ON b.match_id = m.id
+    LEFT JOIN teams t1 ON t1.id = m.team1_id
+    LEFT JOIN teams t2 ON t2.id = m.team2_id
+    {where_clause}
+    ORDER BY m.id
+"""
+
+TOURNAMENTS_EXPORT_QUERY = """
+    SELECT
+        t.id,
+        t.name,
+        t.type,
+        t.status,
+        t.max_teams,
+        t.group_count,
+        t.current_teams AS team_count,
+        t.start_date,
+        t.end_date,
+        t.created_by,
+        t.created_at
+    FROM tournaments t
+    {where_clause}
+    ORDER BY t.id
+"""
+
+
+def _plain(value: Any) -> Any:
+    """Значение, которое можно записать в JSON или CSV"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def encode_ndjson(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> bytes:
+    """Порция строк в NDJSON: по объекту на строку"""
+    lines = [
+        json.dumps(dict(zip(columns, map(_plain, row))), ensure_ascii=False)
+        for row in rows
+    ]
+    lines.append("")
+    return "\n".join(lines).encode()
+
+
+def encode_csv(rows: Sequence[Sequence[Any]]) -> bytes:
+    """Порция строк в CSV"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_plain(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_export(
+    query: str,
+    params: Dict[str, Any],
+    export_format: str,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """Выгрузка результата запроса порциями
+
+    Сессия открывается внутри генератора: соединение занято, только пока идет
+    передача, и освобождается при обрыве со стороны клиента.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    async with ReadSessionLocal() as session:
+        result = await session.stream(
+            text(query).execution_options(yield_per=batch_size), params
+        )
+        columns = list(result.keys())
+        if export_format == "csv":
+            yield encode_csv([columns])
+        async for rows in result.partitions():
+            if export_format == "csv":
+                yield encode_csv(rows)
+            else:
+                yield encode_ndjson(columns, rows)
@@ -1,10 +1,142 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from fastapi import HTTPException
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 from datetime import datetime
 
-from app.schemas.match import MatchResult, Match
+from app.core.config import settings
+from app.schemas.match import MatchResult, MatchResultItem, MatchResultStatus, Match
+from app.services.bracket import BracketService
+from app.services.projections import ProjectionService
+from app.services.standings import POINTS_PER_WIN
+
+# Один запрос на любой набор результатов: счет и победитель, турнирная таблица
+# и рейтинг Эло команд, переход победителей и проигравших в следующие матчи
+# и отмена ненужной переигровки гранд-финала. Изменения одной строки
+# (две команды в один матч, несколько матчей команды) сначала суммируются,
+# чтобы каждая строка обновлялась один раз
+RESULTS_QUERY = text("""
+    WITH input AS (
+        SELECT *
+        FROM unnest(
+            CAST(:match_ids AS INTEGER[]),
+            CAST(:scores_team1 AS INTEGER[]),
+            CAST(:scores_team2 AS INTEGER[])
+        ) AS i(match_id, score_team1, score_team2)
+    ),
+    updated AS (
+        UPDATE matches m
+        SET
+            score_team1 = i.score_team1,
+            score_team2 = i.score_team2,
+            status = 'completed',
+            end_time = CURRENT_TIMESTAMP,
+            winner_id = CASE
+                WHEN i.score_team1 > i.score_team2 THEN m.team1_id
+                ELSE m.team2_id
+            END
+        FROM input i
+        WHERE m.id = i.match_id
+        AND m.status != 'completed'
+        AND m.team1_id IS NOT NULL
+        AND m.team2_id IS NOT NULL
+        RETURNING m.*
+    ),
+    sides AS (
+        SELECT u.tournament_id, r.*
+        FROM updated u
+        CROSS JOIN LATERAL (
+            VALUES
+                (u.team1_id, u.team2_id, CASE WHEN u.winner_id = u.team1_id THEN 1 ELSE 0 END, u.score_team1, u.score_team2),
+                (u.team2_id, u.team1_id, CASE WHEN u.winner_id = u.team2_id THEN 1 ELSE 0 END, u.score_team2, u.score_team1)
+        ) AS r(team_id, opponent_id, won, score_for, score_against)
+    ),
+    links AS (
+        SELECT
+            b.*,
+            u.winner_id,
+            CASE WHEN u.winner_id = u.team1_id THEN u.team2_id ELSE u.team1_id END AS loser_id,
+            -- Переигровка нужна, только если финал выиграла команда из нижней сетки
+            b.bracket_type != 'grand_final' OR u.winner_id = u.team2_id AS advance
+        FROM updated u
+        JOIN bracket b ON b.match_id = u.id
+    ),
+    moves AS (
+        SELECT next_match_id AS match_id, COALESCE(next_slot, 2 - position % 2) AS slot, winner_id AS team_id
+        FROM links
+        WHERE next_match_id IS NOT NULL AND advance
+        UNION ALL
+        SELECT loser_next_match_id, loser_next_slot, loser_id
+        FROM links
+        WHERE loser_next_match_id IS NOT NULL AND advance
+    ),
+    advanced AS (
+        UPDATE matches m
+        SET
+            team1_id = COALESCE(mv.team1_id, m.team1_id),
+            team2_id = COALESCE(mv.team2_id, m.team2_id)
+        FROM (
+            SELECT
+                match_id,
+                MAX(team_id) FILTER (WHERE slot = 1) AS team1_id,
+                MAX(team_id) FILTER (WHERE slot = 2) AS team2_id
+            FROM moves
+            GROUP BY match_id
+        ) mv
+        WHERE m.id = mv.match_id
+        RETURNING m.id, m.tournament_id
+    ),
+    rated AS (
+        -- Рейтинги всех матчей набора считаются от значений до его применения
+        UPDATE teams t
+        SET rating = t.rating + d.delta
+        FROM (
+            SELECT
+                s.team_id,
+                :k_factor * SUM(
+                    s.won - 1.0 / (1.0 + power(10.0, (o.rating - me.rating) / 400.0))
+                ) AS delta
+            FROM sides s
+            JOIN teams me ON me.id = s.team_id
+            JOIN teams o ON o.id = s.opponent_id
+            GROUP BY s.team_id
+        ) d
+        WHERE t.id = d.team_id
+        RETURNING t.id
+    ),
+    standing AS (
+        INSERT INTO standings AS st (
+            tournament_id, team_id, played, wins, losses, points, score_for, score_against
+        )
+        SELECT
+            tournament_id, team_id, COUNT(*),
+            SUM(won), SUM(1 - won), :win_points * SUM(won),
+            SUM(score_for), SUM(score_against)
+        FROM sides
+        GROUP BY tournament_id, team_id
+        ON CONFLICT (tournament_id, team_id) DO UPDATE SET
+            played = st.played + EXCLUDED.played,
+            wins = st.wins + EXCLUDED.wins,
+            losses = st.losses + EXCLUDED.losses,
+            points = st.points + EXCLUDED.points,
+            score_for = st.score_for + EXCLUDED.score_for,
+            score_against = st.score_against + EXCLUDED.score_against
+        RETURNING st.team_id
+    ),
+    cancelled AS (
+        UPDATE matches m
+        SET status = 'cancelled'
+        FROM links l
+        WHERE m.id = l.next_match_id AND NOT l.advance
+        RETURNING m.id, m.tournament_id
+    )
+    SELECT
+        u.*,
+        ARRAY(SELECT a.id FROM advanced a WHERE a.tournament_id = u.tournament_id)
+        || ARRAY(SELECT c.id FROM cancelled c WHERE c.tournament_id = u.tournament_id)
+        AS affected_match_ids
+    FROM updated u
+""")
 
 class MatchService:
     def __init__(self, db: AsyncSession):
@@ -13,47 +145,121 @@ class MatchService:
     async def update_match_result(
         self, match_id: int, result: MatchResult, user_id: int
     ) -> Match:
-        """Обновление результата матча"""
-        # Проверяем существование матча
+        """Обновление результата матча с продвижением команд по сетке"""
+        if result.score_team1 == result.score_team2:
+            raise HTTPException(status_code=400, detail="Ничейный результат невозможен")
+
+        try:
+            rows = await self._apply_results(
+                [MatchResultItem(match_id=match_id, **result.model_dump())]
+            )
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if not rows:
+            await self._raise_not_updatable(match_id)
+
+        await self._refresh_snapshots(rows)
+        return rows[0]
+
+    async def update_match_results(
+        self, results: List[MatchResultItem], user_id: int
+    ) -> List[MatchResultStatus]:
+        """Пакетное внесение результатов: одна проверка, один запрос на запись"""
+        errors: Dict[int, str] = {}
+        seen: Set[int] = set()
+        for i, item in enumerate(results):
+            if item.match_id in seen:
+                errors[i] = "Матч повторяется в запросе"
+            elif item.score_team1 == item.score_team2:
+                errors[i] = "Ничейный результат невозможен"
+            seen.add(item.match_id)
+
+        # Проверка всех матчей по текущему состоянию одним запросом
         query = text("""
-            SELECT m.*, t.created_by
-            FROM matches m
-            JOIN tournaments t ON m.tournament_id = t.id
-            WHERE m.id = :match_id
+            SELECT id, status, team1_id, team2_id
+            FROM matches
+            WHERE id = ANY(CAST(:match_ids AS INTEGER[]))
         """)
-        
-        match = await self.db.execute(query, {"match_id": match_id})
-        match_data = match.fetchone()
-        
+        result = await self.db.execute(query, {"match_ids": list(seen)})
+        state = {row.id: row for row in result.fetchall()}
+        for i, item in enumerate(results):
+            if i in errors:
+                continue
+            match_data = state.get(item.match_id)
+            if not match_data:
+                errors[i] = "Матч не найден"
+            elif match_data.status == 'completed':
+                errors[i] = "Результат матча уже внесен"
+            elif match_data.team1_id is None or match_data.team2_id is None:
+                errors[i] = "Участники матча еще не определены"
+
+        accepted = [item for i, item in enumerate(results) if i not in errors]
+        applied: Set[int] = set()
+        if accepted:
+            try:
+                rows = await self._apply_results(accepted)
+            except Exception as e:
+                await self.db.rollback()
+                detail = f"Ошибка сохранения результатов: {e}"
+                return [
+                    MatchResultStatus(match_id=item.match_id, success=False, detail=errors.get(i, detail))
+                    for i, item in enumerate(results)
+                ]
+            applied = {row.id for row in rows}
+            await self._refresh_snapshots(rows)
+
+        statuses = []
+        for i, item in enumerate(results):
+            if i not in errors and item.match_id not in applied:
+                # Матч изменился между проверкой и записью
+                errors[i] = "Результат не применен, состояние матча изменилось"
+            statuses.append(
+                MatchResultStatus(match_id=item.match_id, success=i not in errors, detail=errors.get(i))
+            )
+        return statuses
+
+    async def _apply_results(self, results: List[MatchResultItem]) -> List:
+        """Запись результатов и всех зависящих от них данных в одной транзакции"""
+        result = await self.db.execute(
+            RESULTS_QUERY,
+            {
+                "match_ids": [item.match_id for item in results],
+                "scores_team1": [item.score_team1 for item in results],
+                "scores_team2": [item.score_team2 for item in results],
+                "k_factor": settings.RATING_K_FACTOR,
+                "win_points": POINTS_PER_WIN
+            }
+        )
+        rows = result.fetchall()
+        if rows:
+            await self.db.commit()
+        return rows
+
+    async def _refresh_snapshots(self, rows: List) -> None:
+        """Обновление кэша сеток и прогнозов по каждому затронутому турниру"""
+        changed: Dict[int, Set[int]] = {}
+        for row in rows:
+            ids = changed.setdefault(row.tournament_id, set())
+            ids.add(row.id)
+            ids.update(row.affected_match_ids)
+
+        bracket_service = BracketService(self.db)
+        for tournament_id, match_ids in changed.items():
+            snapshot = await bracket_service.refresh_matches(tournament_id, list(match_ids))
+            ProjectionService.refresh(snapshot)
+
+    async def _raise_not_updatable(self, match_id: int) -> None:
+        """Причина, по которой результат матча не был принят"""
+        query = text("SELECT status, team1_id, team2_id FROM matches WHERE id = :match_id")
+        result = await self.db.execute(query, {"match_id": match_id})
+        match_data = result.fetchone()
+
         if not match_data:
             raise HTTPException(status_code=404, detail="Матч не найден")
-            
+
         if match_data.status == 'completed':
-            raise HTTPException(status_code=400, detail="Результат ма��ча уже внесен")
+            raise HTTPException(status_code=400, detail="Результат матча уже внесен")
 
-        # Обновляем результат
-        query = text("""
-            UPDATE matches
-            SET 
-                score_team1 = :score_team1,
-                score_team2 = :score_team2,
-                status = 'completed',
-                end_time = CURRENT_TIMESTAMP
-            WHERE id = :match_id
-            RETURNING *
-        """)
-        
-        try:
-            result = await self.db.execute(
-                query,
-                {
-                    "match_id": match_id,
-                    "score_team1": result.score_team1,
-                    "score_team2": result.score_team2
-                }
-            )
-            await self.db.commit()
-            return result.fetchone()
-        except Exception as e:
-            await self.db.rollback()
-            raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=400, detail="Участники матча еще не определены")
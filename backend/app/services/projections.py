@@ -0,0 +1,277 @@
+"""Прогноз исхода турнира методом Монте-Карло.
+
+Сетка на выбывание переводится в массивы: у каждого матча два слота, слот
+заполняется командой, победителем или проигравшим более раннего матча.
+Все симуляции одного матча разыгрываются разом операциями NumPy над
+векторами, поэтому стоимость растет с числом матчей, а не симуляций.
+Расчет выполняется в пуле процессов и кэшируется по версии снимка сетки,
+чтобы цикл событий не блокировался.
+"""
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.services.bracket import BracketService, BracketSnapshot
+from app.services.bracket_generator import (
+    BRACKET_TYPES, SOURCE_EMPTY, SOURCE_LOSER, SOURCE_TEAM, SOURCE_WINNER,
+)
+from app.services.seeding import DEFAULT_RATING
+
+# Части сетки, для которых строится прогноз
+ELIMINATION_TYPES = ("winners", "losers", "grand_final", "grand_final_reset")
+
+# Ограничение размера массивов одной порции симуляций (матчи × симуляции)
+SIMULATION_CELLS = 1 << 22
+
+# Состояние переигровки гранд-финала
+RESET_UNKNOWN = 0
+RESET_PLAYED = 1
+RESET_CANCELLED = 2
+
+
+def build_spec(
+    snapshot: BracketSnapshot, ratings: Optional[Dict[int, float]] = None
+) -> dict:
+    """Описание сетки в виде списков для передачи в другой процесс"""
+    order = {name: i for i, name in enumerate(BRACKET_TYPES)}
+    # Сортировка по части сетки и раунду дает топологический порядок:
+    # источники слотов всегда идут раньше матча
+    stages = sorted(
+        (key for key in snapshot.rounds if key[0] in ELIMINATION_TYPES),
+        key=lambda k: (order[k[0]], k[1]),
+    )
+    match_ids = [
+        match_id
+        for key in stages
+        for match_id in sorted(snapshot.rounds[key], key=lambda i: snapshot.matches[i].position)
+    ]
+    if not match_ids:
+        raise HTTPException(
+            status_code=400,
+            detail="Прогноз доступен только для сеток на выбывание"
+        )
+
+    index = {match_id: i for i, match_id in enumerate(match_ids)}
+    resets = set(snapshot.rounds.get(("grand_final_reset", 1), ()))
+    team_index: Dict[int, int] = {}
+    team_names: List[str] = []
+    # Рейтинг из более поздних раундов снимка обновлялся последним
+    team_ratings: Dict[int, float] = {}
+
+    def team(team_id: Optional[int], name: str, rating: Optional[float]) -> int:
+        if not team_id:
+            return -1
+        if team_id not in team_index:
+            team_index[team_id] = len(team_names)
+            team_names.append(name)
+        if rating is not None:
+            team_ratings[team_id] = rating
+        return team_index[team_id]
+
+    count = len(match_ids)
+    stage_of = {key: s for s, key in enumerate(stages)}
+    spec = {
+        "stage": [0] * count,
+        "source_kind": [SOURCE_EMPTY] * (2 * count),
+        "source_ref": [0] * (2 * count),
+        "winner": [-1] * count,
+        "reset": [RESET_UNKNOWN] * count,
+        "reset_of": [-1] * count,
+    }
+    for key in stages:
+        for match_id in snapshot.rounds[key]:
+            i = index[match_id]
+            match = snapshot.matches[match_id]
+            spec["stage"][i] = stage_of[key]
+            for slot, t in enumerate((
+                team(match.team1_id, match.team1_name, match.team1_rating),
+                team(match.team2_id, match.team2_name, match.team2_rating),
+            )):
+                if t >= 0:
+                    spec["source_kind"][2 * i + slot] = SOURCE_TEAM
+                    spec["source_ref"][2 * i + slot] = t
+            if match.status == "completed" and match.winner_id in team_index:
+                spec["winner"][i] = team_index[match.winner_id]
+            if key[0] == "grand_final_reset" and match.status in ("completed", "cancelled"):
+                spec["reset"][i] = RESET_PLAYED if match.status == "completed" else RESET_CANCELLED
+
+    # Ссылки на следующие матчи задают источники слотов еще не сыгранных матчей
+    for match_id, i in index.items():
+        match = snapshot.matches[match_id]
+        for kind, target, slot in (
+            (SOURCE_WINNER, match.next_match_id, match.next_slot),
+            (SOURCE_LOSER, match.loser_next_match_id, match.loser_next_slot),
+        ):
+            if target in index and slot:
+                j = index[target]
+                spec["source_kind"][2 * j + slot - 1] = kind
+                spec["source_ref"][2 * j + slot - 1] = i
+                if target in resets:
+                    spec["reset_of"][j] = i
+
+    ratings = {**team_ratings, **(ratings or {})}
+    spec["ratings"] = [float(ratings.get(t, DEFAULT_RATING)) for t in team_index]
+    spec["team_ids"] = list(team_index)
+    spec["team_names"] = team_names
+    spec["stages"] = [{"bracket_type": t, "round": r} for t, r in stages]
+    return spec
+
+
+def simulate(spec: dict, simulations: int, seed: Optional[int] = None) -> tuple:
+    """Доли симуляций, в которых команда дошла до раунда и выиграла турнир"""
+    rng = np.random.default_rng(seed)
+    kinds = spec["source_kind"]
+    refs = spec["source_ref"]
+    stage = spec["stage"]
+    fixed = spec["winner"]
+    reset_state = spec["reset"]
+    reset_of = spec["reset_of"]
+    team_count = len(spec["ratings"])
+    match_count = len(stage)
+
+    # Пустой слот имеет индекс -1 и попадает на последний элемент:
+    # рейтинг -inf означает, что соперник проходит дальше без игры
+    ratings = np.append(np.asarray(spec["ratings"], dtype=np.float64), -np.inf)
+    reach = np.zeros((len(spec["stages"]), team_count), dtype=np.int64)
+    champion = np.zeros(team_count, dtype=np.int64)
+
+    chunk = max(1024, SIMULATION_CELLS // match_count)
+    done = 0
+    while done < simulations:
+        n = min(chunk, simulations - done)
+        home = np.empty((match_count, n), dtype=np.int32)
+        winners = np.empty((match_count, n), dtype=np.int32)
+        losers = np.empty((match_count, n), dtype=np.int32)
+
+        def slot(pos: int) -> np.ndarray:
+            kind = kinds[pos]
+            if kind == SOURCE_WINNER:
+                return winners[refs[pos]]
+            if kind == SOURCE_LOSER:
+                return losers[refs[pos]]
+            return np.full(n, refs[pos] if kind == SOURCE_TEAM else -1, dtype=np.int32)
+
+        for i in range(match_count):
+            a = slot(2 * i)
+            b = slot(2 * i + 1)
+            home[i] = a
+
+            if fixed[i] >= 0:
+                w = np.full(n, fixed[i], dtype=np.int32)
+                l = np.where(a == fixed[i], b, a)
+            else:
+                with np.errstate(invalid="ignore", over="ignore"):
+                    p = 1.0 / (1.0 + 10.0 ** ((ratings[b] - ratings[a]) / 400.0))
+                first = rng.random(n) < p
+                w = np.where(first, a, b)
+                l = np.where(first, b, a)
+
+            played = np.ones(n, dtype=bool)
+            gf = reset_of[i]
+            if gf >= 0 and reset_state[i] != RESET_PLAYED:
+                # Переигровка проводится, только если финал выиграла нижняя сетка
+                if reset_state[i] == RESET_CANCELLED:
+                    played[:] = False
+                else:
+                    played = winners[gf] != home[gf]
+                w = np.where(played, w, a)
+                l = np.where(played, l, -1)
+            winners[i] = w
+            losers[i] = l
+
+            present = np.concatenate((a[played & (a >= 0)], b[played & (b >= 0)]))
+            reach[stage[i]] += np.bincount(present, minlength=team_count)
+
+        final = winners[match_count - 1]
+        champion += np.bincount(final[final >= 0], minlength=team_count)
+        done += n
+
+    return reach / simulations, champion / simulations
+
+
+def project(spec: dict, simulations: int) -> dict:
+    """Прогноз в виде ответа API; выполняется в процессе пула"""
+    reach, champion = simulate(spec, simulations)
+    teams = [
+        {
+            "team_id": team_id,
+            "name": spec["team_names"][t],
+            "rating": spec["ratings"][t],
+            "champion": round(float(champion[t]), 4),
+            "rounds": [
+                {**info, "probability": round(float(reach[s, t]), 4)}
+                for s, info in enumerate(spec["stages"])
+            ],
+        }
+        for t, team_id in enumerate(spec["team_ids"])
+    ]
+    teams.sort(key=lambda item: -item["champion"])
+    return {"simulations": simulations, "teams": teams}
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+# tournament_id -> (версия снимка, future с результатом)
+_projections = LRUCache(settings.BRACKET_CACHE_SIZE)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.PROJECTION_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Остановка пула процессов при завершении приложения"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+class ProjectionService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_projections(self, tournament_id: int) -> dict:
+        """Прогноз для текущей версии сетки турнира"""
+        snapshot = await BracketService(self.db).get_bracket_snapshot(tournament_id)
+        version = snapshot.version
+        try:
+            result = await self.schedule(snapshot)
+        except HTTPException:
+            raise
+        except Exception:
+            _projections.pop(tournament_id)
+            raise HTTPException(status_code=500, detail="Ошибка расчета прогноза")
+        return {"tournament_id": tournament_id, "version": version, **result}
+
+    @staticmethod
+    def schedule(snapshot: BracketSnapshot) -> "asyncio.Future":
+        """Запуск расчета в пуле процессов, если для версии снимка его еще нет"""
+        cached = _projections.get(snapshot.tournament_id)
+        if cached is not None and cached[0] == snapshot.version:
+            return cached[1]
+        spec = build_spec(snapshot)
+        future = asyncio.get_running_loop().run_in_executor(
+            _get_executor(), project, spec, settings.PROJECTION_SIMULATIONS
+        )
+        _projections.set(snapshot.tournament_id, (snapshot.version, future))
+        return future
+
+    @classmethod
+    def refresh(cls, snapshot: Optional[BracketSnapshot]) -> None:
+        """Пересчет после результата матча, если прогноз турнира уже запрашивали"""
+        if snapshot is None or snapshot.tournament_id not in _projections:
+            return
+        try:
+            cls.schedule(snapshot)
+        except HTTPException:
+            _projections.pop(snapshot.tournament_id)
@@ -0,0 +1,119 @@
+"""Рейтинг команд по системе Эло.
+
+После каждого матча рейтинг обновляется в том же запросе, что и результат
+(см. MatchService). Полный пересчет нужен после смены параметров: история
+матчей читается курсором на стороне сервера порциями по
+RATING_RECOMPUTE_BATCH строк и применяется «волнами». В одной волне каждая
+команда встречается не больше одного раза, поэтому волна считается одной
+векторной операцией NumPy, а порядок матчей каждой команды сохраняется.
+"""
+from typing import Tuple
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+
+def expected_score(rating: np.ndarray, opponent: np.ndarray) -> np.ndarray:
+    """Ожидаемый результат команды против соперника"""
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / 400.0))
+
+
+def match_waves(team1: np.ndarray, team2: np.ndarray) -> np.ndarray:
+    """Номер волны для каждого матча: следующая после предыдущих матчей команд"""
+    last = {}
+    waves = np.empty(len(team1), dtype=np.int64)
+    for i, (a, b) in enumerate(zip(team1.tolist(), team2.tolist())):
+        wave = max(last.get(a, -1), last.get(b, -1)) + 1
+        last[a] = last[b] = wave
+        waves[i] = wave
+    return waves
+
+
+def replay(
+    ratings: np.ndarray,
+    team1: np.ndarray,
+    team2: np.ndarray,
+    team1_won: np.ndarray,
+    k_factor: float,
+) -> None:
+    """Применение матчей в хронологическом порядке к массиву рейтингов"""
+    if not len(team1):
+        return
+    waves = match_waves(team1, team2)
+    order = np.argsort(waves, kind="stable")
+    bounds = np.cumsum(np.bincount(waves))
+    start = 0
+    for end in bounds:
+        idx = order[start:end]
+        a, b = team1[idx], team2[idx]
+        delta = k_factor * (team1_won[idx] - expected_score(ratings[a], ratings[b]))
+        ratings[a] += delta
+        ratings[b] -= delta
+        start = end
+
+
+class RatingService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def recompute(self) -> Tuple[int, int]:
+        """Пересчет рейтингов всех команд по истории матчей
+
+        Возвращает число команд и учтенных матчей. На время пересчета
+        запись результатов блокируется, чтобы инкрементальные обновления
+        не потерялись.
+        """
+        await self.db.execute(text("LOCK TABLE matches IN SHARE MODE"))
+
+        result = await self.db.execute(text("SELECT id FROM teams ORDER BY id"))
+        team_ids = np.fromiter(result.scalars(), dtype=np.int64)
+        ratings = np.full(len(team_ids), settings.RATING_INITIAL, dtype=np.float64)
+
+        query = text("""
+            SELECT team1_id, team2_id, winner_id
+            FROM matches
+            WHERE status = 'completed'
+            AND winner_id IS NOT NULL
+            AND team1_id IS NOT NULL
+            AND team2_id IS NOT NULL
+            ORDER BY end_time NULLS FIRST, id
+        """).execution_options(yield_per=settings.RATING_RECOMPUTE_BATCH)
+
+        matches = 0
+        stream = await self.db.stream(query)
+        async for rows in stream.partitions():
+            batch = np.array(rows, dtype=np.int64).reshape(-1, 3)
+            team1 = np.searchsorted(team_ids, batch[:, 0])
+            team2 = np.searchsorted(team_ids, batch[:, 1])
+            # Матчи удаленных команд пропускаются
+            known = (
+                (team1 < len(team_ids)) & (team2 < len(team_ids))
+                & (team_ids[np.minimum(team1, len(team_ids) - 1)] == batch[:, 0])
+                & (team_ids[np.minimum(team2, len(team_ids) - 1)] == batch[:, 1])
+            )
+            replay(
+                ratings,
+                team1[known],
+                team2[known],
+                (batch[known, 2] == batch[known, 0]).astype(np.float64),
+                settings.RATING_K_FACTOR,
+            )
+            matches += int(known.sum())
+
+        await self.db.execute(
+            text("""
+                UPDATE teams t
+                SET rating = r.rating
+                FROM unnest(
+                    CAST(:team_ids AS INTEGER[]),
+                    CAST(:ratings AS DOUBLE PRECISION[])
+                ) AS r(team_id, rating)
+                WHERE t.id = r.team_id
+            """),
+            {"team_ids": team_ids.tolist(), "ratings": ratings.tolist()}
+        )
+        await self.db.commit()
+        return len(team_ids), matches
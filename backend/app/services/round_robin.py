@@ -0,0 +1,111 @@
+"""Круговая система: расписание по методу вращения (circle method).
+
+Первая команда группы закреплена, остальные сдвигаются на одну позицию
+каждый тур. Любой тур вычисляется напрямую по номеру за O(N), поэтому
+расписание можно создавать по одному туру, не строя всю таблицу.
+"""
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.services.bracket_generator import BracketPlan, SOURCE_TEAM, GROUP
+
+
+def split_groups(team_ids: Sequence[int], group_count: int) -> List[List[int]]:
+    """Распределение команд по группам «змейкой»"""
+    group_count = max(1, min(group_count, len(team_ids) // 2 or 1))
+    groups: List[List[int]] = [[] for _ in range(group_count)]
+    for i, team_id in enumerate(team_ids):
+        lap, offset = divmod(i, group_count)
+        groups[offset if lap % 2 == 0 else group_count - 1 - offset].append(team_id)
+    return groups
+
+
+def round_count(team_count: int) -> int:
+    """Количество туров в группе"""
+    return team_count - 1 if team_count % 2 == 0 else team_count
+
+
+def round_pairings(team_ids: Sequence[int], round_index: int) -> List[Tuple[int, int]]:
+    """Пары (хозяева, гости) одного тура, round_index начинается с 0
+
+    При четном числе команд пара с закрепленной командой меняет хозяина
+    каждый тур, остальные пары — через одну, и число домашних матчей у команд
+    отличается не больше чем на один. При нечетном числе каждая команда
+    играет четное число матчей, и хозяин выбирается по _odd_home так, что
+    дома и в гостях их поровну.
+    """
+    teams: List[Optional[int]] = list(team_ids)
+    odd = len(teams) % 2 == 1
+    if odd:
+        teams.append(None)
+    n = len(teams)
+    if n < 2:
+        return []
+
+    others = teams[1:]
+    shift = round_index % (n - 1)
+    arrangement = [teams[0]] + others[len(others) - shift:] + others[:len(others) - shift]
+    label = {team: k for k, team in enumerate(others)}
+
+    pairs = []
+    for i in range(n // 2):
+        home, away = arrangement[i], arrangement[n - 1 - i]
+        if home is None or away is None:
+            continue
+        if odd:
+            swap = not _odd_home(label, home, away, n - 1)
+        else:
+            swap = (round_index % 2 == 1) if i == 0 else (i % 2 == 1)
+        if swap:
+            home, away = away, home
+        pairs.append((home, away))
+    return pairs
+
+
+def _odd_home(label: Dict[Optional[int], int], a: int, b: int, m: int) -> bool:
+    """Играет ли a дома против b в группе с фиктивной командой
+
+    Вращающиеся команды занимают позиции 0..m-1 по кругу, последняя из них
+    фиктивная (bye). Команда x принимает соперников на (m - 1) / 2 позиций
+    впереди себя по кругу. Если среди них фиктивная, x недосчитывается
+    домашнего матча и принимает закрепленную команду; та в итоге тоже
+    играет дома ровно в половине матчей.
+    """
+    half = (m - 1) // 2
+    dummy = label[None]
+    if a not in label:
+        return not 1 <= (dummy - label[b]) % m <= half
+    if b not in label:
+        return 1 <= (dummy - label[a]) % m <= half
+    return 1 <= (label[b] - label[a]) % m <= half
+
+
+def group_fixtures(
+    groups: Sequence[Sequence[int]], rounds: Sequence[int]
+) -> Iterator[Tuple[int, int, int, int]]:
+    """Матчи указанных туров для всех групп: (тур, позиция, хозяева, гости)
+
+    Номера туров начинаются с 1, позиции сквозные по всем группам тура.
+    """
+    for round_number in rounds:
+        position = 0
+        for group in groups:
+            if round_number > round_count(len(group)):
+                continue
+            for home, away in round_pairings(sorted(group), round_number - 1):
+                position += 1
+                yield round_number, position, home, away
+
+
+def round_robin(groups: Sequence[Sequence[int]], rounds: Sequence[int]) -> BracketPlan:
+    """План матчей групповой стадии для сохранения через BracketService"""
+    plan = BracketPlan()
+    for round_number, position, home, away in group_fixtures(groups, rounds):
+        i = plan.add_match(round_number, position, GROUP)
+        plan.set_source(i, 0, SOURCE_TEAM, home)
+        plan.set_source(i, 1, SOURCE_TEAM, away)
+    return plan.resolve()
+
+
+def total_matches(groups: Sequence[Sequence[int]]) -> int:
+    """Общее число матчей групповой стадии"""
+    return sum(len(g) * (len(g) - 1) // 2 for g in groups)
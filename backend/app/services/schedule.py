@@ -0,0 +1,125 @@
+"""Расписание матчей турнира на ограниченное число площадок.
+
+Сетка рассматривается как граф зависимостей: матч можно начать после
+матчей, из которых приходят его участники, и после предыдущего матча
+каждой заранее известной команды, плюс время отдыха. Используется списочное
+планирование по критическому пути: освободившаяся площадка получает готовый
+матч с самым длинным оставшимся путем до конца турнира. Сложность
+O((матчи + связи) · log матчей).
+"""
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from app.services.bracket_generator import BRACKET_TYPES, NO_MATCH, BracketPlan
+
+# Финалы обычно длиннее остальных матчей
+DURATION_FACTORS = {"grand_final": 1.5, "grand_final_reset": 1.5}
+
+
+def match_duration(bracket_type: str, base: timedelta) -> float:
+    """Оценка длительности матча в секундах"""
+    return base.total_seconds() * DURATION_FACTORS.get(bracket_type, 1.0)
+
+
+def dependencies(
+    next_index: Sequence[int],
+    loser_next_index: Sequence[int],
+    team1: Sequence[Optional[int]],
+    team2: Sequence[Optional[int]],
+) -> List[List[int]]:
+    """Последователи каждого матча; индексы должны идти в порядке игры"""
+    successors: List[List[int]] = [[] for _ in next_index]
+    last_match: Dict[int, int] = {}
+    for i in range(len(next_index)):
+        for target in (next_index[i], loser_next_index[i]):
+            if target != NO_MATCH and target is not None:
+                successors[i].append(target)
+        # Известная команда не играет два матча одновременно
+        for team_id in (team1[i], team2[i]):
+            if team_id:
+                if team_id in last_match:
+                    successors[last_match[team_id]].append(i)
+                last_match[team_id] = i
+    return successors
+
+
+def critical_path_schedule(
+    durations: Sequence[float],
+    successors: Sequence[Sequence[int]],
+    slots: int,
+    rest: float = 0.0,
+) -> List[float]:
+    """Время начала матчей (от нуля) при slots параллельных площадках"""
+    count = len(durations)
+    predecessors = [0] * count
+    for targets in successors:
+        for j in targets:
+            predecessors[j] += 1
+
+    # Длина критического пути от начала матча до конца турнира
+    priority = [0.0] * count
+    for i in range(count - 1, -1, -1):
+        tail = max((rest + priority[j] for j in successors[i]), default=0.0)
+        priority[i] = durations[i] + tail
+
+    ready = [0.0] * count
+    start = [0.0] * count
+    # Матчи, у которых сыграны все предшественники: (время готовности, индекс)
+    waiting = [(0.0, i) for i in range(count) if predecessors[i] == 0]
+    heapq.heapify(waiting)
+    # Готовые к началу матчи по убыванию приоритета
+    available: List[tuple] = []
+    free = [0.0] * max(1, slots)
+    # Время планирования не убывает, поэтому все матчи из available уже готовы
+    now = 0.0
+
+    for _ in range(count):
+        slot_time = max(now, heapq.heappop(free))
+        if not available and waiting and waiting[0][0] > slot_time:
+            slot_time = waiting[0][0]
+        now = slot_time
+        while waiting and waiting[0][0] <= slot_time:
+            _, i = heapq.heappop(waiting)
+            heapq.heappush(available, (-priority[i], i))
+
+        _, i = heapq.heappop(available)
+        start[i] = slot_time
+        finish = slot_time + durations[i]
+        heapq.heappush(free, finish)
+
+        for j in successors[i]:
+            ready[j] = max(ready[j], finish + rest)
+            predecessors[j] -= 1
+            if predecessors[j] == 0:
+                heapq.heappush(waiting, (ready[j], j))
+
+    return start
+
+
+def schedule_plan(
+    plan: BracketPlan,
+    start: datetime,
+    slots: int,
+    duration: timedelta,
+    rest: timedelta,
+) -> List[datetime]:
+    """Время начала для каждого матча плана (по индексам плана)"""
+    indices = plan.kept_indices()
+    position = {i: k for k, i in enumerate(indices)}
+    successors = dependencies(
+        [position.get(plan.next_index[i], NO_MATCH) for i in indices],
+        [position.get(plan.loser_next_index[i], NO_MATCH) for i in indices],
+        [plan.team1[i] for i in indices],
+        [plan.team2[i] for i in indices],
+    )
+    offsets = critical_path_schedule(
+        [match_duration(BRACKET_TYPES[plan.bracket_type[i]], duration) for i in indices],
+        successors,
+        slots,
+        rest.total_seconds(),
+    )
+    times = [start] * len(plan)
+    for k, i in enumerate(indices):
+        times[i] = start + timedelta(seconds=offsets[k])
+    return times
@@ -0,0 +1,32 @@
+"""Посев команд перед генерацией сетки.
+
+Порядок посева вычисляется в памяти одной сортировкой по данным, загруженным
+вместе с турниром: сначала команды с ручным посевом, затем остальные по
+убыванию рейтинга. Равные команды упорядочиваются жребием.
+"""
+import random
+from typing import List, Optional, Sequence
+
+# Рейтинг команды, для которой он не задан
+DEFAULT_RATING = 1500.0
+
+
+def seed_order(
+    team_ids: Sequence[int],
+    seeds: Sequence[Optional[int]],
+    ratings: Sequence[Optional[float]],
+    rng: Optional[random.Random] = None,
+) -> List[int]:
+    """id команд в порядке посева, списки seeds и ratings выровнены по team_ids"""
+    rng = rng or random.Random()
+    keys = [
+        (
+            seed is None,
+            seed or 0,
+            -(DEFAULT_RATING if rating is None else rating),
+            rng.random(),
+        )
+        for seed, rating in zip(seeds, ratings)
+    ]
+    order = sorted(range(len(team_ids)), key=keys.__getitem__)
+    return [team_ids[i] for i in order]
@@ -0,0 +1,91 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from fastapi import HTTPException
+from typing import Dict, List, Optional
+
+from app.db.queries import queries
+from app.services.tiebreak import GroupTable
+
+# Очки за победу в турнирной таблице
+POINTS_PER_WIN = 3
+
+class StandingsService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_standings(self, tournament_id: int) -> List[Dict]:
+        """Турнирная таблица: чтение готовых строк, O(число команд)
+
+        В круговом турнире места внутри группы при равенстве очков
+        распределяются по дополнительным показателям (см. tiebreak).
+        """
+        params = {"tournament_id": tournament_id}
+        tournament = await queries.fetchrow(self.db, "tournament_type", params)
+        if tournament is None:
+            raise HTTPException(status_code=404, detail="Турнир не найден")
+
+        rows = [row._asdict() for row in await queries.fetch(self.db, "tournament_standings", params)]
+
+        groups: Dict[Optional[int], List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(row["group_number"], []).append(row)
+
+        if tournament.type == "round_robin" and self._has_ties(groups):
+            groups = await self._break_ties(tournament_id, groups)
+
+        standings = []
+        for group in groups.values():
+            for rank, row in enumerate(group, 1):
+                row["rank"] = rank
+                standings.append(row)
+        return standings
+
+    async def _break_ties(
+        self, tournament_id: int, groups: Dict[Optional[int], List[Dict]]
+    ) -> Dict[Optional[int], List[Dict]]:
+        """Порядок команд в группах с равными очками по результатам матчей"""
+        query = text("""
+            SELECT m.team1_id, m.team2_id, m.score_team1, m.score_team2, m.winner_id
+            FROM matches m
+            JOIN bracket b ON b.match_id = m.id
+            WHERE b.tournament_id = :tournament_id
+            AND b.bracket_type = 'group'
+            AND m.status = 'completed'
+        """)
+        result = await self.db.execute(query, {"tournament_id": tournament_id})
+        results = result.fetchall()
+
+        ordered = {}
+        for group_number, rows in groups.items():
+            if not self._has_ties({group_number: rows}):
+                ordered[group_number] = rows
+                continue
+            members = {row["team_id"] for row in rows}
+            table = GroupTable(
+                [row["team_id"] for row in rows],
+                (r for r in results if r.team1_id in members and r.team2_id in members),
+                [row["seed"] for row in rows],
+                POINTS_PER_WIN,
+            )
+            by_id = {row["team_id"]: row for row in rows}
+            ordered[group_number] = [by_id[team_id] for team_id in table.ranking()]
+        return ordered
+
+    @staticmethod
+    def _has_ties(groups: Dict[Optional[int], List[Dict]]) -> bool:
+        """Есть ли в какой-либо группе команды с одинаковыми очками"""
+        return any(
+            len({row["points"] for row in rows}) < len(rows) for rows in groups.values()
+        )
+
+    async def create_rows(self, tournament_id: int, team_ids: List[int]) -> None:
+        """Пустые строки таблицы для участников запущенного турнира"""
+        await self.db.execute(
+            text("""
+                INSERT INTO standings (tournament_id, team_id)
+                SELECT :tournament_id, team_id
+                FROM unnest(CAST(:team_ids AS INTEGER[])) AS team_id
+                ON CONFLICT (tournament_id, team_id) DO NOTHING
+            """),
+            {"tournament_id": tournament_id, "team_ids": team_ids}
+        )
@@ -0,0 +1,210 @@
+"""Швейцарская система: жеребьевка следующего тура по таблице.
+
+Таблица строится за один проход по результатам турнира: очки, множества
+соперников, число сыгранных матчей и баланс «хозяева/гости» хранятся
+в словарях по id команды, поэтому жеребьевка не обращается к БД. Команды делятся на группы по очкам,
+внутри группы верхняя половина играет с нижней; если пара невозможна без
+повторной встречи, команда переходит в следующую группу, а неудачный выбор
+пары пересматривается перебором с возвратом. Повторные встречи допускаются,
+только когда жеребьевки без них нет.
+"""
+import math
+from bisect import bisect_right
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from app.services.bracket_generator import BracketPlan, SOURCE_TEAM, SWISS
+
+# Очки за победу и за пропуск тура (bye)
+WIN_POINTS = 1
+BYE_POINTS = 1
+# Предел шагов поиска пар без повторных встреч
+PAIRING_SEARCH_LIMIT = 20000
+
+
+class SwissStandings:
+    """Таблица швейцарского турнира после сыгранных туров"""
+
+    def __init__(
+        self,
+        team_ids: Sequence[int],
+        results: Iterable[Tuple[int, int, Optional[int]]],
+        rounds_played: int,
+    ) -> None:
+        self.seed = {team_id: i for i, team_id in enumerate(team_ids)}
+        self.score: Dict[int, int] = dict.fromkeys(team_ids, 0)
+        self.opponents: Dict[int, Set[int]] = {t: set() for t in team_ids}
+        self.beaten: Dict[int, List[int]] = {t: [] for t in team_ids}
+        self.color: Dict[int, int] = dict.fromkeys(team_ids, 0)
+        # Сыгранные матчи, включая повторные встречи с тем же соперником
+        self.played: Dict[int, int] = dict.fromkeys(team_ids, 0)
+
+        for home, away, winner_id in results:
+            if home not in self.seed or away not in self.seed:
+                continue
+            self.opponents[home].add(away)
+            self.opponents[away].add(home)
+            self.played[home] += 1
+            self.played[away] += 1
+            self.color[home] += 1
+            self.color[away] -= 1
+            if winner_id is not None:
+                loser_id = away if winner_id == home else home
+                self.score[winner_id] += WIN_POINTS
+                self.beaten[winner_id].append(loser_id)
+
+        # Тур без матча означает bye
+        self.byes = {t: rounds_played - self.played[t] for t in team_ids}
+        for t, byes in self.byes.items():
+            self.score[t] += BYE_POINTS * byes
+
+        self.buchholz = {
+            t: sum(self.score[o] for o in self.opponents[t]) for t in team_ids
+        }
+        self.sonneborn_berger = {
+            t: sum(self.score[o] for o in self.beaten[t]) for t in team_ids
+        }
+
+    def ranking(self) -> List[int]:
+        """Команды по местам: очки, Бухгольц, Зоннеборн-Бергер, посев"""
+        return sorted(
+            self.seed,
+            key=lambda t: (
+                -self.score[t],
+                -self.buchholz[t],
+                -self.sonneborn_berger[t],
+                self.seed[t],
+            ),
+        )
+
+    def pair(self, round_index: int) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+        """Пары (хозяева, гости) следующего тура и команда с bye"""
+        ranking = self.ranking()
+        bye = None
+        if len(ranking) % 2:
+            # Bye получает худшая команда, у которой его еще не было
+            bye = next(
+                (t for t in reversed(ranking) if self.byes[t] == 0), ranking[-1]
+            )
+            ranking.remove(bye)
+
+        pairs = self._pair_without_rematches(ranking)
+        if pairs is None:
+            pairs = self._pair_by_groups(ranking)
+
+        return [self._colors(a, b, round_index) for a, b in pairs], bye
+
+    def _pair_without_rematches(self, ranking: List[int]) -> Optional[List[Tuple[int, int]]]:
+        """Пары без повторных встреч перебором с возвратом
+
+        Сильнейшая свободная команда получает соперников в порядке жеребьевки
+        по группам: верхняя половина группы против нижней, затем остальные
+        из группы, затем нижние группы. Если выбор заводит в тупик, пара
+        пересматривается. Перебор идет по явному стеку, список свободных
+        команд меняется на месте и восстанавливается при возврате. None — пар
+        без повторов нет или поиск превысил PAIRING_SEARCH_LIMIT шагов.
+        """
+        free = list(ranking)
+        # Выбранные пары: команда, соперник, его индекс в free и остаток кандидатов
+        stack: List[Tuple[int, int, int, Iterator[int]]] = []
+        candidates = self._candidates(free)
+        steps = 0
+        while free:
+            steps += 1
+            if steps > PAIRING_SEARCH_LIMIT:
+                return None
+            j = next(candidates, None)
+            if j is None:
+                if not stack:
+                    return None
+                team, partner, j, candidates = stack.pop()
+                free.insert(0, team)
+                free.insert(j, partner)
+                continue
+            team, partner = free[0], free[j]
+            stack.append((team, partner, j, candidates))
+            del free[j]
+            del free[0]
+            candidates = self._candidates(free)
+        return [(team, partner) for team, partner, _, _ in stack]
+
+    def _candidates(self, free: List[int]) -> Iterator[int]:
+        """Индексы возможных соперников free[0] без повторов, по предпочтению
+
+        Генератор читает free лениво: следующий кандидат запрашивается, только
+        когда free возвращен в состояние на момент создания генератора.
+        """
+        team = free[0]
+        # free упорядочен по убыванию очков, группа команды — его начало
+        size = bisect_right(free, -self.score[team], key=lambda t: -self.score[t])
+        half = size // 2
+        opponents = self.opponents[team]
+        order = chain(range(max(half, 1), size), range(half - 1, 0, -1), range(size, len(free)))
+        for j in order:
+            if free[j] not in opponents:
+                yield j
+
+    def _pair_by_groups(self, ranking: List[int]) -> List[Tuple[int, int]]:
+        """Жадная жеребьевка по группам, допускающая повторные встречи"""
+        groups: Dict[int, List[int]] = {}
+        for t in ranking:
+            groups.setdefault(self.score[t], []).append(t)
+
+        pairs: List[Tuple[int, int]] = []
+        floaters: List[int] = []
+        for score in sorted(groups, reverse=True):
+            pool = floaters + groups[score]
+            floaters = self._pair_group(pool, pairs)
+
+        # Оставшиеся пары без вариантов допускают повторную встречу
+        for i in range(0, len(floaters) - 1, 2):
+            pairs.append((floaters[i], floaters[i + 1]))
+        return pairs
+
+    def _pair_group(self, pool: List[int], pairs: List[Tuple[int, int]]) -> List[int]:
+        """Пары внутри группы, возвращает команды, перешедшие ниже"""
+        half = len(pool) // 2
+        top, bottom = pool[:half], pool[half:]
+        taken = [False] * len(bottom)
+        floaters = []
+
+        for i, team in enumerate(top):
+            opponents = self.opponents[team]
+            partner = None
+            # Сначала ищем соперника, начиная с симметричной позиции
+            for j in chain(range(i, len(bottom)), range(0, min(i, len(bottom)))):
+                if not taken[j] and bottom[j] not in opponents:
+                    partner = j
+                    break
+            if partner is None:
+                floaters.append(team)
+                continue
+            taken[partner] = True
+            pairs.append((team, bottom[partner]))
+
+        floaters.extend(t for j, t in enumerate(bottom) if not taken[j])
+        # Внутри перешедших тоже пробуем составить пары без повторов
+        if len(floaters) > 1 and len(floaters) < len(pool):
+            return self._pair_group(floaters, pairs)
+        return floaters
+
+    def _colors(self, a: int, b: int, round_index: int) -> Tuple[int, int]:
+        """Хозяином становится команда, которая чаще играла в гостях"""
+        if self.color[a] != self.color[b]:
+            return (a, b) if self.color[a] < self.color[b] else (b, a)
+        return (a, b) if round_index % 2 == 0 else (b, a)
+
+
+def swiss_round_count(team_count: int) -> int:
+    """Число туров, достаточное для определения единственного лидера"""
+    return max(1, math.ceil(math.log2(team_count)))
+
+
+def swiss_round(pairs: Sequence[Tuple[int, int]], round_number: int) -> BracketPlan:
+    """План матчей тура для сохранения через BracketService"""
+    plan = BracketPlan()
+    for position, (home, away) in enumerate(pairs, 1):
+        i = plan.add_match(round_number, position, SWISS)
+        plan.set_source(i, 0, SOURCE_TEAM, home)
+        plan.set_source(i, 1, SOURCE_TEAM, away)
+    return plan.resolve()
@@ -0,0 +1,100 @@
+"""Распределение мест в группе при равенстве очков.
+
+Результаты группы загружаются один раз в матрицы команда × команда: победы,
+разница счета и число встреч. Все показатели — очки в мини-турнире равных
+команд, разница в нем, общая разница, забитые и коэффициент Бухгольца —
+получаются срезами и суммами этих матриц. Если мини-турнир разделил равных
+команд лишь частично, он повторяется среди оставшихся равными.
+"""
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class GroupTable:
+    """Результаты группы в виде матриц"""
+
+    def __init__(
+        self,
+        team_ids: Sequence[int],
+        results: Iterable[Tuple[int, int, int, int, int]],
+        seeds: Optional[Sequence[Optional[int]]] = None,
+        win_points: int = 3,
+    ) -> None:
+        self.win_points = win_points
+        self.team_ids = list(team_ids)
+        n = len(self.team_ids)
+        ids = np.asarray(self.team_ids, dtype=np.int64)
+        sorter = np.argsort(ids)
+
+        # Столбцы: команда 1, команда 2, счет 1, счет 2, победитель
+        data = np.array(list(results), dtype=np.int64).reshape(-1, 5)
+        pos1 = np.searchsorted(ids, data[:, 0], sorter=sorter).clip(max=n - 1)
+        pos2 = np.searchsorted(ids, data[:, 1], sorter=sorter).clip(max=n - 1)
+        a, b = sorter[pos1], sorter[pos2]
+        known = (ids[a] == data[:, 0]) & (ids[b] == data[:, 1])
+        data, a, b = data[known], a[known], b[known]
+
+        self.wins = np.zeros((n, n), dtype=np.int64)
+        self.diff = np.zeros((n, n), dtype=np.int64)
+        self.games = np.zeros((n, n), dtype=np.int64)
+        first_won = data[:, 4] == data[:, 0]
+        np.add.at(self.wins, (a[first_won], b[first_won]), 1)
+        np.add.at(self.wins, (b[~first_won], a[~first_won]), 1)
+        np.add.at(self.diff, (a, b), data[:, 2] - data[:, 3])
+        np.add.at(self.diff, (b, a), data[:, 3] - data[:, 2])
+        np.add.at(self.games, (a, b), 1)
+        np.add.at(self.games, (b, a), 1)
+        scored = np.zeros(n, dtype=np.int64)
+        np.add.at(scored, a, data[:, 2])
+        np.add.at(scored, b, data[:, 3])
+
+        self.points = win_points * self.wins.sum(axis=1)
+        self.score_difference = self.diff.sum(axis=1)
+        self.scored = scored
+        self.buchholz = self.games @ self.points
+        # Последний критерий — посев, команды без посева идут после посеянных
+        seed_values = [s if s is not None else n + i + 1 for i, s in enumerate(seeds or [None] * n)]
+        self.seed = np.asarray(seed_values, dtype=np.int64)
+
+    def ranking(self) -> List[int]:
+        """id команд группы по местам"""
+        order = np.argsort(-self.points, kind="stable")
+        result: List[int] = []
+        for block in self._blocks(order, self.points[order]):
+            result.extend(self._break(block) if len(block) > 1 else block)
+        return [self.team_ids[i] for i in result]
+
+    def _break(self, block: np.ndarray) -> List[int]:
+        """Порядок команд, набравших одинаковые очки"""
+        sub = np.ix_(block, block)
+        mini_points = self.win_points * self.wins[sub].sum(axis=1)
+        mini_diff = self.diff[sub].sum(axis=1)
+
+        # Очки и разница в мини-турнире, затем общие показатели и посев
+        keys = (
+            self.seed[block],
+            -self.buchholz[block],
+            -self.scored[block],
+            -self.score_difference[block],
+            -mini_diff,
+            -mini_points,
+        )
+        order = np.lexsort(keys)
+        mini = np.stack((mini_points, mini_diff), axis=1)[order]
+        blocks = list(self._blocks(order, mini))
+        if len(blocks) == 1:
+            return block[order].tolist()
+
+        result: List[int] = []
+        for part in blocks:
+            # Мини-турнир повторяется среди команд, оставшихся равными
+            result.extend(self._break(block[part]) if len(part) > 1 else block[part].tolist())
+        return result
+
+    @staticmethod
+    def _blocks(order: np.ndarray, values: np.ndarray):
+        """Группы подряд идущих элементов с одинаковыми значениями"""
+        values = values.reshape(len(order), -1)
+        changes = np.flatnonzero(np.any(values[1:] != values[:-1], axis=1)) + 1
+        return np.split(order, changes)
@@ -1,17 +1,60 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
 
 from app.models.user import UserRole
-from app.schemas.tournament import TournamentCreate, Tournament, TournamentUpdate
+from app.models.tournament import TournamentStatus
+from app.schemas.tournament import ScheduleParams, TeamSeed, TournamentCreate, TournamentResponse, TournamentUpdate
+from app.services.bracket import BracketService
+from app.services.conflicts import ConflictService
+from app.core.config import settings
+from app.services.bracket_generator import (
+    BRACKET_TYPES, NO_MATCH, BracketPlan, single_elimination, double_elimination,
+)
+from app.services.round_robin import round_robin, round_count, split_groups, total_matches
+from app.services.schedule import critical_path_schedule, dependencies, match_duration, schedule_plan
+from app.services.seeding import seed_order
+from app.services.standings import StandingsService
+from app.services.swiss import SwissStandings, swiss_round, swiss_round_count
+
+# Круговой турнир с большим числом матчей создается по одному туру
+ROUND_ROBIN_EAGER_MATCHES = 2000
+
+# Заголовок с машиночитаемой причиной отказа в регистрации
+REGISTRATION_ERROR_HEADER = "X-Registration-Error"
+
+REGISTRATION_ERRORS = {
+    "tournament_not_found": (404, "Tournament not found"),
+    "registration_closed": (400, "Tournament is not in registration phase"),
+    "tournament_full": (400, "Tournament has reached maximum number of teams"),
+    "team_not_found": (404, "Team not found"),
+    "not_captain": (403, "Only team captain can register team for tournament"),
+    "already_registered": (400, "Team is already registered for this tournament"),
+    "not_member": (403, "Only team members can remove team from tournament"),
+    "not_registered": (404, "Team is not registered for this tournament"),
+}
+
+# Код PostgreSQL для нарушения уникальности
+UNIQUE_VIOLATION = "23505"
+
+
+def registration_error(reason: str) -> HTTPException:
+    """Отказ в регистрации с текстом для клиента и кодом причины в заголовке"""
+    status_code, detail = REGISTRATION_ERRORS[reason]
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={REGISTRATION_ERROR_HEADER: reason},
+    )
 
 class TournamentService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def create_tournament(self, tournament: TournamentCreate, user_id: int) -> Tournament:
+    async def create_tournament(self, tournament: TournamentCreate, user_id: int) -> TournamentResponse:
         """Создание нового турнира"""
         query = text("""
             INSERT INTO tournaments (
@@ -48,15 +91,175 @@ class TournamentService:
             await self.db.rollback()
             raise HTTPException(status_code=400, detail=str(e))
 
-    async def start_tournament(self, tournament_id: int) -> Tournament:
+    async def register_team(self, tournament_id: int, team_id: int, user_id: int) -> Dict:
+        """Регистрация команды на турнир одним запросом
+
+        Строка турнира блокируется вместе с проверкой current_teams:
+        одновременные регистрации выполняются по очереди, и после ожидания
+        условие вместимости перепроверяется на свежей версии строки, поэтому
+        команд не может стать больше max_teams. Вставка в tournament_teams
+        выполняется, только если проверка прошла; счетчик увеличивает
+        триггер. Если регистрация не прошла, по остальным столбцам
+        определяется причина.
+        """
+        query = text("""
+            WITH team AS (
+                SELECT id, captain_id FROM teams WHERE id = :team_id
+            ),
+            seat AS (
+                SELECT t.id, t.current_teams
+                FROM tournaments t, team
+                WHERE t.id = :tournament_id
+                AND team.captain_id = :user_id
+                AND t.status = 'REGISTRATION'
+                AND (t.max_teams IS NULL OR t.current_teams < t.max_teams)
+                AND NOT EXISTS (
+                    SELECT 1 FROM tournament_teams
+                    WHERE tournament_id = :tournament_id AND team_id = :team_id
+                )
+                FOR UPDATE OF t
+            ),
+            registered AS (
+                INSERT INTO tournament_teams (tournament_id, team_id)
+                SELECT id, :team_id FROM seat
+                RETURNING tournament_id
+            )
+            SELECT
+                EXISTS (SELECT 1 FROM registered) AS registered,
+                COALESCE((SELECT current_teams + 1 FROM seat), t.current_teams) AS current_teams,
+                t.id IS NOT NULL AS tournament_exists,
+                t.status,
+                t.max_teams,
+                team.id IS NOT NULL AS team_exists,
+                team.captain_id,
+                EXISTS (
+                    SELECT 1 FROM tournament_teams
+                    WHERE tournament_id = :tournament_id AND team_id = :team_id
+                ) AS already_registered
+            FROM (SELECT 1) AS one
+            LEFT JOIN tournaments t ON t.id = :tournament_id
+            LEFT JOIN team ON true
+        """)
+        params = {"tournament_id": tournament_id, "team_id": team_id, "user_id": user_id}
+        try:
+            result = await self.db.execute(query, params)
+            row = result.fetchone()
+            if not row.registered:
+                await self.db.rollback()
+                raise registration_error(self._registration_failure(row, user_id))
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            # Параллельная регистрация той же команды успела раньше
+            if getattr(e.orig, "sqlstate", None) == UNIQUE_VIOLATION:
+                raise registration_error("already_registered")
+            raise
+
+        return {
+            "status": "success",
+            "message": "Team successfully registered for tournament",
+            "current_teams": row.current_teams,
+            "max_teams": row.max_teams,
+        }
+
+    async def unregister_team(self, tournament_id: int, team_id: int, user_id: int) -> Dict:
+        """Снятие команды с турнира; место освобождает триггер"""
+        query = text("""
+            WITH team AS (
+                SELECT
+                    id,
+                    captain_id = :user_id OR EXISTS (
+                        SELECT 1 FROM team_members
+                        WHERE team_id = teams.id AND user_id = :user_id
+                    ) AS is_member
+                FROM teams
+                WHERE id = :team_id
+            ),
+            removed AS (
+                DELETE FROM tournament_teams tt
+                USING team
+                WHERE tt.tournament_id = :tournament_id
+                AND tt.team_id = team.id
+                AND team.is_member
+                RETURNING tt.tournament_id
+            )
+            SELECT
+                EXISTS (SELECT 1 FROM removed) AS removed,
+                t.id IS NOT NULL AS tournament_exists,
+                team.id IS NOT NULL AS team_exists,
+                team.is_member
+            FROM (SELECT 1) AS one
+            LEFT JOIN tournaments t ON t.id = :tournament_id
+            LEFT JOIN team ON true
+        """)
+        params = {"tournament_id": tournament_id, "team_id": team_id, "user_id": user_id}
+        result = await self.db.execute(query, params)
+        row = result.fetchone()
+        if not row.removed:
+            await self.db.rollback()
+            if not row.tournament_exists:
+                raise registration_error("tournament_not_found")
+            if not row.team_exists:
+                raise registration_error("team_not_found")
+            if not row.is_member:
+                raise registration_error("not_member")
+            raise registration_error("not_registered")
+        await self.db.commit()
+
+        return {
+            "status": "success",
+            "message": "Team successfully left the tournament",
+        }
+
+    async def resync_team_counts(self) -> int:
+        """Сверка current_teams с tournament_teams; число исправленных турниров"""
+        result = await self.db.execute(text("SELECT sync_tournament_teams_count()"))
+        fixed = result.scalar()
+        await self.db.commit()
+        return fixed
+
+    @staticmethod
+    def _registration_failure(row, user_id: int) -> str:
+        """Причина, по которой регистрация не заняла место
+
+        Состояние прочитано на момент начала запроса; если место заняли
+        параллельно, все проверки проходят и остается переполнение.
+        """
+        if not row.tournament_exists:
+            return "tournament_not_found"
+        if row.status != TournamentStatus.REGISTRATION.value:
+            return "registration_closed"
+        if row.max_teams and row.current_teams >= row.max_teams:
+            return "tournament_full"
+        if not row.team_exists:
+            return "team_not_found"
+        if row.captain_id != user_id:
+            return "not_captain"
+        if row.already_registered:
+            return "already_registered"
+        return "tournament_full"
+
+    async def start_tournament(self, tournament_id: int) -> TournamentResponse:
         """Запуск турнира и генерация сетки"""
-        # Проверяем статус турнира
+        # Блокируем турнир, чтобы сетка не сгенерировалась дважды
         query = text("""
-            SELECT t.*, COUNT(tt.team_id) as team_count
+            SELECT
+                t.*,
+                p.team_ids,
+                p.seeds,
+                p.ratings
             FROM tournaments t
-            LEFT JOIN tournament_teams tt ON t.id = tt.tournament_id
-            WHERE t.id = :tournament_id AND tt.status = 'accepted'
-            GROUP BY t.id
+            LEFT JOIN LATERAL (
+                SELECT
+                    array_agg(tt.team_id ORDER BY tt.team_id) as team_ids,
+                    array_agg(tt.seed ORDER BY tt.team_id) as seeds,
+                    array_agg(tm.rating ORDER BY tt.team_id) as ratings
+                FROM tournament_teams tt
+                JOIN teams tm ON tm.id = tt.team_id
+                WHERE tt.tournament_id = t.id AND tt.status = 'accepted'
+            ) p ON TRUE
+            WHERE t.id = :tournament_id
+            FOR UPDATE OF t
         """)
         
         result = await self.db.execute(query, {"tournament_id": tournament_id})
@@ -65,15 +268,307 @@ class TournamentService:
         if not tournament:
             raise HTTPException(status_code=404, detail="Турнир не найден")
             
-        if tournament.status != 'registration':
+        if tournament.status != TournamentStatus.REGISTRATION.value:
             raise HTTPException(status_code=400, detail="Турнир уже запущен или завершен")
             
-        if tournament.team_count < 2:
+        if len(tournament.team_ids or []) < 2:
             raise HTTPException(status_code=400, detail="Недостаточно команд для начала турнира")
 
-        # Вызываем процедуру генерации матчей
-        query = text("CALL generate_tournament_matches(:tournament_id)")
-        await self.db.execute(query, {"tournament_id": tournament_id})
-        await self.db.commit()
-        
-        return tournament 
\ No newline at end of file
+        # Посев по ручным номерам и рейтингу, без запросов по каждой команде
+        team_ids = seed_order(tournament.team_ids, tournament.seeds, tournament.ratings)
+        groups = None
+
+        if tournament.type == "single_elimination":
+            plan = single_elimination(team_ids)
+        elif tournament.type == "double_elimination":
+            plan = double_elimination(team_ids)
+        elif tournament.type == "round_robin":
+            groups = split_groups(team_ids, tournament.group_count)
+            rounds = range(1, max(round_count(len(g)) for g in groups) + 1)
+            # Большие лиги получают только первый тур, остальные создаются по мере игры
+            if total_matches(groups) > ROUND_ROBIN_EAGER_MATCHES:
+                rounds = [1]
+            plan = round_robin(groups, rounds)
+        elif tournament.type == "swiss":
+            pairs, _ = SwissStandings(team_ids, [], 0).pair(0)
+            plan = swiss_round(pairs, 1)
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Генерация сетки для типа {tournament.type} не поддерживается"
+            )
+
+        try:
+            await self._save_seeds(tournament_id, team_ids, groups)
+            await StandingsService(self.db).create_rows(tournament_id, team_ids)
+            await BracketService(self.db).create_bracket(
+                tournament_id, plan, self._start_times(tournament, plan)
+            )
+            await self.db.execute(
+                text("UPDATE tournaments SET status = :status WHERE id = :tournament_id"),
+                {
+                    "status": TournamentStatus.IN_PROGRESS.value,
+                    "tournament_id": tournament_id
+                }
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+        BracketService.invalidate(tournament_id)
+        return tournament
+
+    async def generate_next_round(self, tournament_id: int) -> int:
+        """Создание следующего тура кругового или швейцарского турнира"""
+        query = text("""
+            SELECT
+                t.*,
+                (
+                    SELECT MAX(b.round)
+                    FROM bracket b
+                    WHERE b.tournament_id = t.id
+                ) as last_round,
+                (
+                    SELECT COUNT(*)
+                    FROM matches m
+                    WHERE m.tournament_id = t.id AND m.status != 'completed'
+                ) as pending_matches
+            FROM tournaments t
+            WHERE t.id = :tournament_id
+            FOR UPDATE OF t
+        """)
+        result = await self.db.execute(query, {"tournament_id": tournament_id})
+        tournament = result.fetchone()
+
+        if not tournament:
+            raise HTTPException(status_code=404, detail="Турнир не найден")
+
+        if tournament.status != TournamentStatus.IN_PROGRESS.value:
+            raise HTTPException(status_code=400, detail="Турнир не запущен")
+
+        next_round = (tournament.last_round or 0) + 1
+        if tournament.type == "round_robin":
+            plan = await self._round_robin_round(tournament_id, next_round)
+        elif tournament.type == "swiss":
+            if tournament.pending_matches:
+                raise HTTPException(status_code=400, detail="Текущий тур еще не завершен")
+            plan = await self._swiss_round(tournament_id, next_round)
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Туры не создаются для типа {tournament.type}"
+            )
+
+        try:
+            await BracketService(self.db).create_bracket(
+                tournament_id, plan, self._start_times(tournament, plan)
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+        BracketService.invalidate(tournament_id)
+        return next_round
+
+    async def _round_robin_round(self, tournament_id: int, round_number: int) -> BracketPlan:
+        """Матчи тура групповой стадии по сохраненному составу групп"""
+        query = text("""
+            SELECT team_id, group_number
+            FROM tournament_teams
+            WHERE tournament_id = :tournament_id
+            AND status = 'accepted'
+            AND group_number IS NOT NULL
+        """)
+        result = await self.db.execute(query, {"tournament_id": tournament_id})
+        groups_by_number: Dict[int, List[int]] = {}
+        for team_id, group_number in result.fetchall():
+            groups_by_number.setdefault(group_number, []).append(team_id)
+        groups = list(groups_by_number.values())
+
+        if not groups or round_number > max(round_count(len(g)) for g in groups):
+            raise HTTPException(status_code=400, detail="Все туры уже созданы")
+
+        return round_robin(groups, [round_number])
+
+    async def _swiss_round(self, tournament_id: int, round_number: int) -> BracketPlan:
+        """Жеребьевка тура швейцарской системы по всем результатам турнира"""
+        query = text("""
+            SELECT team_id
+            FROM tournament_teams
+            WHERE tournament_id = :tournament_id AND status = 'accepted'
+            ORDER BY seed NULLS LAST, team_id
+        """)
+        result = await self.db.execute(query, {"tournament_id": tournament_id})
+        team_ids = [row.team_id for row in result.fetchall()]
+
+        if round_number > swiss_round_count(len(team_ids)):
+            raise HTTPException(status_code=400, detail="Все туры уже созданы")
+
+        query = text("""
+            SELECT m.team1_id, m.team2_id, m.winner_id
+            FROM matches m
+            JOIN bracket b ON b.match_id = m.id
+            WHERE b.tournament_id = :tournament_id AND b.bracket_type = 'swiss'
+        """)
+        result = await self.db.execute(query, {"tournament_id": tournament_id})
+        standings = SwissStandings(team_ids, result.fetchall(), round_number - 1)
+        pairs, _ = standings.pair(round_number - 1)
+        return swiss_round(pairs, round_number)
+
+    async def set_seeds(self, tournament_id: int, seeds: List[TeamSeed]) -> None:
+        """Ручной посев команд до начала турнира"""
+        result = await self.db.execute(
+            text("SELECT status FROM tournaments WHERE id = :tournament_id"),
+            {"tournament_id": tournament_id}
+        )
+        tournament_status = result.scalar()
+        if tournament_status is None:
+            raise HTTPException(status_code=404, detail="Турнир не найден")
+        if tournament_status != TournamentStatus.REGISTRATION.value:
+            raise HTTPException(status_code=400, detail="Посев можно менять только до начала турнира")
+
+        numbers = [item.seed for item in seeds if item.seed is not None]
+        if len(numbers) != len(set(numbers)):
+            raise HTTPException(status_code=400, detail="Номера посева повторяются")
+
+        try:
+            await self.db.execute(
+                text("""
+                    UPDATE tournament_teams tt
+                    SET seed = s.seed
+                    FROM unnest(
+                        CAST(:team_ids AS INTEGER[]),
+                        CAST(:seeds AS INTEGER[])
+                    ) AS s(team_id, seed)
+                    WHERE tt.tournament_id = :tournament_id AND tt.team_id = s.team_id
+                """),
+                {
+                    "tournament_id": tournament_id,
+                    "team_ids": [item.team_id for item in seeds],
+                    "seeds": [item.seed for item in seeds]
+                }
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def _save_seeds(
+        self, tournament_id: int, team_ids: List[int], groups: Optional[List[List[int]]]
+    ) -> None:
+        """Сохранение итогового посева и состава групп одним запросом"""
+        group_of = {
+            team_id: n for n, group in enumerate(groups or [], 1) for team_id in group
+        }
+        await self.db.execute(
+            text("""
+                UPDATE tournament_teams tt
+                SET seed = s.seed, group_number = s.group_number
+                FROM unnest(
+                    CAST(:team_ids AS INTEGER[]),
+                    CAST(:seeds AS INTEGER[]),
+                    CAST(:group_numbers AS INTEGER[])
+                ) AS s(team_id, seed, group_number)
+                WHERE tt.tournament_id = :tournament_id AND tt.team_id = s.team_id
+            """),
+            {
+                "tournament_id": tournament_id,
+                "team_ids": team_ids,
+                "seeds": list(range(1, len(team_ids) + 1)),
+                "group_numbers": [group_of.get(team_id) for team_id in team_ids]
+            }
+        )
+
+    async def reschedule(self, tournament_id: int, params: ScheduleParams) -> Dict:
+        """Перестроение расписания несыгранных матчей, запись одним запросом
+
+        Пересечения с матчами команд в других турнирах не мешают записи,
+        а возвращаются вместе с результатом.
+        """
+        query = text("""
+            SELECT t.start_date, m.id, m.team1_id, m.team2_id, m.status,
+                   b.bracket_type, b.round, b.position, b.next_match_id, b.loser_next_match_id
+            FROM tournaments t
+            JOIN bracket b ON b.tournament_id = t.id
+            JOIN matches m ON m.id = b.match_id
+            WHERE t.id = :tournament_id
+        """)
+        result = await self.db.execute(query, {"tournament_id": tournament_id})
+        order = {name: i for i, name in enumerate(BRACKET_TYPES)}
+        # Порядок частей сетки и раундов совпадает с порядком игры
+        rows = sorted(
+            result.fetchall(),
+            key=lambda r: (order.get(r.bracket_type, len(order)), r.round, r.position)
+        )
+        if not rows:
+            raise HTTPException(status_code=404, detail="Турнирная сетка не найдена")
+
+        position = {row.id: k for k, row in enumerate(rows)}
+        slots = params.slots or settings.SCHEDULE_SLOTS
+        duration = timedelta(minutes=params.match_minutes or settings.MATCH_DURATION_MINUTES)
+        rest = settings.MATCH_REST_MINUTES if params.rest_minutes is None else params.rest_minutes
+        # Сыгранные и идущие матчи не переносятся и не занимают площадки
+        pending = [row.status in ("scheduled", None) for row in rows]
+        offsets = critical_path_schedule(
+            [
+                match_duration(row.bracket_type, duration) if pending[k] else 0.0
+                for k, row in enumerate(rows)
+            ],
+            dependencies(
+                [position.get(row.next_match_id, NO_MATCH) for row in rows],
+                [position.get(row.loser_next_match_id, NO_MATCH) for row in rows],
+                [row.team1_id for row in rows],
+                [row.team2_id for row in rows],
+            ),
+            slots,
+            rest * 60,
+        )
+
+        start = params.start_time or self._first_start(rows[0].start_date)
+        match_ids = [row.id for k, row in enumerate(rows) if pending[k]]
+        start_times = [
+            start + timedelta(seconds=offsets[k]) for k in range(len(rows)) if pending[k]
+        ]
+        conflicts = await ConflictService(self.db).check_schedule([
+            (row.id, row.team1_id, row.team2_id, start + timedelta(seconds=offsets[k]))
+            for k, row in enumerate(rows) if pending[k]
+        ])
+        try:
+            await self.db.execute(
+                text("""
+                    UPDATE matches m
+                    SET start_time = s.start_time
+                    FROM unnest(
+                        CAST(:match_ids AS INTEGER[]),
+                        CAST(:start_times AS TIMESTAMPTZ[])
+                    ) AS s(match_id, start_time)
+                    WHERE m.id = s.match_id
+                """),
+                {"match_ids": match_ids, "start_times": start_times}
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            raise HTTPException(status_code=400, detail=str(e))
+
+        BracketService.invalidate(tournament_id)
+        return {"scheduled_matches": len(match_ids), "conflicts": conflicts}
+
+    @staticmethod
+    def _first_start(start_date: Optional[datetime]) -> datetime:
+        """Начало расписания: дата турнира, но не раньше текущего момента"""
+        now = datetime.now(timezone.utc)
+        return max(start_date, now) if start_date else now
+
+    @classmethod
+    def _start_times(cls, tournament, plan: BracketPlan) -> List[datetime]:
+        """Время начала матчей по расписанию с параметрами по умолчанию"""
+        return schedule_plan(
+            plan,
+            cls._first_start(tournament.start_date),
+            settings.SCHEDULE_SLOTS,
+            timedelta(minutes=settings.MATCH_DURATION_MINUTES),
+            timedelta(minutes=settings.MATCH_REST_MINUTES),
+        )
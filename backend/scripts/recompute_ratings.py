@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import asyncio
+from app.db.session import SessionLocal
+from app.services.rating import RatingService
+
+async def recompute_ratings():
+    # Пересчет рейтингов всех команд после изменения параметров Эло
+    async with SessionLocal() as session:
+        teams, matches = await RatingService(session).recompute()
+        print(f"Recomputed ratings for {teams} teams from {matches} matches")
+
+if __name__ == "__main__":
+    asyncio.run(recompute_ratings())
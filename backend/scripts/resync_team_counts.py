@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import asyncio
+from app.db.session import SessionLocal
+from app.services.tournament import TournamentService
+
+async def resync_team_counts():
+    # Восстановление счетчика команд турниров после ручных правок tournament_teams
+    async with SessionLocal() as session:
+        fixed = await TournamentService(session).resync_team_counts()
+        print(f"Fixed team counts for {fixed} tournaments")
+
+if __name__ == "__main__":
+    asyncio.run(resync_team_counts())
@@ -0,0 +1,104 @@
+import random
+from collections import Counter
+
+import pytest
+
+from app.services.bracket_generator import (
+    GRAND_FINAL, GRAND_FINAL_RESET, NO_MATCH, NO_TEAM, double_elimination, single_elimination,
+)
+
+TEAM_COUNTS = [2, 3, 5, 6, 7, 9, 12, 13, 17, 24, 33]
+
+
+def assert_links_kept(plan):
+    kept = set(plan.kept_indices())
+    for i in kept:
+        for target in (plan.next_index[i], plan.loser_next_index[i]):
+            assert target == NO_MATCH or target in kept
+
+
+def play(plan, rng):
+    """Прогон сетки со случайными победителями: поражения команд и чемпион"""
+    slots = {
+        i: [plan.team1[i] or None, plan.team2[i] or None]
+        for i in plan.kept_indices()
+    }
+    losses = Counter()
+    champion = None
+    grand_final_loser = None
+    for i in plan.kept_indices():
+        team1, team2 = slots[i]
+        if plan.bracket_type[i] == GRAND_FINAL_RESET and team1 is None:
+            # Финал выиграла команда из верхней сетки, переигровки нет
+            continue
+        assert team1 is not None and team2 is not None
+        winner, loser = (team1, team2) if rng.random() < 0.5 else (team2, team1)
+        losses[loser] += 1
+        if plan.bracket_type[i] == GRAND_FINAL:
+            grand_final_loser = loser
+        # После победы участника из верхней сетки в финале продолжения нет
+        advance = plan.bracket_type[i] != GRAND_FINAL or winner == team2
+        if plan.next_index[i] != NO_MATCH and advance:
+            target = slots[plan.next_index[i]]
+            assert target[plan.next_slot[i] - 1] is None
+            target[plan.next_slot[i] - 1] = winner
+        else:
+            champion = winner
+        if plan.loser_next_index[i] != NO_MATCH and advance:
+            target = slots[plan.loser_next_index[i]]
+            assert target[plan.loser_next_slot[i] - 1] is None
+            target[plan.loser_next_slot[i] - 1] = loser
+    return losses, champion, grand_final_loser
+
+
+@pytest.mark.parametrize("team_count", TEAM_COUNTS)
+def test_single_elimination_every_other_team_loses_once(team_count):
+    teams = list(range(1, team_count + 1))
+    plan = single_elimination(teams)
+    assert_links_kept(plan)
+    assert len(plan.kept_indices()) == team_count - 1
+    rng = random.Random(team_count)
+    for _ in range(20):
+        losses, champion, _ = play(plan, rng)
+        assert losses[champion] == 0
+        assert all(losses[t] == 1 for t in teams if t != champion)
+
+
+@pytest.mark.parametrize("team_count", TEAM_COUNTS)
+def test_double_elimination_with_reset_every_other_team_loses_twice(team_count):
+    teams = list(range(1, team_count + 1))
+    plan = double_elimination(teams, grand_final_reset=True)
+    assert_links_kept(plan)
+    rng = random.Random(team_count)
+    for _ in range(50):
+        losses, champion, _ = play(plan, rng)
+        assert losses[champion] <= 1
+        assert all(losses[t] == 2 for t in teams if t != champion)
+
+
+@pytest.mark.parametrize("team_count", TEAM_COUNTS)
+def test_double_elimination_without_reset(team_count):
+    teams = list(range(1, team_count + 1))
+    plan = double_elimination(teams, grand_final_reset=False)
+    assert_links_kept(plan)
+    assert GRAND_FINAL_RESET not in plan.bracket_type
+    rng = random.Random(team_count)
+    for _ in range(50):
+        losses, champion, grand_final_loser = play(plan, rng)
+        assert losses[champion] <= 1
+        for t in teams:
+            if t == champion:
+                continue
+            # Команда из верхней сетки, проигравшая финал, выбывает с одним поражением
+            expected = {1, 2} if t == grand_final_loser else {2}
+            assert losses[t] in expected
+
+
+def test_byes_go_to_top_seeds():
+    plan = single_elimination([1, 2, 3, 4, 5, 6])
+    first_round = [
+        (plan.team1[i], plan.team2[i])
+        for i in plan.kept_indices() if plan.team1[i] != NO_TEAM and plan.team2[i] != NO_TEAM
+    ]
+    playing = {t for pair in first_round for t in pair}
+    assert 1 not in playing and 2 not in playing
@@ -0,0 +1,244 @@
+"""Запрос записи результатов на живой PostgreSQL.
+
+Схема из alembic/sql/init.sql создается во временной схеме базы
+TEST_DATABASE_URL (postgresql+asyncpg://...); без нее тесты пропускаются.
+"""
+import asyncio
+import os
+import uuid
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("asyncpg")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("fastapi")
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.services.match import RESULTS_QUERY
+from app.services.standings import POINTS_PER_WIN
+
+DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+INIT_SQL = Path(__file__).resolve().parent.parent / "alembic" / "sql" / "init.sql"
+K_FACTOR = 32.0
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL не задан")
+
+
+@pytest.fixture(scope="module")
+def schema():
+    name = f"test_results_{uuid.uuid4().hex[:8]}"
+    dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+
+    async def execute(*statements):
+        conn = await asyncpg.connect(dsn)
+        try:
+            for statement in statements:
+                await conn.execute(statement)
+        finally:
+            await conn.close()
+
+    asyncio.run(execute(
+        f"CREATE SCHEMA {name}", f"SET search_path TO {name}", INIT_SQL.read_text()
+    ))
+    yield name
+    asyncio.run(execute(f"DROP SCHEMA {name} CASCADE"))
+
+
+def run(schema, scenario):
+    """Выполнение сценария в одной транзакции, которая затем откатывается"""
+    async def main():
+        engine = create_async_engine(
+            DATABASE_URL, connect_args={"server_settings": {"search_path": schema}}
+        )
+        try:
+            async with engine.connect() as conn:
+                try:
+                    return await scenario(conn)
+                finally:
+                    await conn.rollback()
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+async def add_teams(conn, count):
+    tournament_id = (await conn.execute(text("""
+        INSERT INTO tournaments (name, type, status, max_teams)
+        VALUES ('Cup', 'double_elimination', 'IN_PROGRESS', 8)
+        RETURNING id
+    """))).scalar()
+    teams = []
+    for _ in range(count):
+        teams.append((await conn.execute(
+            text("INSERT INTO teams (name) VALUES (:name) RETURNING id"),
+            {"name": f"team-{uuid.uuid4().hex}"}
+        )).scalar())
+    await conn.execute(
+        text("""
+            INSERT INTO tournament_teams (tournament_id, team_id)
+            SELECT :tournament_id, unnest(CAST(:teams AS INTEGER[]))
+        """),
+        {"tournament_id": tournament_id, "teams": teams}
+    )
+    return tournament_id, teams
+
+
+async def add_match(
+    conn, tournament_id, team1, team2, bracket_type, round_number, position,
+    next_match=None, next_slot=None, loser_next=None, loser_next_slot=None,
+):
+    match_id = (await conn.execute(
+        text("""
+            INSERT INTO matches (tournament_id, team1_id, team2_id, start_time, status)
+            VALUES (:tournament_id, :team1, :team2, CURRENT_TIMESTAMP, 'scheduled')
+            RETURNING id
+        """),
+        {"tournament_id": tournament_id, "team1": team1, "team2": team2}
+    )).scalar()
+    await conn.execute(
+        text("""
+            INSERT INTO bracket (
+                tournament_id, match_id, bracket_type, round, position,
+                next_match_id, next_slot, loser_next_match_id, loser_next_slot
+            )
+            VALUES (
+                :tournament_id, :match_id, :bracket_type, :round, :position,
+                :next_match, :next_slot, :loser_next, :loser_next_slot
+            )
+        """),
+        {
+            "tournament_id": tournament_id, "match_id": match_id,
+            "bracket_type": bracket_type, "round": round_number, "position": position,
+            "next_match": next_match, "next_slot": next_slot,
+            "loser_next": loser_next, "loser_next_slot": loser_next_slot,
+        }
+    )
+    return match_id
+
+
+async def apply(conn, results):
+    rows = await conn.execute(RESULTS_QUERY, {
+        "match_ids": [match_id for match_id, _, _ in results],
+        "scores_team1": [score1 for _, score1, _ in results],
+        "scores_team2": [score2 for _, _, score2 in results],
+        "k_factor": K_FACTOR,
+        "win_points": POINTS_PER_WIN,
+    })
+    return rows.fetchall()
+
+
+async def match(conn, match_id):
+    return (await conn.execute(
+        text("SELECT team1_id, team2_id, status, winner_id FROM matches WHERE id = :id"),
+        {"id": match_id}
+    )).fetchone()
+
+
+def test_winners_advance_into_both_slots(schema):
+    async def scenario(conn):
+        tournament_id, (a, b, c, d) = await add_teams(conn, 4)
+        final = await add_match(conn, tournament_id, None, None, "winners", 2, 1)
+        first = await add_match(conn, tournament_id, a, b, "winners", 1, 1, final, 1)
+        second = await add_match(conn, tournament_id, c, d, "winners", 1, 2, final, 2)
+
+        rows = await apply(conn, [(first, 2, 1), (second, 0, 3)])
+        assert {row.id for row in rows} == {first, second}
+        assert final in rows[0].affected_match_ids
+
+        final_match = await match(conn, final)
+        assert (final_match.team1_id, final_match.team2_id) == (a, d)
+
+        standings = {
+            row.team_id: row for row in (await conn.execute(
+                text("SELECT * FROM standings WHERE tournament_id = :id"), {"id": tournament_id}
+            )).fetchall()
+        }
+        assert standings[a].wins == 1 and standings[a].points == POINTS_PER_WIN
+        assert standings[b].losses == 1 and standings[b].score_for == 1
+
+        ratings = dict((await conn.execute(
+            text("SELECT id, rating FROM teams WHERE id = ANY(CAST(:ids AS INTEGER[]))"),
+            {"ids": [a, b, c, d]}
+        )).fetchall())
+        assert ratings[a] > 1500 > ratings[b]
+        assert sum(ratings.values()) == pytest.approx(4 * 1500)
+
+    run(schema, scenario)
+
+
+def test_loser_drops_into_losers_bracket(schema):
+    async def scenario(conn):
+        tournament_id, (a, b) = await add_teams(conn, 2)
+        upper = await add_match(conn, tournament_id, None, None, "winners", 2, 1)
+        lower = await add_match(conn, tournament_id, None, None, "losers", 1, 1)
+        first = await add_match(
+            conn, tournament_id, a, b, "winners", 1, 1, upper, 1, lower, 2
+        )
+
+        await apply(conn, [(first, 1, 2)])
+        upper_match = await match(conn, upper)
+        lower_match = await match(conn, lower)
+        assert (upper_match.team1_id, upper_match.team2_id) == (b, None)
+        assert (lower_match.team1_id, lower_match.team2_id) == (None, a)
+
+    run(schema, scenario)
+
+
+async def add_grand_final(conn):
+    tournament_id, (upper_champion, lower_champion) = await add_teams(conn, 2)
+    reset = await add_match(conn, tournament_id, None, None, "grand_final_reset", 1, 1)
+    final = await add_match(
+        conn, tournament_id, upper_champion, lower_champion, "grand_final", 1, 1,
+        reset, 1, reset, 2
+    )
+    return final, reset, upper_champion, lower_champion
+
+
+def test_grand_final_won_from_upper_bracket_cancels_reset(schema):
+    async def scenario(conn):
+        final, reset, upper_champion, _ = await add_grand_final(conn)
+
+        rows = await apply(conn, [(final, 3, 0)])
+        assert rows[0].winner_id == upper_champion
+        assert reset in rows[0].affected_match_ids
+
+        reset_match = await match(conn, reset)
+        assert reset_match.status == "cancelled"
+        assert (reset_match.team1_id, reset_match.team2_id) == (None, None)
+
+    run(schema, scenario)
+
+
+def test_grand_final_won_from_lower_bracket_plays_reset(schema):
+    async def scenario(conn):
+        final, reset, upper_champion, lower_champion = await add_grand_final(conn)
+
+        await apply(conn, [(final, 0, 3)])
+        reset_match = await match(conn, reset)
+        assert reset_match.status == "scheduled"
+        assert (reset_match.team1_id, reset_match.team2_id) == (lower_champion, upper_champion)
+
+    run(schema, scenario)
+
+
+def test_completed_match_is_not_recorded_twice(schema):
+    async def scenario(conn):
+        tournament_id, (a, b) = await add_teams(conn, 2)
+        only = await add_match(conn, tournament_id, a, b, "winners", 1, 1)
+
+        assert len(await apply(conn, [(only, 2, 0)])) == 1
+        assert await apply(conn, [(only, 0, 2)]) == []
+
+        completed = await match(conn, only)
+        assert completed.status == "completed" and completed.winner_id == a
+        played = (await conn.execute(
+            text("SELECT played FROM standings WHERE tournament_id = :id AND team_id = :team"),
+            {"id": tournament_id, "team": a}
+        )).scalar()
+        assert played == 1
+
+    run(schema, scenario)
@@ -0,0 +1,42 @@
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("pydantic")
+
+from app.schemas.match import Match, MatchPage
+
+# Столбцы match_detail и matches_page: m.* и названия из соединений
+MatchRow = namedtuple("MatchRow", [
+    "id", "tournament_id", "team1_id", "team2_id", "score_team1", "score_team2",
+    "start_time", "end_time", "status", "winner_id", "notes",
+    "tournament_name", "team1_name", "team2_name", "winner_name",
+])
+
+
+def match_row(**values):
+    row = dict(
+        id=1, tournament_id=1, team1_id=10, team2_id=20, score_team1=None,
+        score_team2=None, start_time=datetime(2026, 10, 17, tzinfo=timezone.utc),
+        end_time=None, status="scheduled", winner_id=None, notes=None,
+        tournament_name="Cup", team1_name="A", team2_name="B", winner_name=None,
+    )
+    row.update(values)
+    return MatchRow(**row)
+
+
+def test_match_detail_row_validates():
+    match = Match.model_validate(match_row())
+    assert match.team1_name == "A"
+
+
+def test_bracket_match_without_teams_validates():
+    match = Match.model_validate(match_row(team1_id=None, team2_id=None, team1_name=None, team2_name=None))
+    assert match.team1_id is None and match.team2_id is None
+
+
+def test_match_page_carries_cursor():
+    page = MatchPage.model_validate({"items": [match_row()], "next_cursor": "abc"})
+    assert page.next_cursor == "abc"
+    assert page.items[0].id == 1
@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("asyncpg")
+pytest.importorskip("sqlalchemy")
+
+from app.db.queries import to_positional
+
+
+def test_repeated_name_reuses_position():
+    sql, names = to_positional("SELECT * FROM t WHERE a = :x OR b = :y OR c = :x")
+    assert sql == "SELECT * FROM t WHERE a = $1 OR b = $2 OR c = $1"
+    assert names == ["x", "y"]
+
+
+def test_type_cast_is_not_a_parameter():
+    sql, names = to_positional("SELECT :ids::integer[], CAST(:at AS TIMESTAMPTZ), 'a'::text")
+    assert sql == "SELECT $1::integer[], CAST($2 AS TIMESTAMPTZ), 'a'::text"
+    assert names == ["ids", "at"]
+
+
+def test_query_without_parameters():
+    assert to_positional("SELECT 1") == ("SELECT 1", [])
@@ -0,0 +1,27 @@
+from collections import Counter
+
+import pytest
+
+from app.services.round_robin import round_count, round_pairings
+
+
+@pytest.mark.parametrize("team_count", range(3, 21))
+def test_every_pair_meets_once_with_balanced_home_games(team_count):
+    teams = list(range(100, 100 + team_count))
+    home = Counter()
+    games = Counter()
+    met = set()
+    for round_index in range(round_count(team_count)):
+        for team1, team2 in round_pairings(teams, round_index):
+            pair = frozenset((team1, team2))
+            assert pair not in met
+            met.add(pair)
+            home[team1] += 1
+            games[team1] += 1
+            games[team2] += 1
+
+    assert len(met) == team_count * (team_count - 1) // 2
+    spread = max(home[t] for t in teams) - min(home[t] for t in teams)
+    assert spread == (0 if team_count % 2 else 1)
+    for team in teams:
+        assert abs(2 * home[team] - games[team]) <= 1
@@ -0,0 +1,69 @@
+import random
+import time
+
+from app.services.swiss import SwissStandings, swiss_round_count
+
+
+def play_event(team_count, rng):
+    """Турнир со случайными результатами: (результаты, выданные bye)"""
+    teams = list(range(1, team_count + 1))
+    results = []
+    byes = dict.fromkeys(teams, 0)
+    for round_index in range(swiss_round_count(team_count)):
+        standings = SwissStandings(teams, results, round_index)
+        for team in teams:
+            wins = sum(1 for _, _, winner in results if winner == team)
+            assert standings.score[team] == wins + byes[team]
+        pairs, bye = standings.pair(round_index)
+        if bye is not None:
+            byes[bye] += 1
+        results.extend((home, away, rng.choice([home, away])) for home, away in pairs)
+    return results, byes
+
+
+def rematches(results):
+    seen = set()
+    count = 0
+    for home, away, _ in results:
+        pair = frozenset((home, away))
+        count += pair in seen
+        seen.add(pair)
+    return count
+
+
+def test_no_rematches_when_pairing_exists():
+    rng = random.Random(16)
+    for _ in range(200):
+        results, _ = play_event(16, rng)
+        assert rematches(results) == 0
+
+
+def test_scores_and_byes_for_any_team_count():
+    rng = random.Random(40)
+    for _ in range(200):
+        team_count = rng.randint(4, 40)
+        results, byes = play_event(team_count, rng)
+        assert rematches(results) == 0
+        assert max(byes.values()) <= 1
+
+
+def test_rematch_does_not_count_as_bye():
+    results = [(1, 2, 1), (1, 2, 2), (3, 4, 3), (3, 4, 4)]
+    standings = SwissStandings([1, 2, 3, 4], results, 2)
+    assert all(byes == 0 for byes in standings.byes.values())
+    assert standings.score == {1: 1, 2: 1, 3: 1, 4: 1}
+
+
+def test_pairs_large_event_quickly():
+    rng = random.Random(5000)
+    teams = list(range(1, 5001))
+    results = []
+    for round_index in range(swiss_round_count(len(teams))):
+        standings = SwissStandings(teams, results, round_index)
+        started = time.perf_counter()
+        pairs, bye = standings.pair(round_index)
+        assert time.perf_counter() - started < 1.0
+        assert bye is None
+        assert len(pairs) == len(teams) // 2
+        results.extend((home, away, rng.choice([home, away])) for home, away in pairs)
+    assert rematches(results) == 0
@@ -0,0 +1,60 @@
+"""add double elimination links to bracket
+
+Revision ID: 3c1f7a9d2e4b
+Revises: bae454099e1d
+Create Date: 2026-10-17 09:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f7a9d2e4b'
+down_revision: Union[str, None] = 'bae454099e1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Слот следующего матча и ссылка для проигравшего
+    op.add_column('bracket', sa.Column('next_slot', sa.SmallInteger(), nullable=True))
+    op.add_column('bracket', sa.Column('loser_next_match_id', sa.Integer(), nullable=True))
+    op.add_column('bracket', sa.Column('loser_next_slot', sa.SmallInteger(), nullable=True))
+    op.add_column(
+        'bracket',
+        sa.Column('bracket_type', sa.String(20), nullable=False, server_default='winners')
+    )
+    op.create_foreign_key(
+        'fk_bracket_loser_next_match',
+        'bracket', 'matches',
+        ['loser_next_match_id'], ['id']
+    )
+    op.create_check_constraint('ck_bracket_next_slot', 'bracket', 'next_slot IN (1, 2)')
+    op.create_check_constraint('ck_bracket_loser_next_slot', 'bracket', 'loser_next_slot IN (1, 2)')
+
+    # Раунды верхней и нижней сетки нумеруются независимо
+    op.execute("ALTER TABLE bracket DROP CONSTRAINT IF EXISTS bracket_tournament_id_round_position_key")
+    op.create_unique_constraint(
+        'bracket_tournament_id_bracket_type_round_position_key',
+        'bracket',
+        ['tournament_id', 'bracket_type', 'round', 'position']
+    )
+
+def downgrade() -> None:
+    op.drop_constraint('bracket_tournament_id_bracket_type_round_position_key', 'bracket', type_='unique')
+    op.execute("DELETE FROM bracket WHERE bracket_type <> 'winners'")
+    op.create_unique_constraint(
+        'bracket_tournament_id_round_position_key',
+        'bracket',
+        ['tournament_id', 'round', 'position']
+    )
+    op.drop_constraint('ck_bracket_loser_next_slot', 'bracket', type_='check')
+    op.drop_constraint('ck_bracket_next_slot', 'bracket', type_='check')
+    op.drop_constraint('fk_bracket_loser_next_match', 'bracket', type_='foreignkey')
+    op.drop_column('bracket', 'bracket_type')
+    op.drop_column('bracket', 'loser_next_slot')
+    op.drop_column('bracket', 'loser_next_match_id')
+    op.drop_column('bracket', 'next_slot')
@@ -0,0 +1,35 @@
+"""add round robin groups
+
+Revision ID: 8e2d4b6a1f03
+Revises: 3c1f7a9d2e4b
+Create Date: 2026-10-17 09:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d4b6a1f03'
+down_revision: Union[str, None] = '3c1f7a9d2e4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Количество групп в круговом турнире
+    op.add_column(
+        'tournaments',
+        sa.Column('group_count', sa.Integer(), nullable=False, server_default='1')
+    )
+    op.create_check_constraint('ck_tournaments_group_count', 'tournaments', 'group_count >= 1')
+
+    # Группа, в которую попала команда
+    op.add_column('tournament_teams', sa.Column('group_number', sa.Integer(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('tournament_teams', 'group_number')
+    op.drop_constraint('ck_tournaments_group_count', 'tournaments', type_='check')
+    op.drop_column('tournaments', 'group_count')
@@ -0,0 +1,33 @@
+"""add swiss tournament type
+
+Revision ID: b7e94c0d5a21
+Revises: 8e2d4b6a1f03
+Create Date: 2026-10-17 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e94c0d5a21'
+down_revision: Union[str, None] = '8e2d4b6a1f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Тип турнира хранится в enum только в схеме из init.sql
+    conn = op.get_bind()
+    exists = conn.execute(
+        sa.text("SELECT 1 FROM pg_type WHERE typname = 'tournament_type'")
+    ).scalar()
+    if exists:
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE tournament_type ADD VALUE IF NOT EXISTS 'swiss'")
+
+def downgrade() -> None:
+    # Значение enum нельзя удалить без пересоздания типа
+    pass
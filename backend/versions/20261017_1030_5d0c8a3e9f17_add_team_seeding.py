@@ -0,0 +1,35 @@
+"""add team seeding
+
+Revision ID: 5d0c8a3e9f17
+Revises: b7e94c0d5a21
+Create Date: 2026-10-17 10:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0c8a3e9f17'
+down_revision: Union[str, None] = 'b7e94c0d5a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Рейтинг команды для посева
+    op.add_column(
+        'teams',
+        sa.Column('rating', sa.Float(), nullable=False, server_default='1500')
+    )
+
+    # Ручной или итоговый номер посева команды в турнире
+    op.add_column('tournament_teams', sa.Column('seed', sa.Integer(), nullable=True))
+    op.create_check_constraint('ck_tournament_teams_seed', 'tournament_teams', 'seed >= 1')
+
+def downgrade() -> None:
+    op.drop_constraint('ck_tournament_teams_seed', 'tournament_teams', type_='check')
+    op.drop_column('tournament_teams', 'seed')
+    op.drop_column('teams', 'rating')
@@ -0,0 +1,147 @@
+"""add standings table
+
+Revision ID: e41f6b2c7a90
+Revises: 5d0c8a3e9f17
+Create Date: 2026-10-17 11:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41f6b2c7a90'
+down_revision: Union[str, None] = '5d0c8a3e9f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'standings',
+        sa.Column('tournament_id', sa.Integer(), sa.ForeignKey('tournaments.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('team_id', sa.Integer(), sa.ForeignKey('teams.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('played', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('wins', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('losses', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('points', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_for', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('score_against', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index('idx_standings_team', 'standings', ['team_id'])
+
+    # Заполнение по уже сыгранным матчам: участники без матчей получают нули
+    op.execute("""
+        INSERT INTO standings (
+            tournament_id, team_id, played, wins, losses, points, score_for, score_against
+        )
+        SELECT
+            tt.tournament_id,
+            tt.team_id,
+            COUNT(r.team_id),
+            COUNT(r.team_id) FILTER (WHERE r.won),
+            COUNT(r.team_id) FILTER (WHERE NOT r.won),
+            3 * COUNT(r.team_id) FILTER (WHERE r.won),
+            COALESCE(SUM(r.score_for), 0),
+            COALESCE(SUM(r.score_against), 0)
+        FROM tournament_teams tt
+        LEFT JOIN (
+            SELECT m.tournament_id, m.team1_id AS team_id, m.winner_id = m.team1_id AS won,
+                   m.score_team1 AS score_for, m.score_team2 AS score_against
+            FROM matches m WHERE m.status = 'completed'
+            UNION ALL
+            SELECT m.tournament_id, m.team2_id, m.winner_id = m.team2_id,
+                   m.score_team2, m.score_team1
+            FROM matches m WHERE m.status = 'completed'
+        ) r ON r.tournament_id = tt.tournament_id AND r.team_id = tt.team_id
+        WHERE tt.status = 'accepted'
+        GROUP BY tt.tournament_id, tt.team_id
+    """)
+
+    # Функция и представление читают готовую таблицу вместо агрегации матчей
+    op.execute("""
+        CREATE OR REPLACE VIEW team_results AS
+        SELECT
+            t.id AS team_id,
+            t.name AS team_name,
+            COALESCE(SUM(s.played), 0) AS total_matches,
+            COALESCE(SUM(s.wins), 0) AS wins,
+            COALESCE(SUM(s.losses), 0) AS losses
+        FROM teams t
+        LEFT JOIN standings s ON s.team_id = t.id
+        GROUP BY t.id, t.name
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION get_tournament_standings(p_tournament_id INTEGER)
+        RETURNS TABLE (
+            team_id INTEGER,
+            team_name VARCHAR,
+            matches_played INTEGER,
+            wins INTEGER,
+            losses INTEGER,
+            points INTEGER
+        ) AS $$
+        BEGIN
+            RETURN QUERY
+            SELECT
+                t.id AS team_id,
+                t.name AS team_name,
+                s.played AS matches_played,
+                s.wins,
+                s.losses,
+                s.points
+            FROM standings s
+            JOIN teams t ON t.id = s.team_id
+            WHERE s.tournament_id = p_tournament_id
+            ORDER BY s.points DESC, s.score_for - s.score_against DESC;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+def downgrade() -> None:
+    # Прежние определения с агрегацией матчей, без зависимости от standings
+    op.execute("""
+        CREATE OR REPLACE VIEW team_results AS
+        SELECT
+            t.id AS team_id,
+            t.name AS team_name,
+            COUNT(DISTINCT m.id) AS total_matches,
+            COUNT(DISTINCT CASE WHEN m.winner_id = t.id THEN m.id END) AS wins,
+            COUNT(DISTINCT CASE WHEN m.status = 'completed' AND m.winner_id != t.id THEN m.id END) AS losses
+        FROM teams t
+        LEFT JOIN matches m ON (t.id = m.team1_id OR t.id = m.team2_id) AND m.status = 'completed'
+        GROUP BY t.id, t.name
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION get_tournament_standings(p_tournament_id INTEGER)
+        RETURNS TABLE (
+            team_id INTEGER,
+            team_name VARCHAR,
+            matches_played INTEGER,
+            wins INTEGER,
+            losses INTEGER,
+            points INTEGER
+        ) AS $$
+        BEGIN
+            RETURN QUERY
+            SELECT
+                t.id AS team_id,
+                t.name AS team_name,
+                COUNT(DISTINCT m.id) AS matches_played,
+                COUNT(DISTINCT CASE WHEN m.winner_id = t.id THEN m.id END) AS wins,
+                COUNT(DISTINCT CASE WHEN m.status = 'completed' AND m.winner_id != t.id THEN m.id END) AS losses,
+                COUNT(DISTINCT CASE WHEN m.winner_id = t.id THEN m.id END) * 3 AS points
+            FROM teams t
+            JOIN tournament_teams tt ON t.id = tt.team_id
+            LEFT JOIN matches m ON (t.id = m.team1_id OR t.id = m.team2_id)
+                AND m.tournament_id = p_tournament_id
+            WHERE tt.tournament_id = p_tournament_id
+            GROUP BY t.id, t.name
+            ORDER BY points DESC;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_index('idx_standings_team', table_name='standings')
+    op.drop_table('standings')
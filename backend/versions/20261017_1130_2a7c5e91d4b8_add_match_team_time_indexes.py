@@ -0,0 +1,28 @@
+"""add match team time indexes
+
+Revision ID: 2a7c5e91d4b8
+Revises: e41f6b2c7a90
+Create Date: 2026-10-17 11:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a7c5e91d4b8'
+down_revision: Union[str, None] = 'e41f6b2c7a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Поиск пересекающихся матчей команды по времени начала
+    op.create_index('idx_matches_team1_start', 'matches', ['team1_id', 'start_time'])
+    op.create_index('idx_matches_team2_start', 'matches', ['team2_id', 'start_time'])
+
+def downgrade() -> None:
+    op.drop_index('idx_matches_team2_start', table_name='matches')
+    op.drop_index('idx_matches_team1_start', table_name='matches')
@@ -0,0 +1,36 @@
+"""add keyset pagination indexes
+
+Revision ID: 7f3b2d8e6c14
+Revises: 2a7c5e91d4b8
+Create Date: 2026-10-17 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f3b2d8e6c14'
+down_revision: Union[str, None] = '2a7c5e91d4b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Постраничные списки по ключу (время, id): страница — диапазон индекса
+    op.drop_index('idx_matches_start_time', table_name='matches')
+    op.create_index('idx_matches_start_id', 'matches', ['start_time', 'id'])
+    op.create_index('idx_matches_tournament_start_id', 'matches', ['tournament_id', 'start_time', 'id'])
+    op.create_index('idx_tournaments_created_id', 'tournaments', ['created_at', 'id'])
+    op.create_index('idx_users_created_id', 'users', ['created_at', 'id'])
+    op.create_index('idx_backup_created_id', 'backup', ['created_at', 'id'])
+
+def downgrade() -> None:
+    op.drop_index('idx_backup_created_id', table_name='backup')
+    op.drop_index('idx_users_created_id', table_name='users')
+    op.drop_index('idx_tournaments_created_id', table_name='tournaments')
+    op.drop_index('idx_matches_tournament_start_id', table_name='matches')
+    op.drop_index('idx_matches_start_id', table_name='matches')
+    op.create_index('idx_matches_start_time', 'matches', ['start_time'])
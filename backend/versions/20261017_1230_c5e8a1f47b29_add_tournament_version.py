@@ -0,0 +1,130 @@
+"""add tournament version
+
+Revision ID: c5e8a1f47b29
+Revises: 7f3b2d8e6c14
+Create Date: 2026-10-17 12:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e8a1f47b29'
+down_revision: Union[str, None] = '7f3b2d8e6c14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Таблицы со столбцом tournament_id, изменения которых меняют ответы по турниру
+TOURNAMENT_TABLES = ('matches', 'bracket', 'tournament_teams')
+# Таблицы команд: изменение касается всех турниров команды
+TEAM_TABLES = ('teams', 'team_members')
+EVENTS = {'insert': ('INSERT', 'NEW TABLE AS new_rows'),
+          'update': ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+          'delete': ('DELETE', 'OLD TABLE AS old_rows')}
+
+
+def upgrade() -> None:
+    # Счетчик изменений турнира растет не более чем на 1 за транзакцию
+    op.add_column('tournaments', sa.Column('version', sa.BigInteger(), nullable=False, server_default='1'))
+    op.add_column('tournaments', sa.Column('version_xid', sa.BigInteger(), nullable=True))
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_tournament_version()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF NEW.version_xid IS DISTINCT FROM txid_current() THEN
+                NEW.version = OLD.version + 1;
+                NEW.version_xid = txid_current();
+            END IF;
+            NEW.updated_at = CURRENT_TIMESTAMP;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION touch_tournaments()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (SELECT tournament_id FROM old_rows)
+                AND version_xid IS DISTINCT FROM txid_current();
+            ELSE
+                UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (SELECT tournament_id FROM new_rows)
+                AND version_xid IS DISTINCT FROM txid_current();
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION touch_team_tournaments()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'teams' THEN
+                -- Название и рейтинг команды видны в ответах по турнирам
+                UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT tt.tournament_id
+                    FROM new_rows n
+                    JOIN old_rows o ON o.id = n.id
+                    JOIN tournament_teams tt ON tt.team_id = n.id
+                    WHERE n.name IS DISTINCT FROM o.name
+                    OR n.rating IS DISTINCT FROM o.rating
+                )
+                AND version_xid IS DISTINCT FROM txid_current();
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT tt.tournament_id FROM tournament_teams tt
+                    WHERE tt.team_id IN (SELECT team_id FROM old_rows)
+                )
+                AND version_xid IS DISTINCT FROM txid_current();
+            ELSE
+                UPDATE tournaments SET updated_at = CURRENT_TIMESTAMP
+                WHERE id IN (
+                    SELECT tt.tournament_id FROM tournament_teams tt
+                    WHERE tt.team_id IN (SELECT team_id FROM new_rows)
+                )
+                AND version_xid IS DISTINCT FROM txid_current();
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    op.execute("""
+        CREATE TRIGGER bump_tournament_version
+            BEFORE UPDATE ON tournaments
+            FOR EACH ROW
+            EXECUTE FUNCTION bump_tournament_version()
+    """)
+
+    # Триггеры уровня оператора: пакетное изменение матчей трогает турнир один раз
+    for table in TOURNAMENT_TABLES + TEAM_TABLES:
+        function = 'touch_tournaments' if table in TOURNAMENT_TABLES else 'touch_team_tournaments'
+        for suffix, (event, referencing) in EVENTS.items():
+            if table == 'teams' and event != 'UPDATE':
+                continue
+            op.execute(f"""
+                CREATE TRIGGER {table}_touch_tournaments_{suffix}
+                    AFTER {event} ON {table}
+                    REFERENCING {referencing}
+                    FOR EACH STATEMENT
+                    EXECUTE FUNCTION {function}()
+            """)
+
+def downgrade() -> None:
+    for table in TOURNAMENT_TABLES + TEAM_TABLES:
+        for suffix in EVENTS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_touch_tournaments_{suffix} ON {table}")
+    op.execute("DROP TRIGGER IF EXISTS bump_tournament_version ON tournaments")
+    op.execute("DROP FUNCTION IF EXISTS touch_team_tournaments()")
+    op.execute("DROP FUNCTION IF EXISTS touch_tournaments()")
+    op.execute("DROP FUNCTION IF EXISTS bump_tournament_version()")
+    op.drop_column('tournaments', 'version_xid')
+    op.drop_column('tournaments', 'version')
@@ -0,0 +1,55 @@
+"""add tournament current_teams
+
+Revision ID: e4a9c2f61b73
+Revises: c5e8a1f47b29
+Create Date: 2026-10-17 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c2f61b73'
+down_revision: Union[str, None] = 'c5e8a1f47b29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Число зарегистрированных команд; место занимается вместе с регистрацией
+    op.add_column('tournaments', sa.Column('current_teams', sa.Integer(), nullable=False, server_default='0'))
+    op.execute("""
+        UPDATE tournaments t
+        SET current_teams = tt.team_count
+        FROM (
+            SELECT tournament_id, COUNT(*) AS team_count
+            FROM tournament_teams
+            GROUP BY tournament_id
+        ) tt
+        WHERE tt.tournament_id = t.id
+    """)
+    op.create_check_constraint('tournaments_current_teams_check', 'tournaments', 'current_teams >= 0')
+
+    # Проверка с COUNT(*) на каждую вставку не защищает от одновременных
+    # регистраций; вместимость теперь проверяется при занятии места
+    op.execute("DROP TRIGGER IF EXISTS check_team_registration_trigger ON tournament_teams")
+
+
+def downgrade() -> None:
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'check_team_registration') THEN
+                CREATE TRIGGER check_team_registration_trigger
+                    BEFORE INSERT ON tournament_teams
+                    FOR EACH ROW
+                    EXECUTE FUNCTION check_team_registration();
+            END IF;
+        END
+        $$
+    """)
+    op.drop_constraint('tournaments_current_teams_check', 'tournaments', type_='check')
+    op.drop_column('tournaments', 'current_teams')
@@ -0,0 +1,194 @@
+"""maintain current_teams by trigger
+
+Revision ID: 9b1d7e3a5c42
+Revises: e4a9c2f61b73
+Create Date: 2026-10-17 13:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1d7e3a5c42'
+down_revision: Union[str, None] = 'e4a9c2f61b73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EVENTS = {'insert': ('INSERT', 'NEW TABLE AS new_rows'),
+          'delete': ('DELETE', 'OLD TABLE AS old_rows')}
+
+
+def upgrade() -> None:
+    # Счетчик меняется при любой вставке и удалении, в том числе каскадном
+    op.execute("""
+        CREATE OR REPLACE FUNCTION count_tournament_teams()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE tournaments t SET current_teams = t.current_teams + d.team_count
+                FROM (
+                    SELECT tournament_id, COUNT(*) AS team_count
+                    FROM new_rows
+                    GROUP BY tournament_id
+                ) d
+                WHERE t.id = d.tournament_id;
+            ELSE
+                UPDATE tournaments t SET current_teams = t.current_teams - d.team_count
+                FROM (
+                    SELECT tournament_id, COUNT(*) AS team_count
+                    FROM old_rows
+                    GROUP BY tournament_id
+                ) d
+                WHERE t.id = d.tournament_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for suffix, (event, referencing) in EVENTS.items():
+        op.execute(f"""
+            CREATE TRIGGER tournament_teams_count_{suffix}
+                AFTER {event} ON tournament_teams
+                REFERENCING {referencing}
+                FOR EACH STATEMENT
+                EXECUTE FUNCTION count_tournament_teams()
+        """)
+
+    # Сверка счетчика с tournament_teams; возвращает число исправленных турниров
+    op.execute("""
+        CREATE OR REPLACE FUNCTION sync_tournament_teams_count()
+        RETURNS INTEGER AS $$
+        DECLARE
+            fixed INTEGER;
+        BEGIN
+            UPDATE tournaments t SET current_teams = d.team_count
+            FROM (
+                SELECT t2.id, COUNT(tt.team_id) AS team_count
+                FROM tournaments t2
+                LEFT JOIN tournament_teams tt ON tt.tournament_id = t2.id
+                GROUP BY t2.id
+            ) d
+            WHERE t.id = d.id
+            AND t.current_teams <> d.team_count;
+            GET DIAGNOSTICS fixed = ROW_COUNT;
+            RETURN fixed;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("SELECT sync_tournament_teams_count()")
+
+    op.execute("DROP VIEW IF EXISTS active_tournaments")
+    op.execute("""
+        CREATE VIEW active_tournaments AS
+        SELECT t.*
+        FROM tournaments t
+        WHERE t.status IN ('REGISTRATION', 'IN_PROGRESS')
+    """)
+    op.execute("DROP VIEW IF EXISTS tournament_statistics")
+    op.execute("""
+        CREATE VIEW tournament_statistics AS
+        SELECT
+            t.id AS tournament_id,
+            t.name AS tournament_name,
+            t.status,
+            t.current_teams AS registered_teams,
+            t.max_teams,
+            COUNT(m.id) AS matches_count,
+            COUNT(CASE WHEN m.status = 'completed' THEN m.id END) AS completed_matches
+        FROM tournaments t
+        LEFT JOIN matches m ON t.id = m.tournament_id
+        GROUP BY t.id, t.name, t.status, t.current_teams, t.max_teams
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION check_tournament_registration(
+            p_tournament_id INTEGER,
+            p_team_id INTEGER
+        ) RETURNS BOOLEAN AS $$
+        BEGIN
+            RETURN EXISTS (
+                SELECT 1 FROM tournaments t
+                WHERE t.id = p_tournament_id
+                AND t.status = 'REGISTRATION'
+                AND (t.max_teams IS NULL OR t.current_teams < t.max_teams)
+            );
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    # Прежние определения с подсчетом tournament_teams
+    op.execute("""
+        CREATE OR REPLACE FUNCTION check_tournament_registration(
+            p_tournament_id INTEGER,
+            p_team_id INTEGER
+        ) RETURNS BOOLEAN AS $$
+        DECLARE
+            current_teams INTEGER;
+            max_teams INTEGER;
+            tournament_status tournamentstatus;
+        BEGIN
+            SELECT
+                COUNT(*),
+                t.max_teams,
+                t.status
+            INTO current_teams, max_teams, tournament_status
+            FROM tournaments t
+            LEFT JOIN tournament_teams tt ON t.id = tt.tournament_id
+            WHERE t.id = p_tournament_id
+            GROUP BY t.max_teams, t.status;
+
+            RETURN
+                tournament_status = 'REGISTRATION' AND
+                current_teams < max_teams;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP VIEW IF EXISTS tournament_statistics")
+    op.execute("""
+        CREATE VIEW tournament_statistics AS
+        SELECT
+            t.id AS tournament_id,
+            t.name AS tournament_name,
+            t.status,
+            COUNT(DISTINCT tt.team_id) AS registered_teams,
+            t.max_teams,
+            COUNT(DISTINCT m.id) AS matches_count,
+            COUNT(DISTINCT CASE WHEN m.status = 'completed' THEN m.id END) AS completed_matches
+        FROM tournaments t
+        LEFT JOIN tournament_teams tt ON t.id = tt.tournament_id
+        LEFT JOIN matches m ON t.id = m.tournament_id
+        GROUP BY t.id, t.name, t.status, t.max_teams
+    """)
+    # Столбцы турнира перечисляются явно: t.* включил бы current_teams,
+    # который предыдущая миграция удаляет, и совпал бы по имени с подсчетом
+    op.execute("DROP VIEW IF EXISTS active_tournaments")
+    op.execute("""
+        DO $$
+        DECLARE
+            tournament_columns TEXT;
+        BEGIN
+            SELECT string_agg(format('t.%I', column_name), ', ' ORDER BY ordinal_position)
+            INTO tournament_columns
+            FROM information_schema.columns
+            WHERE table_schema = current_schema()
+            AND table_name = 'tournaments'
+            AND column_name <> 'current_teams';
+
+            EXECUTE format('
+                CREATE VIEW active_tournaments AS
+                SELECT %s, COUNT(DISTINCT tt.team_id) AS current_teams
+                FROM tournaments t
+                LEFT JOIN tournament_teams tt ON t.id = tt.tournament_id
+                WHERE t.status IN (''REGISTRATION'', ''IN_PROGRESS'')
+                GROUP BY t.id
+            ', tournament_columns);
+        END
+        $$
+    """)
+    op.execute("DROP FUNCTION IF EXISTS sync_tournament_teams_count()")
+    for suffix in EVENTS:
+        op.execute(f"DROP TRIGGER IF EXISTS tournament_teams_count_{suffix} ON tournament_teams")
+    op.execute("DROP FUNCTION IF EXISTS count_tournament_teams()")